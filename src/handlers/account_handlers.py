@@ -1,322 +1,648 @@
+import hashlib
 import json
-import logging
-from typing import Any, Dict, Optional, Tuple
+import os
+from typing import Any, Dict, List, Optional, Tuple
 
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from pydantic import ValidationError
 
-from models.account import AccountRequest
+from models.account import AccountRequest, AddOptionRequest, DeleteAccountRequest, TierChangeRequest
+from utils.account_catalog import (
+    ACCOUNT_CATALOG_WARM,
+    decode_cursor,
+    get_account_catalog,
+    warm_account_catalog,
+)
+from utils.account_lock import AccountLockedError, account_locks
+from utils.api import (
+    BadRequestError,
+    error_response,
+    parse_body,
+    path_parameter,
+    read_body,
+    response,
+    validation_error,
+)
+from utils.circuit_breaker import CircuitOpenError
 from utils.config_generator import ConfigGenerator
-from utils.gitlab_client import GitLabClient
-from utils.validators import validate_account_request
+from utils.gitlab_client import AccountNotFoundError, GitLabConflictError, get_gitlab_client
+from utils.idempotency import idempotent
+from utils.json_serializer import dumps_compact
+from utils.rate_limiter import RateLimitedError
+from utils.request_queue import ASYNC_WRITES, QUEUED, RequestQueueError, enqueue_request
+from utils.stage_metrics import (
+    COMMIT,
+    ENQUEUE,
+    GITLAB_INIT,
+    PARSE,
+    READ,
+    RENDER,
+    VALIDATE,
+    stage,
+    stage_metrics,
+)
+from utils.validators import ValidationError as AccountValidationError
+from utils.validators import validate_account_name, validate_account_request, validate_option_name
 
 logger = Logger()
-tracer = Tracer()
+# python-gitlab runs on requests, idempotency and the request queue on botocore
+tracer = Tracer(patch_modules=["requests", "botocore"])
+
+# Largest batch accepted by batch_create_accounts_handler; every account is
+# rendered and committed within a single invocation, so keep it well inside
+# the Lambda timeout
+ACCOUNT_BATCH_MAX_ITEMS = int(os.environ.get("ACCOUNT_BATCH_MAX_ITEMS", "100"))
+ACCOUNT_BATCH_MAX_BYTES = int(os.environ.get("ACCOUNT_BATCH_MAX_BYTES", str(1024 * 1024)))
+
+# While the GitLab circuit breaker is open, queue write requests for the
+# request worker instead of failing them; the worker replays them once
+# GitLab recovers
+GITLAB_OUTAGE_SPOOL = os.environ.get("GITLAB_OUTAGE_SPOOL", "false").lower() == "true"
+
+# Read functions fetch every request.json during the init phase, so that
+# requests only pick up the changes made since
+if ACCOUNT_CATALOG_WARM:
+    warm_account_catalog()
 
 def _handle_error(error: Exception) -> Dict[str, Any]:
     """Handle and format error responses"""
+    if isinstance(error, ValidationError):
+        error = validation_error(error)
+    
+    if isinstance(error, BadRequestError):
+        logger.info("Rejected malformed request", extra={"error": str(error)})
+        return error_response(400, str(error), error.details)
+    
+    if isinstance(error, AccountValidationError):
+        return error_response(400, str(error))
+    
+    if isinstance(error, AccountNotFoundError):
+        return error_response(404, str(error))
+    
+    if isinstance(error, AccountLockedError):
+        logger.info(
+            "Account busy with another operation", extra={"account_name": error.account_name}
+        )
+        return error_response(409, str(error), headers={"Retry-After": str(error.retry_after)})
+    
+    if isinstance(error, RateLimitedError):
+        logger.warning("Shedding request over the GitLab API rate limit")
+        return error_response(429, str(error), headers={"Retry-After": str(error.retry_after)})
+    
+    if isinstance(error, CircuitOpenError):
+        logger.warning("Failing fast while GitLab is unavailable")
+        return error_response(503, str(error), headers={"Retry-After": str(error.retry_after)})
+    
+    if isinstance(error, GitLabConflictError):
+        logger.warning("Conflicting commit on the AFT branch", extra={"error": str(error)})
+        return error_response(409, str(error))
+    
+    if isinstance(error, RequestQueueError):
+        logger.exception("Request queue unavailable")
+        return error_response(503, str(error))
+    
     logger.exception("Error processing request")
-    return {
-        "statusCode": 500,
-        "headers": {"Content-Type": "application/json"},
-        "body": json.dumps({"error": str(error)})
-    }
+    return error_response(500, str(error))
+
+
+def _accepted(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a 202 Accepted response"""
+    return response(202, body)
+
+
+def _enqueue_config_files(
+    config_files: List[Any], commit_message: str, response_body: Dict[str, Any],
+    account_names: List[str]
+) -> str:
+    """Queue configuration files for the request worker and return the request ID"""
+    with stage(ENQUEUE):
+        return enqueue_request(
+            "commit",
+            {
+                "files": [{"file_path": f.file_path, "content": f.content} for f in config_files],
+                "commit_message": commit_message,
+                "account_names": account_names
+            },
+            summary={
+                key: value
+                for key, value in response_body.items()
+                if key not in ("message", "items")
+            }
+        )
+
+
+def _enqueue_delete(account_name: str) -> str:
+    """Queue an account deletion for the request worker and return the request ID"""
+    with stage(ENQUEUE):
+        return enqueue_request(
+            "delete",
+            {"account_name": account_name, "commit_message": f"Delete account: {account_name}"},
+            summary={"account_name": account_name}
+        )
+
+
+def _submit_config_files(
+    config_files: List[Any], commit_message: str, response_body: Dict[str, Any],
+    account_names: List[str]
+) -> Dict[str, Any]:
+    """
+    Commit configuration files to GitLab, or queue them in asynchronous mode
+    
+    When GITLAB_OUTAGE_SPOOL is set, files that cannot be committed because
+    the GitLab circuit breaker is open are queued as well.
+    
+    Args:
+        config_files: Files to commit
+        commit_message: Commit message
+        response_body: Response fields describing the request
+        account_names: Accounts the files belong to, locked while they are committed
+        
+    Returns:
+        202 response with the commit SHA, or with the request ID to poll when queued
+        
+    Raises:
+        AccountLockedError: If another operation kept one of the accounts busy
+        CircuitOpenError: If GitLab is unavailable and spooling is off
+    """
+    if ASYNC_WRITES:
+        # The queue's per-account message groups keep the requests in order;
+        # the worker takes the account leases when it commits them
+        request_id = _enqueue_config_files(
+            config_files, commit_message, response_body, account_names
+        )
+        return _accepted({
+            **response_body,
+            "request_id": request_id,
+            "status": QUEUED
+        })
+    
+    with stage(GITLAB_INIT):
+        gitlab_client = get_gitlab_client()
+    with account_locks(account_names):
+        try:
+            with stage(COMMIT):
+                commit_result = gitlab_client.commit_config_files(
+                    config_files=config_files,
+                    commit_message=commit_message
+                )
+        except CircuitOpenError:
+            if not GITLAB_OUTAGE_SPOOL:
+                raise
+            logger.warning(
+                "GitLab unavailable, spooling the request", extra={"account_names": account_names}
+            )
+            request_id = _enqueue_config_files(
+                config_files, commit_message, response_body, account_names
+            )
+            return _accepted({
+                **response_body,
+                "request_id": request_id,
+                "status": QUEUED,
+                "spooled": True
+            })
+    
+    return _accepted({
+        **response_body,
+        "commit_sha": commit_result.commit_sha,
+        "no_change": commit_result.no_change
+    })
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def create_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for account creation requests"""
     try:
         # Parse and validate the request
-        body = json.loads(event.get("body", "{}"))
-        account_request = AccountRequest(**body)
-        
-        validate_account_request(account_request)
+        with stage(PARSE):
+            account_request = parse_body(event, AccountRequest)
+        with stage(VALIDATE):
+            validate_account_request(account_request)
         
         # Generate configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_account_config(account_request)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_account_config(account_request)
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Create account: {account_request.account_name}"
+            commit_message=f"Create account: {account_request.account_name}",
+            response_body={
+                "message": "Account creation request submitted",
+                "account_name": account_request.account_name
+            },
+            account_names=[account_request.account_name]
         )
+    except Exception as e:
+        return _handle_error(e)
+
+
+def _parse_batch(body: str) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Split a batch body into items
+    
+    Args:
+        body: JSON array or JSON Lines of account requests
         
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
-                "message": "Account creation request submitted",
-                "account_name": account_request.account_name,
-                "commit_sha": commit_sha
-            })
-        }
+    Returns:
+        The parsed item, or the error that prevented parsing it, per item
+    """
+    stripped = body.strip()
+    if stripped.startswith("["):
+        items = json.loads(stripped)
+        return [
+            (item, None) if isinstance(item, dict) else (None, "Item must be an object")
+            for item in items
+        ]
+    
+    parsed: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = []
+    for line in stripped.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            parsed.append((None, f"Invalid JSON: {str(e)}"))
+            continue
+        parsed.append((item, None) if isinstance(item, dict) else (None, "Item must be an object"))
+    return parsed
+
+
+@logger.inject_lambda_context(log_event=True)
+@tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
+def batch_create_accounts_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Lambda handler for bulk account creation requests
+    
+    The body is a JSON array or JSON Lines of account requests. Every item is
+    validated on its own; the valid ones are rendered in one pass and pushed
+    as a single commit, and the response lists the status of each item.
+    """
+    try:
+        body = read_body(event) if event.get("body") else b""
+        if len(body) > ACCOUNT_BATCH_MAX_BYTES:
+            return error_response(413, f"Batch body exceeds {ACCOUNT_BATCH_MAX_BYTES} bytes")
+        
+        try:
+            with stage(PARSE):
+                items = _parse_batch(body.decode("utf-8"))
+        except ValueError as e:
+            raise BadRequestError(f"Invalid batch body: {str(e)}") from e
+        
+        if not items:
+            raise BadRequestError("Batch is empty")
+        
+        if len(items) > ACCOUNT_BATCH_MAX_ITEMS:
+            return error_response(413, f"Batch exceeds {ACCOUNT_BATCH_MAX_ITEMS} accounts")
+        
+        # Validate every item, keeping the first request for each account name
+        results: List[Dict[str, Any]] = []
+        accepted: List[AccountRequest] = []
+        seen_names = set()
+        with stage(VALIDATE):
+            for index, (item, error) in enumerate(items):
+                result: Dict[str, Any] = {
+                    "index": index, "account_name": (item or {}).get("account_name")
+                }
+                if error is None:
+                    try:
+                        # Items are already decoded, so each one is validated from its dict
+                        account_request = AccountRequest.model_validate(item)
+                        validate_account_request(account_request)
+                        if account_request.account_name in seen_names:
+                            raise ValueError(
+                                f"Duplicate account name {account_request.account_name} in batch"
+                            )
+                        seen_names.add(account_request.account_name)
+                        accepted.append(account_request)
+                    except ValidationError as e:
+                        error = str(validation_error(e))
+                    except Exception as e:
+                        error = str(e)
+                result.update(
+                    {"status": "rejected", "error": error} if error else {"status": "accepted"}
+                )
+                results.append(result)
+        
+        if not accepted:
+            return response(400, {"error": "No valid account requests in batch", "items": results})
+        
+        # Render every account in one pass and push a single commit
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = list(config_generator.generate_many(accepted))
+        
+        names = [account_request.account_name for account_request in accepted]
+        return _submit_config_files(
+            config_files=config_files,
+            commit_message=f"Create {len(names)} accounts\n\n" + "\n".join(names),
+            response_body={
+                "message": "Account batch creation request submitted",
+                "accepted": len(accepted),
+                "rejected": len(results) - len(accepted),
+                "items": results
+            },
+            account_names=names
+        )
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def update_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for account update requests"""
     try:
         # Parse and validate the request
-        body = json.loads(event.get("body", "{}"))
-        account_request = AccountRequest(**body)
-        
-        validate_account_request(account_request, update=True)
+        with stage(PARSE):
+            account_request = parse_body(event, AccountRequest)
+        with stage(VALIDATE):
+            validate_account_request(account_request, update=True)
         
         # Generate configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_account_config(account_request, update=True)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_account_config(account_request, update=True)
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Update account: {account_request.account_name}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            commit_message=f"Update account: {account_request.account_name}",
+            response_body={
                 "message": "Account update request submitted",
-                "account_name": account_request.account_name,
-                "commit_sha": commit_sha
-            })
-        }
+                "account_name": account_request.account_name
+            },
+            account_names=[account_request.account_name]
+        )
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def delete_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for account deletion requests"""
     try:
-        # Parse the request
-        body = json.loads(event.get("body", "{}"))
-        account_name = body.get("account_name")
-        
-        if not account_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "account_name is required"})
-            }
+        # The route carries the account name; older clients send it in the body
+        with stage(PARSE):
+            account_name = (event.get("pathParameters") or {}).get("accountName")
+            if not account_name:
+                account_name = parse_body(event, DeleteAccountRequest).account_name
+            validate_account_name(account_name)
         
         # Delete configuration
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.delete_account_config(
-            account_name=account_name,
-            commit_message=f"Delete account: {account_name}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+        if ASYNC_WRITES:
+            request_id = _enqueue_delete(account_name)
+            return _accepted({
                 "message": "Account deletion request submitted",
                 "account_name": account_name,
-                "commit_sha": commit_sha
+                "request_id": request_id,
+                "status": QUEUED
             })
-        }
+        
+        with stage(GITLAB_INIT):
+            gitlab_client = get_gitlab_client()
+        with account_locks([account_name]):
+            try:
+                with stage(COMMIT):
+                    commit_sha = gitlab_client.delete_account_config(
+                        account_name=account_name,
+                        commit_message=f"Delete account: {account_name}"
+                    )
+            except CircuitOpenError:
+                if not GITLAB_OUTAGE_SPOOL:
+                    raise
+                logger.warning(
+                    "GitLab unavailable, spooling the request",
+                    extra={"account_names": [account_name]}
+                )
+                return _accepted({
+                    "message": "Account deletion request submitted",
+                    "account_name": account_name,
+                    "request_id": _enqueue_delete(account_name),
+                    "status": QUEUED,
+                    "spooled": True
+                })
+        
+        return _accepted({
+            "message": "Account deletion request submitted",
+            "account_name": account_name,
+            "commit_sha": commit_sha
+        })
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def upgrade_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for account upgrade requests"""
     try:
-        # Get the account name from the path parameters
-        account_name = event.get("pathParameters", {}).get("accountName")
-        if not account_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "accountName is required"})
-            }
-        
-        # Parse the request body
-        body = json.loads(event.get("body", "{}"))
-        target_tier = body.get("targetTier")
-        
-        if not target_tier:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "targetTier is required"})
-            }
+        # Parse the path parameters and the request body
+        with stage(PARSE):
+            account_name = path_parameter(event, "accountName")
+            validate_account_name(account_name)
+            target_tier = parse_body(event, TierChangeRequest).target_tier
         
         # Generate upgrade configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_upgrade_config(account_name, target_tier)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_upgrade_config(account_name, target_tier)
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Upgrade account {account_name} to {target_tier}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            commit_message=f"Upgrade account {account_name} to {target_tier}",
+            response_body={
                 "message": "Account upgrade request submitted",
                 "account_name": account_name,
-                "target_tier": target_tier,
-                "commit_sha": commit_sha
-            })
-        }
+                "target_tier": target_tier
+            },
+            account_names=[account_name]
+        )
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def downgrade_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for account downgrade requests"""
     try:
-        # Get the account name from the path parameters
-        account_name = event.get("pathParameters", {}).get("accountName")
-        if not account_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "accountName is required"})
-            }
-        
-        # Parse the request body
-        body = json.loads(event.get("body", "{}"))
-        target_tier = body.get("targetTier")
-        
-        if not target_tier:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "targetTier is required"})
-            }
+        # Parse the path parameters and the request body
+        with stage(PARSE):
+            account_name = path_parameter(event, "accountName")
+            validate_account_name(account_name)
+            target_tier = parse_body(event, TierChangeRequest).target_tier
         
         # Generate downgrade configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_downgrade_config(account_name, target_tier)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_downgrade_config(account_name, target_tier)
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Downgrade account {account_name} to {target_tier}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            commit_message=f"Downgrade account {account_name} to {target_tier}",
+            response_body={
                 "message": "Account downgrade request submitted",
                 "account_name": account_name,
-                "target_tier": target_tier,
-                "commit_sha": commit_sha
-            })
-        }
+                "target_tier": target_tier
+            },
+            account_names=[account_name]
+        )
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def add_option_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for adding options to an account"""
     try:
-        # Get the account name from the path parameters
-        account_name = event.get("pathParameters", {}).get("accountName")
-        if not account_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "accountName is required"})
-            }
-        
-        # Parse the request body
-        body = json.loads(event.get("body", "{}"))
-        option_name = body.get("optionName")
-        option_config = body.get("optionConfig", {})
-        
-        if not option_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "optionName is required"})
-            }
+        # Parse the path parameters and the request body
+        with stage(PARSE):
+            account_name = path_parameter(event, "accountName")
+            validate_account_name(account_name)
+            option = parse_body(event, AddOptionRequest)
+            option_name, option_config = option.option_name, option.option_config
+            validate_option_name(option_name)
         
         # Generate option configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_add_option_config(account_name, option_name, option_config)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_add_option_config(
+                account_name, option_name, option_config
+            )
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Add option {option_name} to account {account_name}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            commit_message=f"Add option {option_name} to account {account_name}",
+            response_body={
                 "message": "Add option request submitted",
                 "account_name": account_name,
-                "option_name": option_name,
-                "commit_sha": commit_sha
-            })
-        }
+                "option_name": option_name
+            },
+            account_names=[account_name]
+        )
     except Exception as e:
         return _handle_error(e)
 
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
+@stage_metrics
+@idempotent
 def remove_option_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
     """Lambda handler for removing options from an account"""
     try:
         # Get the account name and option name from the path parameters
-        path_params = event.get("pathParameters", {})
-        account_name = path_params.get("accountName")
-        option_name = path_params.get("optionName")
-        
-        if not account_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "accountName is required"})
-            }
-        
-        if not option_name:
-            return {
-                "statusCode": 400,
-                "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"error": "optionName is required"})
-            }
+        with stage(PARSE):
+            account_name = path_parameter(event, "accountName")
+            validate_account_name(account_name)
+            option_name = path_parameter(event, "optionName")
+            validate_option_name(option_name)
         
         # Generate option removal configuration
-        config_generator = ConfigGenerator()
-        config_files = config_generator.generate_remove_option_config(account_name, option_name)
+        with stage(RENDER):
+            config_generator = ConfigGenerator()
+            config_files = config_generator.generate_remove_option_config(account_name, option_name)
         
-        # Push to GitLab
-        gitlab_client = GitLabClient()
-        commit_sha = gitlab_client.commit_config_files(
+        return _submit_config_files(
             config_files=config_files,
-            commit_message=f"Remove option {option_name} from account {account_name}"
-        )
-        
-        return {
-            "statusCode": 202,
-            "headers": {"Content-Type": "application/json"},
-            "body": json.dumps({
+            commit_message=f"Remove option {option_name} from account {account_name}",
+            response_body={
                 "message": "Remove option request submitted",
                 "account_name": account_name,
-                "option_name": option_name,
-                "commit_sha": commit_sha
-            })
-        }
+                "option_name": option_name
+            },
+            account_names=[account_name]
+        )
+    except Exception as e:
+        return _handle_error(e)
+
+
+def _read_response(event: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Format a read response with a strong ETag, or 304 if the client already has it
+    
+    Args:
+        event: API Gateway event, for the If-None-Match header
+        payload: Response body
+        
+    Returns:
+        200 response with the body and ETag, or 304 without a body
+    """
+    body = dumps_compact(payload, sort_keys=True)
+    etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest() + '"'
+    headers = {"Content-Type": "application/json", "ETag": etag, "Cache-Control": "no-cache"}
+    
+    request_headers = (event.get("headers") or {}).items()
+    if_none_match = next(
+        (value for name, value in request_headers if name.lower() == "if-none-match"), None
+    )
+    if if_none_match:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # If-None-Match uses the weak comparison
+        weak = [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+        if "*" in candidates or etag in weak:
+            return {"statusCode": 304, "headers": headers, "body": ""}
+    
+    return {"statusCode": 200, "headers": headers, "body": body}
+
+
+@logger.inject_lambda_context(log_event=True)
+@tracer.capture_lambda_handler
+@stage_metrics
+def list_accounts_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """Lambda handler listing accounts, filtered by OU or tag, with cursor pagination"""
+    try:
+        params = event.get("queryStringParameters") or {}
+        with stage(PARSE):
+            try:
+                limit = int(params.get("limit", "50"))
+                if params.get("cursor"):
+                    decode_cursor(params["cursor"])
+            except ValueError as e:
+                raise BadRequestError(str(e)) from e
+        
+        with stage(GITLAB_INIT):
+            catalog = get_account_catalog()
+        with stage(READ):
+            accounts, next_cursor = catalog.list(
+                organizational_unit=params.get("ou"),
+                tag=params.get("tag"),
+                cursor=params.get("cursor"),
+                limit=limit
+            )
+        
+        return _read_response(event, {"accounts": accounts, "next_cursor": next_cursor})
     except Exception as e:
-        return _handle_error(e) 
\ No newline at end of file
+        return _handle_error(e)
+
+
+@logger.inject_lambda_context(log_event=True)
+@tracer.capture_lambda_handler
+@stage_metrics
+def get_account_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """Lambda handler returning one account request"""
+    try:
+        with stage(PARSE):
+            account_name = path_parameter(event, "accountName")
+            validate_account_name(account_name)
+        
+        with stage(GITLAB_INIT):
+            catalog = get_account_catalog()
+        with stage(READ):
+            account = catalog.get(account_name)
+        if account is None:
+            raise AccountNotFoundError(f"Account {account_name} not found")
+        
+        return _read_response(event, account)
+    except Exception as e:
+        return _handle_error(e)
@@ -1,6 +1,11 @@
+import hashlib
 import json
 import logging
-from typing import Dict, Any, Optional
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
 
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -8,7 +13,8 @@ from aws_lambda_powertools.utilities.typing import LambdaContext
 from utils.auth import get_token_from_header, validate_token, check_permissions, AuthError
 
 logger = Logger()
-tracer = Tracer()
+# Patch only what the authorizer calls; auto-patching imports every supported library
+tracer = Tracer(patch_modules=["requests"])
 
 # Define API permissions map - mapping HTTP methods to required permissions
 API_PERMISSIONS = {
@@ -18,6 +24,90 @@ API_PERMISSIONS = {
     "DELETE": "write"
 }
 
+# Response format: "auto" picks simple responses for payload format 2.0,
+# "simple" and "policy" force one format regardless of the payload version
+AUTHORIZER_RESPONSE_MODE = os.environ.get("AUTHORIZER_RESPONSE_MODE", "auto")
+
+# Maximum number of verified-token decisions kept per container
+DECISION_CACHE_SIZE = int(os.environ.get("AUTH_DECISION_CACHE_SIZE", "1024"))
+
+
+class DecisionCache:
+    """
+    Bounded LRU cache of authorization decisions for verified tokens.
+
+    Entries are keyed by a hash of the bearer token and the HTTP method, so the
+    raw token is never kept in memory, and expire at the token's ``exp`` claim.
+    Hits skip both the RS256 signature check and the permission lookup.
+    """
+
+    def __init__(self, max_size: int = DECISION_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(token: str, method: str) -> str:
+        """Build the cache key for a token and HTTP method"""
+        return hashlib.sha256(f"{method}:{token}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached decision
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The cached decision, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, decision: Dict[str, Any], expires_at: float) -> None:
+        """
+        Store a decision until the token expires
+
+        Args:
+            key: Cache key from make_key
+            decision: Decision to cache
+            expires_at: Epoch time after which the decision is no longer valid
+        """
+        if self.max_size <= 0 or expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, decision)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached decisions and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache counters"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_decision_cache = DecisionCache()
+
+
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
 def lambda_authorizer(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
@@ -34,56 +124,120 @@ def lambda_authorizer(event: Dict[str, Any], context: LambdaContext) -> Dict[str
     logger.debug("Authorization request", extra={"event": event})
     
     # Extract request parameters
-    method_arn = event.get("methodArn", "")
+    method_arn = event.get("methodArn") or event.get("routeArn", "")
+    simple_response = _use_simple_responses(event)
     
     try:
         # Get token from authorization header
         token = get_token_from_header(event)
         
-        # Validate token
-        claims = validate_token(token)
-        logger.debug("Token validated successfully", extra={"claims": claims})
-        
         # Get HTTP method for permission check
         method = event.get("requestContext", {}).get("http", {}).get("method", "")
-        required_permission = API_PERMISSIONS.get(method, "write")  # Default to write permission
         
-        # Check if user has required permissions
-        if not check_permissions(claims, required_permission):
-            logger.warning("Permission denied", extra={
-                "user": claims.get("email"),
-                "required_permission": required_permission
-            })
-            raise AuthError({"message": "User does not have required permissions"}, 403)
+        cache_key = DecisionCache.make_key(token, method)
+        decision = _decision_cache.get(cache_key)
+        if decision is None:
+            decision, expires_at = _authorize(token, method)
+            _decision_cache.put(cache_key, decision, expires_at)
+        
+        logger.info("Authorization decision", extra={
+            "effect": decision["effect"],
+            "decision_cache": _decision_cache.stats()
+        })
+        
+        if simple_response:
+            return generate_simple_response(
+                is_authorized=decision["effect"] == "Allow",
+                context=decision["context"]
+            )
         
         # Generate policy
-        policy = generate_policy(
-            principal_id=claims.get("sub", "user"),
-            effect="Allow",
+        return generate_policy(
+            principal_id=decision["principal_id"],
+            effect=decision["effect"],
             resource=method_arn,
-            context={
-                "email": claims.get("email", ""),
-                "groups": ",".join(claims.get("cognito:groups", [])),
-            }
+            context=decision["context"]
         )
-        
-        return policy
     except AuthError as e:
         logger.error(f"Authorization error: {str(e)}", extra={"error": e.error, "status_code": e.status_code})
         # For token validation errors, deny access
-        return generate_policy(
-            principal_id="user",
-            effect="Deny",
-            resource=method_arn
-        )
+        return _deny(method_arn, simple_response)
     except Exception as e:
         # For unexpected errors, log and deny access
         logger.exception(f"Unexpected error in authorizer: {str(e)}")
-        return generate_policy(
-            principal_id="user",
-            effect="Deny",
-            resource=method_arn
-        )
+        return _deny(method_arn, simple_response)
+
+
+def _use_simple_responses(event: Dict[str, Any]) -> bool:
+    """
+    Decide which response format API Gateway expects for this event
+    
+    Args:
+        event: Lambda event
+        
+    Returns:
+        True for simple responses, False for IAM policies
+    """
+    if AUTHORIZER_RESPONSE_MODE == "simple":
+        return True
+    if AUTHORIZER_RESPONSE_MODE == "policy":
+        return False
+    # HTTP APIs send payload format 2.0, which is where simple responses exist
+    return event.get("version") == "2.0"
+
+
+def _deny(method_arn: str, simple_response: bool) -> Dict[str, Any]:
+    """Build a deny response in the expected format"""
+    if simple_response:
+        return generate_simple_response(is_authorized=False)
+    return generate_policy(
+        principal_id="user",
+        effect="Deny",
+        resource=method_arn
+    )
+
+
+def _authorize(token: str, method: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Verify a token and decide whether it may call the given method
+    
+    Args:
+        token: Bearer token from the request
+        method: HTTP method of the request
+        
+    Returns:
+        Tuple of the decision and the epoch time it stays valid until
+        
+    Raises:
+        AuthError: If the token is invalid
+    """
+    # Validate token
+    claims = validate_token(token)
+    logger.debug("Token validated successfully", extra={"claims": claims})
+    
+    required_permission = API_PERMISSIONS.get(method, "write")  # Default to write permission
+    expires_at = float(claims.get("exp", 0))
+    
+    # Check if user has required permissions
+    if not check_permissions(claims, required_permission):
+        logger.warning("Permission denied", extra={
+            "user": claims.get("email"),
+            "required_permission": required_permission
+        })
+        # The token is genuine, so the denial holds until it expires
+        denial = {"principal_id": claims.get("sub", "user"), "effect": "Deny", "context": None}
+        return denial, expires_at
+    
+    decision = {
+        "principal_id": claims.get("sub", "user"),
+        "effect": "Allow",
+        "context": {
+            "principal_id": claims.get("sub", "user"),
+            "email": claims.get("email", ""),
+            "groups": ",".join(claims.get("cognito:groups", [])),
+        }
+    }
+    return decision, expires_at
 
 
 def generate_policy(principal_id: str, effect: str, resource: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -117,4 +271,30 @@ def generate_policy(principal_id: str, effect: str, resource: str, context: Opti
     if context:
         policy["context"] = context
     
-    return policy 
\ No newline at end of file
+    return policy
+
+
+def generate_simple_response(
+    is_authorized: bool, context: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Generate a simple authorizer response for HTTP APIs
+    
+    Unlike an IAM policy, a simple response is not tied to one route, so API
+    Gateway can reuse a cached result for every route sharing the identity
+    sources.
+    
+    Args:
+        is_authorized: Whether the request is allowed
+        context: Additional context to pass to API Gateway
+        
+    Returns:
+        Simple authorizer response
+    """
+    response: Dict[str, Any] = {"isAuthorized": is_authorized}
+    
+    # Add context if provided
+    if context:
+        response["context"] = context
+    
+    return response
@@ -0,0 +1,243 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from utils.account_lock import AccountLockedError, account_locks
+from utils.api import JSON_HEADERS, BadRequestError, error_response, path_parameter
+from utils.circuit_breaker import CircuitOpenError
+from utils.json_serializer import dumps_compact
+from utils.rate_limiter import RateLimitedError
+from utils.request_queue import COMMITTED, FAILED, get_request_queue, get_request_status_store
+
+logger = Logger()
+# The status endpoint only reads DynamoDB; the worker patches requests on first use
+tracer = Tracer(patch_modules=["botocore"])
+
+# Failed attempts before a request is marked as failed and dead-lettered.
+# Deliveries deferred while an account was busy do not count.
+REQUEST_MAX_RECEIVES = int(os.environ.get("REQUEST_MAX_RECEIVES", "5"))
+# Deliveries of any kind before the redrive policy moves a message to the
+# dead-letter queue (its maxReceiveCount); a backstop for endless deferrals
+REQUEST_MAX_DELIVERIES = int(os.environ.get("REQUEST_MAX_DELIVERIES", "50"))
+
+
+def _process(message: Dict[str, Any]) -> None:
+    """Apply one queued write request to GitLab and record its outcome"""
+    # Only the worker talks to GitLab; the status endpoint skips these imports
+    from models.account import AccountConfigFile
+    from utils.gitlab_client import AccountNotFoundError, get_gitlab_client
+
+    # A request handled inline may hold the account; a busy account raises
+    # AccountLockedError and the message is deferred
+    account_names = message.get("account_names") or (
+        [message["account_name"]] if "account_name" in message else []
+    )
+
+    store = get_request_status_store()
+    gitlab_client = get_gitlab_client()
+
+    if message["operation"] == "delete":
+        try:
+            with account_locks(account_names):
+                commit_sha = gitlab_client.delete_account_config(
+                    account_name=message["account_name"],
+                    commit_message=message["commit_message"]
+                )
+        except AccountNotFoundError as e:
+            # Retrying cannot help
+            store.update(
+                message["request_id"], status=FAILED, error=str(e), updated_at=int(time.time())
+            )
+            return
+        store.update(
+            message["request_id"],
+            status=COMMITTED,
+            commit_sha=commit_sha,
+            updated_at=int(time.time())
+        )
+        return
+
+    with account_locks(account_names):
+        commit_result = gitlab_client.commit_config_files(
+            config_files=[AccountConfigFile(**f) for f in message["files"]],
+            commit_message=message["commit_message"]
+        )
+    store.update(
+        message["request_id"],
+        status=COMMITTED,
+        commit_sha=commit_result.commit_sha,
+        no_change=commit_result.no_change,
+        updated_at=int(time.time())
+    )
+
+
+def _request_id(record: Dict[str, Any]) -> Optional[str]:
+    """Request ID of a message, or None if its body cannot be decoded"""
+    try:
+        # Reference bodies of large messages carry the request ID as well
+        return json.loads(record["body"])["request_id"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _receives(record: Dict[str, Any]) -> int:
+    return int(record.get("attributes", {}).get("ApproximateReceiveCount", "1"))
+
+
+def _attempts(record: Dict[str, Any], request_id: Optional[str]) -> int:
+    """Deliveries of a message that were actually processed"""
+    status = (get_request_status_store().get(request_id) if request_id else None) or {}
+    return _receives(record) - int(status.get("deferrals", 0))
+
+
+def _retry_later(record: Dict[str, Any], reason: str, seconds: Optional[int] = None) -> None:
+    """
+    Hand a message back to the queue without spending one of its attempts
+
+    On the last delivery the redrive policy allows, the request is marked as
+    failed instead, as the message moves to the dead-letter queue.
+
+    Args:
+        record: SQS record of the message
+        reason: Why the message could not be processed now
+        seconds: Delay before the message is delivered again; by default it
+            reappears once the queue's visibility timeout expires
+    """
+    try:
+        request_id = _request_id(record)
+        if _receives(record) >= REQUEST_MAX_DELIVERIES:
+            if request_id is not None:
+                get_request_status_store().update(
+                    request_id, status=FAILED, error=reason, updated_at=int(time.time())
+                )
+            return
+        if request_id is not None:
+            get_request_status_store().increment(request_id, "deferrals")
+        if seconds is not None:
+            get_request_queue().defer(record, seconds)
+    except Exception:
+        # The message is still redelivered; this delivery only counts as an attempt
+        logger.exception(
+            "Failed to defer queued request", extra={"message_id": record["messageId"]}
+        )
+
+
+_requests_patched = False
+
+
+def _patch_requests() -> None:
+    """Trace python-gitlab's HTTP calls, once per container"""
+    global _requests_patched
+    if not _requests_patched:
+        tracer.patch(["requests"])
+        _requests_patched = True
+
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+def request_worker_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    SQS worker committing queued write requests to GitLab
+
+    Failed messages are reported as batch item failures so that only they
+    are redelivered. Later messages of the same FIFO group are returned
+    unprocessed, so that requests for an account still apply in order. A
+    message for a busy account is hidden until the lease may have expired,
+    one refused a GitLab API token until a token is expected, and while the
+    GitLab circuit breaker is open the rest of the batch is hidden until the
+    breaker may close. None of these count as an attempt:
+    after REQUEST_MAX_RECEIVES failed attempts the request is marked as
+    failed and its message moved to the dead-letter queue.
+    """
+    _patch_requests()
+    failures = []
+    failed_groups = set()
+    records = event.get("Records", [])
+    for position, record in enumerate(records):
+        group = record.get("attributes", {}).get("MessageGroupId")
+        if group is not None and group in failed_groups:
+            _retry_later(record, "An earlier request for the same accounts failed")
+            failures.append({"itemIdentifier": record["messageId"]})
+            continue
+        try:
+            message = get_request_queue().load(record["body"])
+            _process(message)
+        except AccountLockedError as e:
+            logger.info(
+                "Account busy, deferring the queued request",
+                extra={"message_id": record["messageId"], "retry_after": e.retry_after}
+            )
+            _retry_later(record, str(e), e.retry_after)
+            failures.append({"itemIdentifier": record["messageId"]})
+            failed_groups.add(group)
+        except RateLimitedError as e:
+            logger.info(
+                "GitLab API rate limit reached, deferring the queued request",
+                extra={"message_id": record["messageId"], "retry_after": e.retry_after}
+            )
+            _retry_later(record, str(e), e.retry_after)
+            failures.append({"itemIdentifier": record["messageId"]})
+            failed_groups.add(group)
+        except CircuitOpenError as e:
+            # GitLab is down: hide this and the remaining messages until the
+            # breaker may close, to be replayed then
+            logger.warning(
+                "GitLab unavailable, deferring the batch",
+                extra={"message_id": record["messageId"], "retry_after": e.retry_after}
+            )
+            for pending in records[position:]:
+                _retry_later(pending, str(e), e.retry_after)
+                failures.append({"itemIdentifier": pending["messageId"]})
+            break
+        except Exception as e:
+            request_id = _request_id(record)
+            attempts = _attempts(record, request_id)
+            logger.exception(
+                "Failed to process queued request",
+                extra={"request_id": request_id, "attempt": attempts}
+            )
+            exhausted = attempts >= REQUEST_MAX_RECEIVES
+            if request_id is not None:
+                fields = {"error": str(e), "updated_at": int(time.time())}
+                if exhausted:
+                    fields["status"] = FAILED
+                get_request_status_store().update(request_id, **fields)
+            if exhausted:
+                # Deferred deliveries keep the redrive policy from spotting the
+                # last attempt, so the worker dead-letters the message itself
+                get_request_queue().dead_letter(record)
+                continue
+            failures.append({"itemIdentifier": record["messageId"]})
+            failed_groups.add(group)
+
+    return {"batchItemFailures": failures}
+
+
+@logger.inject_lambda_context(log_event=True)
+@tracer.capture_lambda_handler
+def get_request_status_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """Lambda handler reporting the status of a queued write request"""
+    try:
+        request_id = path_parameter(event, "requestId")
+    except BadRequestError as e:
+        return error_response(400, str(e))
+
+    try:
+        record = get_request_status_store().get(request_id)
+    except Exception as e:
+        logger.exception("Error reading request status")
+        return error_response(500, str(e))
+
+    if record is None:
+        return error_response(404, f"Request {request_id} not found")
+
+    # DynamoDB returns numbers as Decimal
+    return {
+        "statusCode": 200,
+        "headers": dict(JSON_HEADERS),
+        "body": dumps_compact({"request_id": request_id, **record}, default=int)
+    }
@@ -0,0 +1,81 @@
+import re
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+from handlers import account_handlers, request_handlers
+from utils.api import error_response
+
+Handler = Callable[[Dict[str, Any], LambdaContext], Dict[str, Any]]
+
+# API Gateway v2 route keys and the handler serving each of them
+ROUTES: Dict[str, Handler] = {
+    "GET /accounts": account_handlers.list_accounts_handler,
+    "GET /accounts/{accountName}": account_handlers.get_account_handler,
+    "POST /accounts": account_handlers.create_account_handler,
+    "POST /accounts:batch": account_handlers.batch_create_accounts_handler,
+    "PUT /accounts/{accountName}": account_handlers.update_account_handler,
+    "DELETE /accounts/{accountName}": account_handlers.delete_account_handler,
+    "POST /accounts/{accountName}/upgrade": account_handlers.upgrade_account_handler,
+    "POST /accounts/{accountName}/downgrade": account_handlers.downgrade_account_handler,
+    "POST /accounts/{accountName}/options": account_handlers.add_option_handler,
+    "DELETE /accounts/{accountName}/options/{optionName}": account_handlers.remove_option_handler,
+    "GET /requests/{requestId}": request_handlers.get_request_status_handler,
+}
+
+
+def _compile_route(route_key: str) -> Tuple[str, Pattern[str]]:
+    """Turn "METHOD /path/{param}" into the method and a regex capturing the parameters"""
+    method, path = route_key.split(" ", 1)
+    pattern = re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(path))
+    return method, re.compile(f"^{pattern}$")
+
+
+# Used when the event does not carry a known routeKey, e.g. behind a $default route
+_ROUTE_PATTERNS: List[Tuple[str, Pattern[str], str]] = [
+    (*_compile_route(route_key), route_key) for route_key in ROUTES
+]
+
+
+def resolve_route(event: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Find the route of an API Gateway v2 event
+
+    Args:
+        event: API Gateway HTTP API event
+
+    Returns:
+        The route key, or None if no route matches, and the path parameters
+    """
+    route_key = event.get("routeKey")
+    if route_key in ROUTES:
+        return route_key, event.get("pathParameters") or {}
+
+    http = event.get("requestContext", {}).get("http", {})
+    method = http.get("method", "")
+    path = event.get("rawPath") or http.get("path", "")
+    for route_method, pattern, candidate in _ROUTE_PATTERNS:
+        if route_method != method:
+            continue
+        match = pattern.match(path)
+        if match:
+            return candidate, match.groupdict()
+    return None, {}
+
+
+def router_handler(event: Dict[str, Any], context: LambdaContext) -> Dict[str, Any]:
+    """
+    Single Lambda entry point for every API route
+
+    Dispatches on the event's routeKey to the same handlers the per-route
+    functions use, so all routes share one warm container, one GitLab
+    connection and one template environment. Logging and tracing are done
+    by the handler the request is dispatched to.
+    """
+    route_key, path_parameters = resolve_route(event)
+    if route_key is None:
+        return error_response(404, "Route not found")
+
+    if event.get("routeKey") != route_key:
+        event = {**event, "routeKey": route_key, "pathParameters": path_parameters}
+    return ROUTES[route_key](event, context)
@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import Any, Dict, Optional
 from pydantic import BaseModel, Field
 
 
@@ -17,4 +17,36 @@ class AccountRequest(BaseModel):
 class AccountConfigFile(BaseModel):
     """Model representing an AFT configuration file"""
     file_path: str
-    content: str 
\ No newline at end of file
+    content: str
+
+
+class CommitResult(BaseModel):
+    """Outcome of committing configuration files to GitLab"""
+    commit_sha: Optional[str] = Field(
+        ..., description="Commit carrying the files, or the branch head if nothing changed"
+    )
+    no_change: bool = Field(
+        default=False, description="True when every file already had the requested content"
+    )
+
+
+class DeleteAccountRequest(BaseModel):
+    """Body of an account deletion request"""
+    account_name: str = Field(..., description="Name of the account", min_length=1)
+
+
+class TierChangeRequest(BaseModel):
+    """Body of an account upgrade or downgrade request"""
+    target_tier: str = Field(
+        ..., alias="targetTier", description="Tier to move the account to", min_length=1
+    )
+
+
+class AddOptionRequest(BaseModel):
+    """Body of a request adding an option to an account"""
+    option_name: str = Field(
+        ..., alias="optionName", description="Name of the option", min_length=1
+    )
+    option_config: Dict[str, Any] = Field(
+        default_factory=dict, alias="optionConfig", description="Configuration of the option"
+    )
@@ -0,0 +1,218 @@
+import base64
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.gitlab_client import get_gitlab_client
+from utils.repository_index import ACCOUNT_REQUEST_ROOT, RepositoryTreeIndex, git_blob_sha
+
+logger = logging.getLogger(__name__)
+
+# Largest page returned by AccountCatalog.list
+ACCOUNT_LIST_MAX_LIMIT = 100
+# Changed request.json blobs fetched in parallel during a refresh
+ACCOUNT_CATALOG_FETCH_CONCURRENCY = int(os.environ.get("ACCOUNT_CATALOG_FETCH_CONCURRENCY", "8"))
+# Build the catalog while the container initialises instead of on its first read
+ACCOUNT_CATALOG_WARM = os.environ.get("ACCOUNT_CATALOG_WARM", "false").lower() == "true"
+
+
+class AccountCatalog:
+    """
+    Warm-container catalog of the account requests on the AFT branch.
+
+    Built on top of ``RepositoryTreeIndex``: each refresh brings the tree
+    index up to date (at most one branch lookup per TTL) and then re-reads
+    only the ``request.json`` files whose blob ID changed. Unchanged accounts
+    are served from memory, so reads cost no GitLab calls between changes.
+    Changed blobs are fetched in parallel batches, and each batch is kept as
+    soon as it completes, so a refresh cut short resumes where it stopped.
+    """
+
+    def __init__(
+        self,
+        index: RepositoryTreeIndex,
+        root: str = ACCOUNT_REQUEST_ROOT,
+        fetch_concurrency: int = ACCOUNT_CATALOG_FETCH_CONCURRENCY,
+    ):
+        self.index = index
+        self.root = root
+        self.fetch_concurrency = max(1, fetch_concurrency)
+        self.head_sha: Optional[str] = None
+        # Parsed request.json and its blob ID per account name
+        self._accounts: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Bring the catalog up to date with the branch"""
+        self.index.refresh()
+        with self._lock:
+            head_sha = self.index.head_sha
+            if head_sha is None or head_sha == self.head_sha:
+                return
+
+            paths = {}
+            stale = []
+            suffix = "/request.json"
+            for path in self.index.list_paths(f"{self.root}/"):
+                if not path.endswith(suffix):
+                    continue
+                name = path[len(self.root) + 1:-len(suffix)]
+                if "/" in name:
+                    continue
+                paths[name] = path
+                blob_id = self.index.blob_id(path)
+                cached = self._accounts.get(name)
+                if blob_id is None or cached is None or cached[0] != blob_id:
+                    stale.append((name, blob_id))
+
+            if stale:
+                self._fetch(stale, paths, head_sha)
+            self._accounts = {name: self._accounts[name] for name in paths}
+            self.head_sha = head_sha
+
+    def _fetch(
+        self, stale: List[Tuple[str, Optional[str]]], paths: Dict[str, str], head_sha: str
+    ) -> None:
+        """Read changed requests in batches, publishing each batch as it completes"""
+        def read(item: Tuple[str, Optional[str]]) -> Tuple[str, Dict[str, Any]]:
+            return self._read(paths[item[0]], item[1], head_sha)
+
+        with ThreadPoolExecutor(max_workers=self.fetch_concurrency) as executor:
+            for start in range(0, len(stale), self.fetch_concurrency):
+                batch = stale[start:start + self.fetch_concurrency]
+                entries = dict(zip((name for name, _ in batch), executor.map(read, batch)))
+                # Replace the mapping rather than mutate it: readers iterate it unlocked
+                self._accounts = {**self._accounts, **entries}
+
+    def get(self, account_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get one account request
+
+        Args:
+            account_name: Name of the account
+
+        Returns:
+            The account request, or None if the account does not exist
+        """
+        self.refresh()
+        entry = self._accounts.get(account_name)
+        return _summary(account_name, entry[1]) if entry else None
+
+    def list(
+        self,
+        organizational_unit: Optional[str] = None,
+        tag: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        List account requests in name order
+
+        Args:
+            organizational_unit: Only accounts in this OU
+            tag: Only accounts with this tag key, or ``key=value`` for a tag value
+            cursor: Cursor returned with the previous page
+            limit: Page size, capped at ACCOUNT_LIST_MAX_LIMIT
+
+        Returns:
+            The page of accounts, and the cursor of the next page or None
+        """
+        self.refresh()
+        limit = max(1, min(limit, ACCOUNT_LIST_MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else ""
+
+        tag_key, _, tag_value = (tag or "").partition("=")
+        page: List[Dict[str, Any]] = []
+        for name in sorted(self._accounts):
+            if name <= after:
+                continue
+            content = self._accounts[name][1]
+            if organizational_unit and content.get("organizational_unit") != organizational_unit:
+                continue
+            if tag_key:
+                tags = content.get("account_tags") or {}
+                if tag_key not in tags or (tag_value and tags[tag_key] != tag_value):
+                    continue
+            if len(page) == limit:
+                return page, encode_cursor(page[-1]["account_name"])
+            page.append(_summary(name, content))
+        return page, None
+
+    def _read(self, path: str, blob_id: Optional[str], head_sha: str) -> Tuple[str, Dict[str, Any]]:
+        """Fetch and parse a request.json, by blob when its ID is known"""
+        # The index holds the project, which is replaced when the client reconnects
+        project = self.index.project
+        if blob_id is not None:
+            return blob_id, json.loads(project.repository_raw_blob(blob_id).decode("utf-8"))
+
+        content = project.files.raw(file_path=path, ref=head_sha).decode("utf-8")
+        blob_id = git_blob_sha(content)
+        # Compare diffs carry no blob IDs: without this, a file changed by
+        # someone else would be read again on every later head change
+        self.index.remember_blob(path, blob_id, head_sha)
+        return blob_id, json.loads(content)
+
+
+def _summary(account_name: str, content: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "account_name": account_name,
+        "email": content.get("email"),
+        "organizational_unit": content.get("organizational_unit"),
+        "account_tags": content.get("account_tags") or {},
+        "custom_fields": content.get("custom_fields") or {},
+    }
+
+
+def encode_cursor(account_name: str) -> str:
+    """Opaque cursor pointing after an account"""
+    return base64.urlsafe_b64encode(account_name.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """
+    Decode a cursor from encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+_catalog: Optional[AccountCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_account_catalog() -> AccountCatalog:
+    """Get the account catalog shared in this container"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = AccountCatalog(get_gitlab_client().tree_index)
+        return _catalog
+
+
+def warm_account_catalog() -> None:
+    """
+    Build the shared catalog ahead of the first read
+
+    Meant for container initialisation. Failures are only logged: the first
+    read then finishes the refresh from wherever the warm-up stopped.
+    """
+    try:
+        get_account_catalog().refresh()
+    except Exception:
+        logger.exception("Failed to warm the account catalog")
+
+
+def reset_account_catalog() -> None:
+    """Drop the shared catalog, mainly for tests"""
+    global _catalog
+    with _catalog_lock:
+        _catalog = None
@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import closing, contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.store_registry import StoreRegistry
+
+# Backend for account leases: "dynamodb", "sqlite", "memory" or "none"
+ACCOUNT_LOCK_BACKEND = os.environ.get("ACCOUNT_LOCK_BACKEND", "memory")
+ACCOUNT_LOCK_TABLE = os.environ.get("ACCOUNT_LOCK_TABLE", "")
+ACCOUNT_LOCK_PATH = os.environ.get("ACCOUNT_LOCK_PATH", "/tmp/aft-account-locks.sqlite3")
+# Lease duration; a holder that dies leaves the account free after this long.
+# Keep it above the Lambda timeout so a live holder never loses its lease.
+ACCOUNT_LOCK_TTL = int(os.environ.get("ACCOUNT_LOCK_TTL", "60"))
+# How long a request queues for a held account before it is rejected
+ACCOUNT_LOCK_WAIT = float(os.environ.get("ACCOUNT_LOCK_WAIT", "2"))
+
+
+class AccountLockedError(Exception):
+    """Another operation holds the account; reported as 409 Conflict"""
+
+    def __init__(self, account_name: str, retry_after: int = 1):
+        super().__init__(f"Another operation on account {account_name} is in progress")
+        self.account_name = account_name
+        self.retry_after = retry_after
+
+
+class AccountLockStore(ABC):
+    """
+    Storage for account leases.
+
+    A lease is taken atomically and only when the account is free or its
+    previous lease expired, and is released only by the owner that took it.
+    """
+
+    @abstractmethod
+    def acquire(self, account_name: str, owner: str, ttl: int) -> bool:
+        """
+        Take the lease of an account
+
+        Args:
+            account_name: Name of the account
+            owner: Unique ID of the caller
+            ttl: Lease duration in seconds
+
+        Returns:
+            True if the lease was taken
+        """
+
+    @abstractmethod
+    def release(self, account_name: str, owner: str) -> None:
+        """Release a lease held by owner"""
+
+
+class InMemoryAccountLockStore(AccountLockStore):
+    """Process-local leases for tests and local runs"""
+
+    def __init__(self):
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, account_name: str, owner: str, ttl: int) -> bool:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get(account_name)
+            if lease and lease[1] > now:
+                return False
+            self._leases[account_name] = (owner, now + ttl)
+            return True
+
+    def release(self, account_name: str, owner: str) -> None:
+        with self._lock:
+            lease = self._leases.get(account_name)
+            if lease and lease[0] == owner:
+                del self._leases[account_name]
+
+
+class SQLiteAccountLockStore(AccountLockStore):
+    """Leases in a SQLite file, shared by local processes (stand-in for DynamoDB)"""
+
+    def __init__(self, path: str = ACCOUNT_LOCK_PATH):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS account_locks (
+                    account_name TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def acquire(self, account_name: str, owner: str, ttl: int) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "INSERT INTO account_locks (account_name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (account_name) DO UPDATE SET owner = excluded.owner, "
+                "expires_at = excluded.expires_at WHERE account_locks.expires_at <= ?",
+                (account_name, owner, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, account_name: str, owner: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "DELETE FROM account_locks WHERE account_name = ? AND owner = ?",
+                (account_name, owner),
+            )
+
+
+class DynamoDBAccountLockStore(AccountLockStore):
+    """
+    Leases shared by every Lambda container, backed by a DynamoDB table.
+
+    The table has a string partition key ``account_name`` and TTL on
+    ``expires_at``. Leases are taken with a conditional put, so two
+    containers can never hold the same account.
+    """
+
+    def __init__(self, table_name: str = ACCOUNT_LOCK_TABLE):
+        import boto3
+
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def acquire(self, account_name: str, owner: str, ttl: int) -> bool:
+        from botocore.exceptions import ClientError
+
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={"account_name": account_name, "owner": owner, "expires_at": now + ttl},
+                # DynamoDB deletes expired items lazily, so check the expiry ourselves
+                ConditionExpression="attribute_not_exists(account_name) OR expires_at <= :now",
+                ExpressionAttributeValues={":now": now},
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+
+    def release(self, account_name: str, owner: str) -> None:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.table.delete_item(
+                Key={"account_name": account_name},
+                ConditionExpression="#owner = :owner",
+                ExpressionAttributeNames={"#owner": "owner"},
+                ExpressionAttributeValues={":owner": owner},
+            )
+        except ClientError as e:
+            # The lease expired and was taken over; nothing left to release
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+
+_stores: StoreRegistry[AccountLockStore] = StoreRegistry(ACCOUNT_LOCK_BACKEND, {
+    "dynamodb": DynamoDBAccountLockStore,
+    "sqlite": SQLiteAccountLockStore,
+    "memory": InMemoryAccountLockStore,
+})
+
+
+def get_account_lock_store() -> Optional[AccountLockStore]:
+    """
+    Get the account lock store configured for this container
+
+    Returns:
+        The shared store, or None when account locking is disabled
+    """
+    return _stores.get()
+
+
+def set_account_lock_store(store: Optional[AccountLockStore]) -> None:
+    """Replace the store, mainly for tests"""
+    _stores.set(store)
+
+
+@contextmanager
+def account_locks(account_names: Iterable[str], wait: Optional[float] = None) -> Iterator[None]:
+    """
+    Hold the leases of accounts for the duration of a block
+
+    Operations on the same account run one at a time; operations on other
+    accounts are not affected. Leases are taken in name order, so requests
+    locking several accounts cannot deadlock each other. A held account is
+    polled until ``wait`` runs out.
+
+    Args:
+        account_names: Accounts the block writes to
+        wait: Seconds to queue for held accounts, ACCOUNT_LOCK_WAIT by default
+
+    Raises:
+        AccountLockedError: If an account stayed held for the whole wait
+    """
+    store = get_account_lock_store()
+    if store is None:
+        yield
+        return
+
+    owner = uuid.uuid4().hex
+    deadline = time.monotonic() + (ACCOUNT_LOCK_WAIT if wait is None else wait)
+    held: List[str] = []
+    try:
+        for account_name in sorted(set(account_names)):
+            delay = 0.05
+            while not store.acquire(account_name, owner, ACCOUNT_LOCK_TTL):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AccountLockedError(account_name)
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.5)
+            held.append(account_name)
+        yield
+    finally:
+        for account_name in held:
+            try:
+                store.release(account_name, owner)
+            except Exception:
+                # The lease expires on its own
+                pass
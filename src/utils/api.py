@@ -0,0 +1,137 @@
+import base64
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, TypeVar, cast
+
+from utils.json_serializer import dumps_compact
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter, ValidationError
+
+T = TypeVar("T")
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class BadRequestError(Exception):
+    """The request is malformed; reported as 400 Bad Request"""
+
+    def __init__(self, message: str, details: Optional[List[Dict[str, Any]]] = None):
+        super().__init__(message)
+        self.details = details
+
+
+def read_body(event: Dict[str, Any]) -> bytes:
+    """
+    Get the raw request body, decoding base64 bodies from API Gateway
+
+    Args:
+        event: API Gateway event
+
+    Returns:
+        Body bytes, ``{}`` when the request has no body
+
+    Raises:
+        BadRequestError: If a base64 body cannot be decoded
+    """
+    body = event.get("body")
+    if not body:
+        return b"{}"
+    if event.get("isBase64Encoded"):
+        try:
+            return base64.b64decode(body, validate=True)
+        except ValueError as e:
+            raise BadRequestError(f"Invalid base64 body: {str(e)}") from e
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+_type_adapters: Dict[Any, "TypeAdapter"] = {}
+
+
+def get_type_adapter(type_: Any) -> "TypeAdapter":
+    """Get the validator of a type, built once per container"""
+    adapter = _type_adapters.get(type_)
+    if adapter is None:
+        from pydantic import TypeAdapter
+
+        adapter = _type_adapters[type_] = TypeAdapter(type_)
+    return adapter
+
+
+def parse_body(event: Dict[str, Any], type_: Type[T]) -> T:
+    """
+    Validate the request body straight from JSON into a model or type
+
+    Args:
+        event: API Gateway event
+        type_: Pydantic model, or any type pydantic can validate
+
+    Returns:
+        The validated body
+
+    Raises:
+        BadRequestError: If the body is not valid JSON or does not match the type
+    """
+    # pydantic is imported by the handlers that parse bodies, not by every user of this module
+    from pydantic import BaseModel, ValidationError
+
+    raw = read_body(event)
+    try:
+        if isinstance(type_, type) and issubclass(type_, BaseModel):
+            return cast(T, type_.model_validate_json(raw))
+        return cast(T, get_type_adapter(type_).validate_json(raw))
+    except ValidationError as e:
+        raise validation_error(e) from e
+
+
+def validation_error(error: "ValidationError") -> BadRequestError:
+    """Turn a pydantic validation error into a 400 with one entry per invalid field"""
+    details = [
+        {"field": ".".join(str(part) for part in item["loc"]) or "body", "message": item["msg"]}
+        for item in error.errors(include_url=False)
+    ]
+    message = "; ".join(f"{item['field']}: {item['message']}" for item in details)
+    return BadRequestError(f"Invalid request body: {message}", details)
+
+
+def path_parameter(event: Dict[str, Any], name: str) -> str:
+    """
+    Get a required path parameter
+
+    Raises:
+        BadRequestError: If the parameter is missing or empty
+    """
+    value = (event.get("pathParameters") or {}).get(name)
+    if not value:
+        raise BadRequestError(f"{name} is required")
+    return value
+
+
+def response(
+    status_code: int, body: Any, headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Format an API Gateway proxy response with a JSON body
+
+    Args:
+        status_code: HTTP status code
+        body: JSON-compatible response body
+        headers: Headers added to Content-Type
+
+    Returns:
+        Lambda proxy response
+    """
+    return {
+        "statusCode": status_code,
+        "headers": {**JSON_HEADERS, **headers} if headers else dict(JSON_HEADERS),
+        "body": dumps_compact(body)
+    }
+
+
+def error_response(
+    status_code: int, message: str, details: Optional[List[Dict[str, Any]]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Format an error response in the envelope shared by every handler"""
+    body: Dict[str, Any] = {"error": message}
+    if details:
+        body["details"] = details
+    return response(status_code, body, headers)
@@ -0,0 +1,481 @@
+import asyncio
+import math
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union, cast
+from urllib.parse import quote
+
+import httpx
+
+from models.account import AccountConfigFile, CommitResult
+from utils.circuit_breaker import get_circuit_breaker
+from utils.gitlab_client import (
+    FILE_CHANGED_MARKER,
+    PASSTHROUGH_ERRORS,
+    PINNED_ACTIONS,
+    STALE_TREE_MARKERS,
+    AccountNotFoundError,
+    CommitStats,
+    GitLabClientError,
+    GitLabConflictError,
+    is_conflict_response,
+    needs_pin,
+    pin_actions,
+    pinned_path,
+)
+from utils.gitlab_transport import is_gitlab_failure
+from utils.rate_limiter import (
+    GITLAB_RATE_LIMIT_WAIT,
+    RateLimitedError,
+    TokenBucket,
+    get_token_bucket,
+)
+from utils.repository_index import ACCOUNT_REQUEST_ROOT, RepositoryTreeIndex, git_blob_sha
+
+# Default number of GitLab requests in flight per client
+GITLAB_MAX_CONCURRENCY = int(os.environ.get("GITLAB_MAX_CONCURRENCY", "8"))
+
+# Pause before the quota is fully spent, when RateLimit-Remaining drops to this
+RATE_LIMIT_RESERVE = int(os.environ.get("GITLAB_RATE_LIMIT_RESERVE", "5"))
+
+
+class AsyncGitLabClient:
+    """
+    Asyncio client for GitLab with the same surface as GitLabClient.
+
+    Requests go through one pooled ``httpx.AsyncClient`` and at most
+    ``max_concurrency`` of them are in flight at once. The client honours
+    GitLab's rate-limit headers: a 429 waits for ``Retry-After``, and all
+    requests pause until ``RateLimit-Reset`` once ``RateLimit-Remaining``
+    runs low.
+
+    It works anywhere an event loop can run, for example::
+
+        async with AsyncGitLabClient() as client:
+            results = await client.commit_many(operations)
+
+    or ``asyncio.run(...)`` from a Lambda handler or a CLI command. The
+    tree of account files is cached in a ``RepositoryTreeIndex`` and kept
+    current under the same TTL and compare rules as the sync client.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = GITLAB_MAX_CONCURRENCY,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.gitlab_url = os.environ.get("GITLAB_URL")
+        self.gitlab_token = os.environ.get("GITLAB_TOKEN")
+        self.project_id = os.environ.get("GITLAB_PROJECT_ID")
+        self.branch = os.environ.get("GITLAB_BRANCH", "main")
+        self.timeout = float(os.environ.get("GITLAB_TIMEOUT", "10"))
+        self.max_retries = int(os.environ.get("GITLAB_COMMIT_MAX_RETRIES", "4"))
+        self.retry_base_delay = float(os.environ.get("GITLAB_COMMIT_RETRY_DELAY", "0.2"))
+        self.retry_max_delay = float(os.environ.get("GITLAB_COMMIT_RETRY_MAX_DELAY", "5"))
+
+        if not self.gitlab_url or not self.gitlab_token or not self.project_id:
+            raise ValueError("GitLab configuration missing from environment")
+
+        project = quote(self.project_id, safe="")
+        self._http = httpx.AsyncClient(
+            base_url=f"{self.gitlab_url.rstrip('/')}/api/v4/projects/{project}",
+            headers={"PRIVATE-TOKEN": self.gitlab_token},
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=max_concurrency, max_keepalive_connections=max_concurrency
+            ),
+            transport=transport,
+        )
+        self.max_concurrency = max_concurrency
+        # asyncio primitives belong to the loop they are created in, which
+        # on Python 3.9 is the loop current at creation: make them per loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tree_lock: Optional[asyncio.Lock] = None
+        self._paused_until = 0.0
+        self.tree_index = RepositoryTreeIndex(None, self.branch)
+        self.stats = CommitStats()
+        # The same bucket and breaker as the sync client: both count against one GitLab
+        self.bucket = get_token_bucket()
+        self.breaker = get_circuit_breaker()
+
+    async def __aenter__(self) -> "AsyncGitLabClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections"""
+        await self._http.aclose()
+
+    async def commit_config_files(
+        self, config_files: List[AccountConfigFile], commit_message: str
+    ) -> CommitResult:
+        """
+        Commit configuration files to GitLab
+
+        Args:
+            config_files: List of configuration files to commit
+            commit_message: Commit message
+
+        Returns:
+            Commit result
+        """
+        try:
+            try:
+                return await self._commit_changed_files(config_files, commit_message)
+            except GitLabClientError as e:
+                if not any(marker in str(e).lower() for marker in STALE_TREE_MARKERS):
+                    raise
+                # Someone else created or removed one of the files: re-read the tree once
+                await self._refresh_index(force=True)
+                return await self._commit_changed_files(config_files, commit_message)
+        except (GitLabConflictError, *PASSTHROUGH_ERRORS):
+            raise
+        except Exception as e:
+            raise GitLabClientError(f"Failed to commit files to GitLab: {str(e)}") from e
+
+    async def delete_account_config(self, account_name: str, commit_message: str) -> str:
+        """
+        Delete every file of an account in a single commit
+
+        Args:
+            account_name: Name of the account to delete
+            commit_message: Commit message
+
+        Returns:
+            Commit SHA
+
+        Raises:
+            AccountNotFoundError: If the account has no files on the branch
+        """
+        try:
+            tree = await self._list_tree(f"{ACCOUNT_REQUEST_ROOT}/{account_name}", self.branch)
+            actions = [
+                {"action": "delete", "file_path": item["path"]}
+                for item in tree
+                if item["type"] == "blob"
+            ]
+            if not actions:
+                raise AccountNotFoundError(f"Account {account_name} not found")
+            return await self.commit_actions(actions, commit_message)
+        except (GitLabConflictError, AccountNotFoundError, *PASSTHROUGH_ERRORS):
+            raise
+        except Exception as e:
+            raise GitLabClientError(f"Failed to delete account configuration: {str(e)}") from e
+
+    async def commit_many(
+        self, operations: Iterable[Tuple[List[AccountConfigFile], str]]
+    ) -> List[Union[CommitResult, Exception]]:
+        """
+        Commit several independent operations concurrently
+
+        Args:
+            operations: Pairs of configuration files and commit message
+
+        Returns:
+            One commit result, or the exception it failed with, per operation
+        """
+        results = await asyncio.gather(
+            *(self.commit_config_files(files, message) for files, message in operations),
+            return_exceptions=True,
+        )
+        # Cancellation and other BaseExceptions are not failures of one operation
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return cast(List[Union[CommitResult, Exception]], results)
+
+    async def commit_actions(self, actions: List[Dict[str, str]], commit_message: str) -> str:
+        """
+        Create a single commit, retrying branch-moved conflicts with jittered backoff
+
+        Args:
+            actions: GitLab commit actions
+            commit_message: Commit message
+
+        Returns:
+            Commit SHA
+
+        Raises:
+            GitLabConflictError: If the branch was still moving after all retries
+        """
+        attempt = 0
+        while True:
+            last_commits = await self._last_commits(actions) if needs_pin(actions) else {}
+            payload = {
+                "branch": self.branch,
+                "commit_message": commit_message,
+                "actions": pin_actions(actions, last_commits),
+            }
+
+            self.stats.attempts += 1
+            response = await self._request("POST", "/repository/commits", json=payload, check=False)
+            if response.is_success:
+                commit = response.json()
+                self.stats.commits += 1
+                self._record_commit(commit, actions)
+                return commit["id"]
+
+            message = _error_message(response)
+            if not is_conflict_response(response.status_code, message):
+                raise GitLabClientError(f"{response.status_code}: {message}")
+
+            self.stats.conflicts += 1
+            if attempt >= self.max_retries:
+                self.stats.exhausted += 1
+                raise GitLabConflictError(
+                    f"Branch {self.branch} kept moving after {attempt + 1} attempts: {message}"
+                )
+            if FILE_CHANGED_MARKER in message.lower():
+                # Someone else changed one of the files: look the pins up again at the new head
+                self.tree_index.forget_last_commits(list(last_commits))
+                await self._refresh_index(force=True)
+            self.stats.retries += 1
+            await asyncio.sleep(
+                random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+            )
+            attempt += 1
+
+    async def _last_commits(self, actions: List[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Get the last commit that touched each file of the pinned actions
+
+        Commits known to the tree index are used as they are; the others are
+        read from the file's headers at the indexed head, concurrently, and
+        remembered.
+        """
+        index = self.tree_index
+        ref = index.head_sha or self.branch
+        paths = sorted({
+            pinned_path(action) for action in actions if action["action"] in PINNED_ACTIONS
+        })
+        last_commits = {}
+        unknown = []
+        for path in paths:
+            commit_id = index.last_commit_id(path)
+            if commit_id is None:
+                unknown.append(path)
+            else:
+                last_commits[path] = commit_id
+
+        responses = await asyncio.gather(*(
+            self._request(
+                "HEAD", f"/repository/files/{quote(path, safe='')}",
+                params={"ref": ref}, check=False
+            )
+            for path in unknown
+        ))
+        for path, response in zip(unknown, responses):
+            # Files missing at the ref are left unpinned and GitLab reports them itself
+            if response.status_code == 404:
+                continue
+            _raise_for_status(response)
+            last_commits[path] = response.headers["X-Gitlab-Last-Commit-Id"]
+            index.remember_last_commit(path, last_commits[path])
+        return last_commits
+
+    async def _commit_changed_files(
+        self, config_files: List[AccountConfigFile], commit_message: str
+    ) -> CommitResult:
+        await self._refresh_index()
+        actions = self._write_actions(config_files)
+        if len(actions) < len(config_files):
+            # The index may be up to its TTL behind: only leave a file out if it
+            # still matches at the current head
+            await self._refresh_index(force=True)
+            actions = self._write_actions(config_files)
+        if not actions:
+            return CommitResult(commit_sha=self.tree_index.head_sha, no_change=True)
+        return CommitResult(commit_sha=await self.commit_actions(actions, commit_message))
+
+    def _write_actions(self, config_files: List[AccountConfigFile]) -> List[Dict[str, str]]:
+        """Build the actions writing the files whose blob differs from the tree index"""
+        index = self.tree_index
+        return [
+            {
+                "action": index.action_for(file.file_path),
+                "file_path": file.file_path,
+                "content": file.content,
+            }
+            for file in config_files
+            if index.blob_id(file.file_path) != git_blob_sha(file.content)
+        ]
+
+    async def _refresh_index(self, force: bool = False) -> None:
+        """
+        Bring the tree index up to date with the branch head
+
+        Same rules as ``RepositoryTreeIndex.refresh``: the head is checked
+        once the TTL has elapsed, the index follows the compare diff from
+        the indexed head, and it is rebuilt from a full listing when the
+        diff is unavailable.
+
+        Args:
+            force: Check the branch head even if the TTL has not elapsed
+        """
+        index = self.tree_index
+        async with self._loop_primitives()[1]:
+            if not force and index.is_fresh():
+                return
+
+            response = await self._request(
+                "GET", f"/repository/branches/{quote(self.branch, safe='')}"
+            )
+            head_sha = response.json()["commit"]["id"]
+            if head_sha != index.head_sha:
+                compare = await self._compare(index.head_sha, head_sha)
+                if not index.apply_compare(head_sha, compare):
+                    index.load_tree(head_sha, await self._list_tree(ACCOUNT_REQUEST_ROOT, head_sha))
+            index.mark_checked()
+
+    async def _compare(self, from_sha: Optional[str], to_sha: str) -> Optional[Dict[str, Any]]:
+        """Compare two commits, or None if the old head is unknown or gone"""
+        if from_sha is None:
+            return None
+        response = await self._request(
+            "GET", "/repository/compare",
+            params={"from": from_sha, "to": to_sha, "straight": "true"}, check=False
+        )
+        return response.json() if response.is_success else None
+
+    async def _list_tree(self, path: str, ref: str) -> List[Dict[str, Any]]:
+        """List the entries under a path, following GitLab's pagination"""
+        items: List[Dict[str, Any]] = []
+        url: Optional[str] = "/repository/tree"
+        params: Optional[Dict[str, Any]] = {
+            "path": path, "ref": ref, "recursive": "true", "per_page": 100
+        }
+        while url:
+            response = await self._request("GET", url, params=params, check=False)
+            if response.status_code == 404:
+                break
+            _raise_for_status(response)
+            items.extend(response.json())
+            # The next link already carries the query string
+            url = response.links.get("next", {}).get("url")
+            params = None
+        return items
+
+    def _record_commit(self, commit: Dict[str, Any], actions: List[Dict[str, str]]) -> None:
+        """Apply our own commit to the tree index"""
+        self.tree_index.record_commit(
+            SimpleNamespace(id=commit["id"], parent_ids=commit.get("parent_ids")), actions
+        )
+
+    def _loop_primitives(self) -> Tuple[asyncio.Semaphore, asyncio.Lock]:
+        """Concurrency bound and tree lock, created in the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._semaphore is None or self._tree_lock is None:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._tree_lock = asyncio.Lock()
+        return self._semaphore, self._tree_lock
+
+    async def _request(
+        self, method: str, url: str, check: bool = True, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Send a request within the concurrency bound, honouring GitLab rate limits
+
+        Like the sync client's transport, every attempt fails fast while the
+        shared circuit breaker is open, takes a token from the shared bucket
+        and reports its outcome and latency to the breaker.
+
+        Args:
+            method: HTTP method
+            url: Path relative to the project, or an absolute URL
+            check: Raise GitLabClientError on error statuses
+            kwargs: Extra arguments for httpx
+
+        Returns:
+            HTTP response
+
+        Raises:
+            CircuitOpenError: If the breaker is open
+            RateLimitedError: If no token was available in time, or GitLab
+                still answered 429 after all retries
+        """
+        for _ in range(self.max_retries + 1):
+            async with self._loop_primitives()[0]:
+                await self._wait_for_quota()
+                response = await self._send(method, url, **kwargs)
+                self._observe_rate_limit(response)
+
+            if response.status_code != 429:
+                break
+        else:
+            raise RateLimitedError(retry_after=max(1, math.ceil(self._paused_until - time.time())))
+        if check:
+            _raise_for_status(response)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send one attempt through the shared circuit breaker and token bucket"""
+        # An open breaker fails fast without spending a token
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.bucket is not None:
+            await _acquire(self.bucket)
+        if self.breaker is None:
+            return await self._http.request(method, url, **kwargs)
+
+        start = time.monotonic()
+        try:
+            response = await self._http.request(method, url, **kwargs)
+        except Exception:
+            self.breaker.record(succeeded=False, duration=time.monotonic() - start)
+            raise
+        self.breaker.record(
+            succeeded=not is_gitlab_failure(response.status_code),
+            duration=time.monotonic() - start,
+        )
+        return response
+
+    async def _wait_for_quota(self) -> None:
+        delay = self._paused_until - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _observe_rate_limit(self, response: httpx.Response) -> None:
+        """Pause every request when GitLab says the quota is spent or nearly spent"""
+        headers = response.headers
+        pause_until = 0.0
+        if response.status_code == 429:
+            retry_after = headers.get("Retry-After")
+            pause_until = time.time() + (float(retry_after) if retry_after else 1.0)
+        elif headers.get("RateLimit-Remaining") is not None:
+            if int(headers["RateLimit-Remaining"]) <= RATE_LIMIT_RESERVE:
+                reset = headers.get("RateLimit-Reset")
+                pause_until = float(reset) if reset else time.time() + 1.0
+        self._paused_until = max(self._paused_until, pause_until)
+
+
+async def _acquire(bucket: TokenBucket, wait: float = GITLAB_RATE_LIMIT_WAIT) -> None:
+    """Same as ``rate_limiter.acquire``, but waits without blocking the event loop"""
+    deadline = time.monotonic() + wait
+    while True:
+        delay = bucket.try_acquire()
+        if delay <= 0:
+            return
+        if time.monotonic() + delay > deadline:
+            raise RateLimitedError(retry_after=max(1, math.ceil(delay)))
+        await asyncio.sleep(delay)
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body = response.json()
+    except ValueError:
+        return response.text
+    if isinstance(body, dict):
+        return str(body.get("message") or body.get("error") or response.text)
+    return response.text
+
+
+def _raise_for_status(response: httpx.Response) -> None:
+    if response.is_error:
+        raise GitLabClientError(f"{response.status_code}: {_error_message(response)}")
@@ -1,9 +1,9 @@
 import json
 import os
+import threading
 import time
-from typing import Dict, Any, Tuple, Optional
+from typing import Dict, Any, Optional
 
-import boto3
 import requests
 from jose import jwk, jwt
 from jose.utils import base64url_decode
@@ -13,6 +13,11 @@ USER_POOL_ID = os.environ.get('COGNITO_USER_POOL_ID')
 APP_CLIENT_ID = os.environ.get('COGNITO_APP_CLIENT_ID')
 AWS_REGION = os.environ.get('AWS_REGION', 'eu-west-1')
 
+# How long fetched signing keys are trusted before Cognito is asked again
+JWKS_CACHE_TTL = int(os.environ.get('JWKS_CACHE_TTL', '3600'))
+# Minimum delay between refreshes triggered by an unknown kid
+JWKS_MIN_REFRESH_INTERVAL = int(os.environ.get('JWKS_MIN_REFRESH_INTERVAL', '30'))
+
 # Constants
 KEYS_URL = f'https://cognito-idp.{AWS_REGION}.amazonaws.com/{USER_POOL_ID}/.well-known/jwks.json'
 
@@ -25,6 +30,99 @@ class AuthError(Exception):
         super().__init__(self.error)
 
 
+class JWKSCache:
+    """
+    Process-wide cache of the Cognito signing keys.
+
+    Keys are parsed once into jose key objects and indexed by ``kid`` so that
+    warm invocations verify tokens without any network call. The cache is
+    refreshed when its TTL expires, and once more when a token carries a
+    ``kid`` we have not seen (Cognito key rotation). Concurrent callers share
+    a single in-flight refresh. When a refresh fails, the stale keys are
+    served and Cognito is not asked again for ``min_refresh_interval``.
+    """
+
+    def __init__(
+        self,
+        keys_url: str,
+        ttl: int = JWKS_CACHE_TTL,
+        min_refresh_interval: int = JWKS_MIN_REFRESH_INTERVAL,
+    ):
+        self.keys_url = keys_url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, Any] = {}
+        self._fetched_at = 0.0
+        # Last refresh attempt, successful or not; spaces out retries during an outage
+        self._attempted_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: str) -> Optional[Any]:
+        """
+        Get the signing key for a ``kid``
+
+        Args:
+            kid: Key ID from the JWT header
+
+        Returns:
+            jose key object, or None if Cognito does not know the kid
+        """
+        if self._is_expired():
+            self._refresh(self._attempted_at)
+
+        key = self._keys.get(kid)
+        if key is None and self._may_retry():
+            # Unknown kid: the pool may have rotated its keys, refresh once.
+            # The interval stops forged kids from turning into a fetch per request.
+            self._refresh(self._attempted_at)
+            key = self._keys.get(kid)
+        return key
+
+    def clear(self) -> None:
+        """Drop all cached keys"""
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = 0.0
+            self._attempted_at = 0.0
+
+    def _is_expired(self) -> bool:
+        if not self._keys:
+            return True
+        return time.monotonic() - self._fetched_at > self.ttl and self._may_retry()
+
+    def _may_retry(self) -> bool:
+        return time.monotonic() - self._attempted_at > self.min_refresh_interval
+
+    def _refresh(self, seen_attempted_at: float) -> None:
+        with self._lock:
+            # Another caller tried while we were waiting for the lock
+            if self._attempted_at != seen_attempted_at:
+                return
+
+            try:
+                jwks_response = requests.get(self.keys_url, timeout=5)
+                jwks_response.raise_for_status()
+                jwks = jwks_response.json()['keys']
+            except Exception as e:
+                self._attempted_at = time.monotonic()
+                if self._keys:
+                    # Keep serving the keys we have rather than failing every request
+                    return
+                raise AuthError({"message": f"Failed to fetch JWT keys: {str(e)}"}, 500) from e
+
+            keys = {}
+            for key in jwks:
+                if key.get("kty") != "RSA":
+                    continue
+                keys[key["kid"]] = jwk.construct(key, algorithm="RS256")
+
+            self._keys = keys
+            self._fetched_at = self._attempted_at = time.monotonic()
+
+
+_jwks_cache = JWKSCache(KEYS_URL)
+
+
 def get_token_from_header(event: Dict[str, Any]) -> str:
     """
     Extract JWT token from the Authorization header
@@ -42,7 +140,8 @@ def get_token_from_header(event: Dict[str, Any]) -> str:
     if not headers:
         raise AuthError({"message": "No headers in the request"}, 401)
         
-    auth_header = headers.get('Authorization')
+    # Payload format 2.0 lowercases header names
+    auth_header = headers.get('Authorization') or headers.get('authorization')
     if not auth_header:
         raise AuthError({"message": "Authorization header is missing"}, 401)
     
@@ -66,13 +165,6 @@ def validate_token(token: str) -> Dict[str, Any]:
     Raises:
         AuthError: If the token validation fails
     """
-    # Get the JWKs from Cognito
-    try:
-        jwks_response = requests.get(KEYS_URL)
-        jwks = jwks_response.json()['keys']
-    except Exception as e:
-        raise AuthError({"message": f"Failed to fetch JWT keys: {str(e)}"}, 500) from e
-
     # Get the header of the JWT
     try:
         header = jwt.get_unverified_header(token)
@@ -80,19 +172,8 @@ def validate_token(token: str) -> Dict[str, Any]:
         raise AuthError({"message": f"Invalid JWT token header: {str(e)}"}, 401) from e
 
     # Find the JWK that matches the KID in the JWT header
-    rsa_key = {}
-    for key in jwks:
-        if key["kid"] == header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"]
-            }
-            break
-
-    if not rsa_key:
+    rsa_key = _jwks_cache.get_key(header.get("kid", ""))
+    if rsa_key is None:
         raise AuthError({"message": "Unable to find matching JWT key"}, 401)
 
     try:
@@ -142,4 +223,4 @@ def check_permissions(claims: Dict[str, Any], required_permission: str) -> bool:
         return 'Administrators' in cognito_groups
     
     # In a more complex scenario, we could have finer-grained permissions
-    # mapped to specific operations 
\ No newline at end of file
+    # mapped to specific operations
@@ -0,0 +1,296 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from utils.store_registry import StoreRegistry
+
+# Backend of the shared breaker state: "dynamodb", "memory" or "none"
+GITLAB_BREAKER_BACKEND = os.environ.get("GITLAB_BREAKER_BACKEND", "memory")
+GITLAB_BREAKER_TABLE = os.environ.get("GITLAB_BREAKER_TABLE", "")
+GITLAB_BREAKER_KEY = os.environ.get("GITLAB_BREAKER_KEY", "gitlab")
+# Consecutive failed calls that open the breaker
+GITLAB_BREAKER_FAILURES = int(os.environ.get("GITLAB_BREAKER_FAILURES", "5"))
+# A call slower than this counts as a failure, even if it succeeded
+GITLAB_BREAKER_SLOW_CALL = float(os.environ.get("GITLAB_BREAKER_SLOW_CALL", "5"))
+# How long the breaker stays open before a probe is let through
+GITLAB_BREAKER_OPEN_SECONDS = float(os.environ.get("GITLAB_BREAKER_OPEN_SECONDS", "30"))
+# How long the shared state is trusted before it is read again
+GITLAB_BREAKER_SYNC_INTERVAL = float(os.environ.get("GITLAB_BREAKER_SYNC_INTERVAL", "1"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """GitLab is considered down and the call was not attempted; reported as 503"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("GitLab is unavailable, retry later")
+        self.retry_after = retry_after
+
+
+class BreakerStateStore(ABC):
+    """
+    Storage for the breaker state shared by every container.
+
+    The state is ``{"state", "failures", "opened_at"}``. Transitions are
+    atomic, so a single caller wins the probe of a half-open breaker.
+    """
+
+    @abstractmethod
+    def get(self) -> Dict[str, Any]:
+        """Get the current state"""
+
+    @abstractmethod
+    def record_failure(self, threshold: int, now: float) -> Dict[str, Any]:
+        """
+        Count a failed call, opening the breaker at ``threshold`` consecutive
+        failures or on a failed probe
+
+        Returns:
+            The new state
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Close the breaker and clear the failure count"""
+
+    @abstractmethod
+    def try_probe(self, opened_at: float, now: float) -> bool:
+        """
+        Move an open breaker to half-open
+
+        Args:
+            opened_at: Opening time the caller saw, so only one caller wins
+            now: Current time, recorded as the new opening time of the probe
+
+        Returns:
+            True if the caller may send the probe
+        """
+
+
+def _closed_state() -> Dict[str, Any]:
+    return {"state": CLOSED, "failures": 0, "opened_at": 0.0}
+
+
+class InMemoryBreakerStateStore(BreakerStateStore):
+    """State local to the process, for local runs and tests"""
+
+    def __init__(self):
+        self._state = _closed_state()
+        self._lock = threading.Lock()
+
+    def get(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state)
+
+    def record_failure(self, threshold: int, now: float) -> Dict[str, Any]:
+        with self._lock:
+            self._state["failures"] += 1
+            if self._state["state"] == HALF_OPEN or (
+                self._state["state"] == CLOSED and self._state["failures"] >= threshold
+            ):
+                self._state.update(state=OPEN, opened_at=now)
+            return dict(self._state)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = _closed_state()
+
+    def try_probe(self, opened_at: float, now: float) -> bool:
+        with self._lock:
+            if self._state["state"] == CLOSED or self._state["opened_at"] != opened_at:
+                return False
+            self._state.update(state=HALF_OPEN, opened_at=now)
+            return True
+
+
+class DynamoDBBreakerStateStore(BreakerStateStore):
+    """
+    State shared by every Lambda container, stored in a DynamoDB item.
+
+    The table has a string partition key ``breaker``. Failures are counted
+    with an atomic ADD, and state changes are conditional on the state the
+    caller saw.
+    """
+
+    def __init__(self, key: str = GITLAB_BREAKER_KEY, table_name: str = GITLAB_BREAKER_TABLE):
+        import boto3
+
+        self.key = key
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def get(self) -> Dict[str, Any]:
+        item = self.table.get_item(Key={"breaker": self.key}, ConsistentRead=True).get("Item")
+        return self._to_state(item) if item else _closed_state()
+
+    def record_failure(self, threshold: int, now: float) -> Dict[str, Any]:
+        from botocore.exceptions import ClientError
+
+        item = self.table.update_item(
+            Key={"breaker": self.key},
+            UpdateExpression="ADD failures :one",
+            ExpressionAttributeValues={":one": 1},
+            ReturnValues="ALL_NEW",
+        )["Attributes"]
+        state = self._to_state(item)
+        tripped = state["state"] == CLOSED and state["failures"] >= threshold
+        if state["state"] == HALF_OPEN or tripped:
+            try:
+                self.table.update_item(
+                    Key={"breaker": self.key},
+                    UpdateExpression="SET #state = :open, opened_at = :now",
+                    ConditionExpression="attribute_not_exists(#state) OR #state <> :open",
+                    ExpressionAttributeNames={"#state": "state"},
+                    ExpressionAttributeValues={":open": OPEN, ":now": Decimal(str(round(now, 3)))},
+                )
+                state.update(state=OPEN, opened_at=now)
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                # Another container opened it first
+                return self.get()
+        return state
+
+    def reset(self) -> None:
+        self.table.put_item(
+            Item={"breaker": self.key, "state": CLOSED, "failures": 0, "opened_at": 0}
+        )
+
+    def try_probe(self, opened_at: float, now: float) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.table.update_item(
+                Key={"breaker": self.key},
+                UpdateExpression="SET #state = :half_open, opened_at = :now",
+                ConditionExpression="#state <> :closed AND opened_at = :opened_at",
+                ExpressionAttributeNames={"#state": "state"},
+                ExpressionAttributeValues={
+                    ":half_open": HALF_OPEN,
+                    ":closed": CLOSED,
+                    ":now": Decimal(str(round(now, 3))),
+                    ":opened_at": Decimal(str(round(opened_at, 3))),
+                },
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return False
+
+    @staticmethod
+    def _to_state(item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "state": item.get("state", CLOSED),
+            "failures": int(item.get("failures", 0)),
+            "opened_at": float(item.get("opened_at", 0)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker in front of the GitLab API.
+
+    Closed, calls go through and consecutive failures are counted; slow calls
+    count as failures. At ``failure_threshold`` the breaker opens and calls
+    fail fast with CircuitOpenError for ``open_seconds``. Then one caller,
+    in any container, is let through as a probe: its success closes the
+    breaker, its failure opens it again. The state is read from the store at
+    most once per ``sync_interval`` and written only on transitions.
+    """
+
+    def __init__(
+        self,
+        store: BreakerStateStore,
+        failure_threshold: int = GITLAB_BREAKER_FAILURES,
+        slow_call: float = GITLAB_BREAKER_SLOW_CALL,
+        open_seconds: float = GITLAB_BREAKER_OPEN_SECONDS,
+        sync_interval: float = GITLAB_BREAKER_SYNC_INTERVAL,
+    ):
+        self.store = store
+        self.failure_threshold = failure_threshold
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.sync_interval = sync_interval
+        self._state = _closed_state()
+        self._synced_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Last known state"""
+        return self._state["state"]
+
+    def _current(self, now: float) -> Dict[str, Any]:
+        with self._lock:
+            if self._synced_at is None or now - self._synced_at >= self.sync_interval:
+                self._state = self.store.get()
+                self._synced_at = now
+            return dict(self._state)
+
+    def _remember(self, state: Dict[str, Any], now: float) -> None:
+        with self._lock:
+            self._state = state
+            self._synced_at = now
+
+    def before_call(self) -> None:
+        """
+        Let a call through or fail fast
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe in flight
+        """
+        now = time.time()
+        state = self._current(now)
+        if state["state"] == CLOSED:
+            return
+
+        # A half-open probe that never reported back is taken over after the same delay
+        remaining = state["opened_at"] + self.open_seconds - now
+        if remaining <= 0 and self.store.try_probe(state["opened_at"], now):
+            self._remember({**state, "state": HALF_OPEN, "opened_at": now}, now)
+            return
+        raise CircuitOpenError(retry_after=max(1, math.ceil(remaining)))
+
+    def record(self, succeeded: bool, duration: float) -> None:
+        """
+        Report the outcome of a call let through by before_call
+
+        Args:
+            succeeded: Whether GitLab answered without a server or connection error
+            duration: Seconds the call took
+        """
+        now = time.time()
+        if succeeded and duration <= self.slow_call:
+            if self._state["state"] != CLOSED or self._state["failures"]:
+                self.store.reset()
+                self._remember(_closed_state(), now)
+            return
+        self._remember(self.store.record_failure(self.failure_threshold, now), now)
+
+
+_breakers: StoreRegistry[CircuitBreaker] = StoreRegistry(GITLAB_BREAKER_BACKEND, {
+    "dynamodb": lambda: CircuitBreaker(DynamoDBBreakerStateStore()),
+    "memory": lambda: CircuitBreaker(InMemoryBreakerStateStore()),
+})
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """
+    Get the GitLab circuit breaker configured for this container
+
+    Returns:
+        The shared breaker, or None when it is disabled
+    """
+    return _breakers.get()
+
+
+def set_circuit_breaker(breaker: Optional[CircuitBreaker]) -> None:
+    """Replace the breaker, mainly for tests"""
+    _breakers.set(breaker)
@@ -0,0 +1,335 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from typing import Any, Callable, Dict, List, Optional
+
+# Default location of the local queue database (stand-in for SQS)
+COMMIT_QUEUE_PATH = os.environ.get("COMMIT_QUEUE_PATH", "/tmp/aft-commit-queue.sqlite3")
+
+# Operation states
+PENDING = "pending"
+CLAIMED = "claimed"
+COMMITTED = "committed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class CommitQueueError(Exception):
+    """Custom exception for queued commit operations"""
+    pass
+
+
+class CommitQueue:
+    """
+    Durable queue of pending commit operations backed by SQLite.
+
+    Each operation is a list of GitLab commit actions plus its commit message.
+    Drainers claim batches atomically, so several threads or processes sharing
+    the database file never commit the same operation twice. Claims that are
+    not resolved within ``claim_timeout`` seconds are handed out again.
+    """
+
+    def __init__(self, path: str = COMMIT_QUEUE_PATH, claim_timeout: float = 60.0):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS operations (
+                    id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    status TEXT NOT NULL,
+                    commit_message TEXT NOT NULL,
+                    actions TEXT NOT NULL,
+                    claimed_at REAL,
+                    commit_sha TEXT,
+                    error TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS operations_status ON operations (status, created_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, actions: List[Dict[str, Any]], commit_message: str) -> str:
+        """
+        Add an operation to the queue
+
+        Args:
+            actions: GitLab commit actions of the operation
+            commit_message: Commit message of the operation
+
+        Returns:
+            Operation ID
+        """
+        op_id = str(uuid.uuid4())
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO operations (id, created_at, status, commit_message, actions) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (op_id, time.time(), PENDING, commit_message, json.dumps(actions)),
+            )
+        return op_id
+
+    def claim_batch(self, max_operations: int) -> List[Dict[str, Any]]:
+        """
+        Claim the oldest pending operations for a single commit
+
+        Operations touching a file already claimed, in this batch or by another
+        drainer, are left for a later batch since a commit cannot act twice on
+        the same path.
+
+        Args:
+            max_operations: Maximum number of operations to claim
+
+        Returns:
+            Claimed operations, oldest first
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT * FROM operations WHERE status = ? OR (status = ? AND claimed_at < ?) "
+                "ORDER BY created_at LIMIT ?",
+                (PENDING, CLAIMED, now - self.claim_timeout, max_operations * 4),
+            ).fetchall()
+
+            # Paths still being committed by another drainer stay blocked, so
+            # operations on the same file are applied in the order they arrived
+            in_flight = conn.execute(
+                "SELECT actions FROM operations WHERE status = ? AND claimed_at >= ?",
+                (CLAIMED, now - self.claim_timeout),
+            ).fetchall()
+            paths = {
+                action["file_path"] for row in in_flight for action in json.loads(row["actions"])
+            }
+
+            batch: List[Dict[str, Any]] = []
+            for row in rows:
+                operation = self._to_dict(row)
+                op_paths = {action["file_path"] for action in operation["actions"]}
+                if paths & op_paths:
+                    continue
+                paths |= op_paths
+                batch.append(operation)
+                if len(batch) == max_operations:
+                    break
+
+            conn.executemany(
+                "UPDATE operations SET status = ?, claimed_at = ? WHERE id = ?",
+                [(CLAIMED, now, operation["id"]) for operation in batch],
+            )
+            conn.execute("COMMIT")
+            return batch
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, op_ids: List[str], commit_sha: str) -> None:
+        """Mark operations as committed"""
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "UPDATE operations SET status = ?, commit_sha = ? WHERE id = ?",
+                [(COMMITTED, commit_sha, op_id) for op_id in op_ids],
+            )
+
+    def fail(self, op_id: str, error: str) -> None:
+        """Mark an operation as failed"""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE operations SET status = ?, error = ? WHERE id = ?", (FAILED, error, op_id)
+            )
+
+    def cancel(self, op_id: str) -> bool:
+        """
+        Withdraw an operation nobody is committing
+
+        Returns:
+            True if the operation was pending, or its claim had expired, and
+            will not be committed
+        """
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE operations SET status = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND claimed_at < ?))",
+                (CANCELLED, op_id, PENDING, CLAIMED, time.time() - self.claim_timeout),
+            )
+            return cursor.rowcount == 1
+
+    def get(self, op_id: str) -> Optional[Dict[str, Any]]:
+        """Get an operation by ID"""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM operations WHERE id = ?", (op_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def pending_count(self) -> int:
+        """Count operations waiting to be claimed"""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM operations WHERE status = ?", (PENDING,)
+            ).fetchone()[0]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        operation = dict(row)
+        operation["actions"] = json.loads(operation["actions"])
+        return operation
+
+
+class CommitCoalescer:
+    """
+    Merges queued operations into multi-action commits.
+
+    Callers submit their actions and wait; whichever caller drains first
+    commits up to ``max_batch`` operations, or everything queued within
+    ``window`` seconds, as one commit. Every caller gets the SHA of the commit
+    that carried its operation. If a merged commit fails, its operations are
+    retried one by one so each failure is reported against its own operation.
+    Callers in this process get the original exception, so that rate limits,
+    an open circuit breaker and conflicts keep their meaning; operations
+    failed by another process are reported as CommitQueueError.
+    """
+
+    def __init__(
+        self,
+        commit_actions: Callable[[List[Dict[str, Any]], str], str],
+        queue: Optional[CommitQueue] = None,
+        max_batch: int = 50,
+        window: float = 0.5,
+        poll_interval: float = 0.05,
+    ):
+        self.commit_actions = commit_actions
+        self.queue = queue or CommitQueue()
+        self.max_batch = max_batch
+        self.window = window
+        self.poll_interval = poll_interval
+        # Exceptions of the operations this process failed, by operation ID
+        self._errors: Dict[str, Exception] = {}
+        self._errors_lock = threading.Lock()
+
+    def commit(
+        self, actions: List[Dict[str, Any]], commit_message: str, timeout: float = 25.0
+    ) -> str:
+        """
+        Queue an operation and wait for the commit that includes it
+
+        Args:
+            actions: GitLab commit actions of the operation
+            commit_message: Commit message of the operation
+            timeout: Seconds to wait for the operation to be committed
+
+        Returns:
+            Commit SHA
+
+        Raises:
+            Exception: The error the commit of the operation failed with
+            CommitQueueError: If the operation failed elsewhere or timed out
+        """
+        op_id = self.queue.enqueue(actions, commit_message)
+
+        # Give concurrent callers the window to join, unless the batch is already
+        # full. A caller alone in the queue, as in a Lambda container serving one
+        # request at a time, commits right away.
+        if self.queue.pending_count() > 1:
+            window_end = time.monotonic() + self.window
+            while time.monotonic() < window_end and self.queue.pending_count() < self.max_batch:
+                time.sleep(self.poll_interval)
+
+        return self.wait(op_id, timeout)
+
+    def wait(self, op_id: str, timeout: float) -> str:
+        """
+        Wait for an operation to be resolved, draining the queue meanwhile
+
+        Args:
+            op_id: Operation ID
+            timeout: Seconds to wait
+
+        Returns:
+            Commit SHA
+
+        Raises:
+            Exception: The error the commit of the operation failed with
+            CommitQueueError: If the operation failed elsewhere or timed out
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            operation = self.queue.get(op_id)
+            if operation is None:
+                raise CommitQueueError(f"Unknown operation: {op_id}")
+            if operation["status"] == COMMITTED:
+                return operation["commit_sha"]
+            if operation["status"] == FAILED:
+                with self._errors_lock:
+                    error = self._errors.pop(op_id, None)
+                raise error or CommitQueueError(operation["error"])
+            if time.monotonic() > deadline:
+                # Never commit a pending operation whose caller was told it failed;
+                # one already claimed may still land, like any commit whose response is lost
+                self.queue.cancel(op_id)
+                raise CommitQueueError(f"Timed out waiting for operation {op_id}")
+
+            # Help drain; if someone else holds our operation, wait for them
+            if not self.drain():
+                time.sleep(self.poll_interval)
+
+    def drain(self) -> int:
+        """
+        Commit one batch of queued operations
+
+        Returns:
+            Number of operations processed
+        """
+        batch = self.queue.claim_batch(self.max_batch)
+        if not batch:
+            return 0
+
+        try:
+            commit_sha = self.commit_actions(
+                [action for operation in batch for action in operation["actions"]],
+                _batch_message(batch),
+            )
+            self.queue.complete([operation["id"] for operation in batch], commit_sha)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch[0]["id"], e)
+            else:
+                self._commit_individually(batch)
+
+        return len(batch)
+
+    def _commit_individually(self, batch: List[Dict[str, Any]]) -> None:
+        for operation in batch:
+            try:
+                commit_sha = self.commit_actions(operation["actions"], operation["commit_message"])
+                self.queue.complete([operation["id"]], commit_sha)
+            except Exception as e:
+                self._fail(operation["id"], e)
+
+    def _fail(self, op_id: str, error: Exception) -> None:
+        with self._errors_lock:
+            self._errors[op_id] = error
+        self.queue.fail(op_id, str(error))
+
+
+def _batch_message(batch: List[Dict[str, Any]]) -> str:
+    """Build the commit message for a batch of operations"""
+    if len(batch) == 1:
+        return batch[0]["commit_message"]
+
+    lines = [f"Batch of {len(batch)} account operations", ""]
+    lines.extend(f"- {operation['commit_message']}" for operation in batch)
+    return "\n".join(lines)
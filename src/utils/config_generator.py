@@ -1,18 +1,281 @@
+import hashlib
 import json
+import logging
 import os
-from typing import Dict, List, Any, Optional
-
-import jinja2
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
 from models.account import AccountConfigFile, AccountRequest
+from utils.json_serializer import get_serializer
+from utils.lazy_import import lazy_import
+
+if TYPE_CHECKING:
+    import jinja2
+else:
+    # Jinja loads with the first template environment; read-only and delete paths never render
+    jinja2 = lazy_import("jinja2")
+
+logger = logging.getLogger(__name__)
+
+# Template sources, and the Python modules they are precompiled to at build time
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates"
+)
+COMPILED_TEMPLATES_DIR = os.path.join(TEMPLATES_DIR, "compiled")
+
+# Number of rendered requests kept per container, 0 disables the render cache
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "512"))
+
+# Bytecode cache for templates that were not precompiled (local runs, tests)
+TEMPLATE_CACHE_DIR = os.environ.get(
+    "TEMPLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "aft-jinja-cache")
+)
+
+
+# File path, template name and template context of one file to render
+FileSpec = Tuple[str, str, Dict[str, Any]]
+
+
+class RenderedFile(NamedTuple):
+    """Lightweight configuration file, yielded by bulk generation"""
+
+    file_path: str
+    content: str
+
+
+def create_template_environment(
+    loader: Optional["jinja2.BaseLoader"] = None,
+) -> "jinja2.Environment":
+    """
+    Create a Jinja environment for the configuration templates.
+
+    Templates emit JSON, so autoescaping is off and values go through the
+    ``json`` filter. Nested values are re-indented with ``indent`` so the
+    rendered file is byte-identical to ``json.dumps(..., indent=2)``.
+
+    Args:
+        loader: Template loader, defaults to precompiled modules with a
+            fallback to the template sources
+
+    Returns:
+        Jinja environment
+    """
+    bytecode_cache = None
+    if loader is None:
+        _check_compiled_templates()
+        loader = jinja2.ChoiceLoader([
+            jinja2.ModuleLoader(COMPILED_TEMPLATES_DIR),
+            jinja2.FileSystemLoader(TEMPLATES_DIR),
+        ])
+        try:
+            os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+        except OSError:
+            pass
+
+    environment = jinja2.Environment(
+        loader=loader,
+        bytecode_cache=bytecode_cache,
+        autoescape=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        undefined=jinja2.StrictUndefined,
+        auto_reload=False,
+    )
+    environment.filters["json"] = get_serializer().dumps
+    return environment
+
+
+def _check_compiled_templates() -> None:
+    """Log an error when a Lambda package was built without the precompiled templates"""
+    if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return
+    missing = [
+        name
+        for name in sorted(os.listdir(TEMPLATES_DIR))
+        if name.endswith(".j2")
+        and not os.path.exists(
+            os.path.join(COMPILED_TEMPLATES_DIR, jinja2.ModuleLoader.get_module_filename(name))
+        )
+    ]
+    if missing:
+        logger.error(
+            "Templates were not precompiled at packaging time and will be parsed from source: %s",
+            ", ".join(missing),
+        )
+
+
+def compile_templates(target: str = COMPILED_TEMPLATES_DIR) -> None:
+    """
+    Precompile the template sources to Python modules
+
+    Args:
+        target: Directory to write the compiled modules to
+    """
+    environment = create_template_environment(jinja2.FileSystemLoader(TEMPLATES_DIR))
+    environment.compile_templates(target, zip=None, ignore_errors=False)
+
+
+_template_env: Optional["jinja2.Environment"] = None
+
+
+def get_template_environment() -> "jinja2.Environment":
+    """Get the template environment shared by every generator in this container"""
+    global _template_env
+    if _template_env is None:
+        _template_env = create_template_environment()
+    return _template_env
+
+
+_template_version: Optional[str] = None
+
+
+def get_template_version() -> str:
+    """Hash of the template sources, so a template change invalidates cached renders"""
+    global _template_version
+    if _template_version is None:
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(TEMPLATES_DIR)):
+            if name.endswith(".j2"):
+                digest.update(name.encode("utf-8"))
+                with open(os.path.join(TEMPLATES_DIR, name), "rb") as f:
+                    digest.update(f.read())
+        _template_version = digest.hexdigest()
+    return _template_version
+
+
+class RenderCache:
+    """
+    Bounded LRU cache of rendered configuration files.
+
+    Entries are keyed by a hash of the canonical JSON of everything the
+    templates receive, plus the template version, so a hit returns exactly
+    what a fresh render would.
+    """
+
+    def __init__(self, max_size: int = RENDER_CACHE_SIZE, template_version: Optional[str] = None):
+        self.max_size = max_size
+        self.template_version = template_version or get_template_version()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[RenderedFile, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, files: List[FileSpec]) -> str:
+        """Build the cache key for the files of one generate call"""
+        canonical = json.dumps(files, sort_keys=True, separators=(",", ":"), default=repr)
+        return hashlib.sha256(f"{self.template_version}:{canonical}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[RenderedFile, ...]]:
+        """
+        Get cached files
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            The rendered files, or None if not cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, files: Tuple[RenderedFile, ...]) -> None:
+        """
+        Store rendered files, evicting the least recently used entries
+
+        Args:
+            key: Cache key from make_key
+            files: Rendered files
+        """
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = files
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters, for logging"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
+_render_cache: Optional[RenderCache] = None
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """Get the render cache shared in this container, or None when disabled"""
+    global _render_cache
+    if _render_cache is None and RENDER_CACHE_SIZE > 0:
+        _render_cache = RenderCache()
+    return _render_cache
 
 
 class ConfigGenerator:
     """Factory for generating AFT configuration files"""
 
-    def __init__(self):
-        self.template_loader = jinja2.FileSystemLoader(searchpath="templates")
-        self.template_env = jinja2.Environment(loader=self.template_loader)
+    def __init__(
+        self,
+        template_env: Optional["jinja2.Environment"] = None,
+        render_cache: Optional[RenderCache] = None,
+    ):
+        """
+        Args:
+            template_env: Template environment, defaults to the shared one
+            render_cache: Cache of rendered files; the shared cache is only used
+                with the shared environment
+        """
+        if template_env is None:
+            template_env = get_template_environment()
+            render_cache = render_cache or get_render_cache()
+        self.template_env = template_env
+        self.render_cache = render_cache
+
+    def _generate(self, files: List[FileSpec]) -> List[AccountConfigFile]:
+        """Render files, reusing a cached render of the same input when possible"""
+        cache = self.render_cache
+        key = ""
+        rendered = None
+        if cache is not None:
+            key = cache.make_key(files)
+            rendered = cache.get(key)
+
+        if rendered is None:
+            rendered = tuple(
+                RenderedFile(file_path, self._render(template_name, context))
+                for file_path, template_name, context in files
+            )
+            if cache is not None:
+                cache.put(key, rendered)
+
+        return [AccountConfigFile(file_path=f.file_path, content=f.content) for f in rendered]
+
+    def _render(self, template_name: str, context: Dict[str, Any]) -> str:
+        """Render one template of the environment"""
+        return self.template_env.get_template(template_name).render(context)
 
     def generate_account_config(
         self, account_request: AccountRequest, update: bool = False
@@ -27,50 +290,69 @@ class ConfigGenerator:
         Returns:
             List of configuration files to commit
         """
-        # This is a placeholder for the actual implementation
-        # In a real implementation, this would use templates to generate the configuration files
-        
-        # Example implementation (to be replaced with actual template-based generation)
-        account_name = account_request.account_name
-        base_path = f"aft-account-request/{account_name}"
+        return self._generate(self._account_files(account_request))
+    
+    def generate_many(
+        self, account_requests: Iterable[AccountRequest], update: bool = False
+    ) -> Iterator[RenderedFile]:
+        """
+        Generate configuration files for many accounts, lazily.
         
-        # Account request file
-        account_request_content = {
-            "name": account_request.account_name,
-            "email": account_request.email,
-            "organizational_unit": account_request.organizational_unit,
-            "account_tags": account_request.account_tags or {},
-            "custom_fields": account_request.custom_fields or {},
-        }
+        Templates are looked up once for the whole batch and files are yielded
+        one at a time, so memory stays flat however many accounts are given.
+        The content is identical to what generate_account_config returns.
+        Bulk renders bypass the render cache so they do not evict hot entries.
         
-        # Account customizations file
-        account_customizations_content = {
-            "custom_fields": account_request.custom_fields or {},
-            "sso_user": None,
-        }
+        Args:
+            account_requests: The account requests, consumed lazily
+            update: Whether this is an update operation
+            
+        Yields:
+            Configuration files, in request order
+        """
+        templates: Dict[str, "jinja2.Template"] = {}
+        for account_request in account_requests:
+            for file_path, template_name, context in self._account_files(account_request):
+                template = templates.get(template_name)
+                if template is None:
+                    template = self.template_env.get_template(template_name)
+                    templates[template_name] = template
+                yield RenderedFile(file_path, template.render(context))
+    
+    def _account_files(self, account_request: AccountRequest) -> List[FileSpec]:
+        """File path, template name and template context of each account file"""
+        base_path = f"aft-account-request/{account_request.account_name}"
         
-        # Add SSO user if provided
+        sso_user = None
         if account_request.sso_user_email:
-            account_customizations_content["sso_user"] = {
+            sso_user = {
                 "email": account_request.sso_user_email,
                 "first_name": account_request.sso_user_first_name,
                 "last_name": account_request.sso_user_last_name,
             }
         
-        # Create the configuration files
-        config_files = [
-            AccountConfigFile(
-                file_path=f"{base_path}/request.json",
-                content=json.dumps(account_request_content, indent=2),
+        return [
+            (
+                f"{base_path}/request.json",
+                "account_request.json.j2",
+                {
+                    "account_name": account_request.account_name,
+                    "email": account_request.email,
+                    "organizational_unit": account_request.organizational_unit,
+                    "account_tags": account_request.account_tags or {},
+                    "custom_fields": account_request.custom_fields or {},
+                },
             ),
-            AccountConfigFile(
-                file_path=f"{base_path}/customizations.json",
-                content=json.dumps(account_customizations_content, indent=2),
+            (
+                f"{base_path}/customizations.json",
+                "account_customizations.json.j2",
+                {
+                    "custom_fields": account_request.custom_fields or {},
+                    "sso_user": sso_user,
+                },
             ),
         ]
         
-        return config_files
-        
     def generate_upgrade_config(self, account_name: str, target_tier: str) -> List[AccountConfigFile]:
         """
         Generate configuration files for upgrading an account to a higher tier.
@@ -84,21 +366,13 @@ class ConfigGenerator:
         """
         base_path = f"aft-account-request/{account_name}"
         
-        # Create upgrade configuration
-        upgrade_config = {
-            "operation": "upgrade",
-            "target_tier": target_tier,
-            "timestamp": "",  # Will be filled by GitLab client
-        }
-        
-        config_files = [
-            AccountConfigFile(
-                file_path=f"{base_path}/operations/upgrade.json",
-                content=json.dumps(upgrade_config, indent=2),
+        return self._generate([
+            (
+                f"{base_path}/operations/upgrade.json",
+                "account_operation.json.j2",
+                {"operation": "upgrade", "target_tier": target_tier},
             ),
-        ]
-        
-        return config_files
+        ])
     
     def generate_downgrade_config(self, account_name: str, target_tier: str) -> List[AccountConfigFile]:
         """
@@ -113,21 +387,13 @@ class ConfigGenerator:
         """
         base_path = f"aft-account-request/{account_name}"
         
-        # Create downgrade configuration
-        downgrade_config = {
-            "operation": "downgrade",
-            "target_tier": target_tier,
-            "timestamp": "",  # Will be filled by GitLab client
-        }
-        
-        config_files = [
-            AccountConfigFile(
-                file_path=f"{base_path}/operations/downgrade.json",
-                content=json.dumps(downgrade_config, indent=2),
+        return self._generate([
+            (
+                f"{base_path}/operations/downgrade.json",
+                "account_operation.json.j2",
+                {"operation": "downgrade", "target_tier": target_tier},
             ),
-        ]
-        
-        return config_files
+        ])
     
     def generate_add_option_config(
         self, account_name: str, option_name: str, option_config: Dict[str, Any]
@@ -145,22 +411,13 @@ class ConfigGenerator:
         """
         base_path = f"aft-account-request/{account_name}"
         
-        # Create option configuration
-        option_content = {
-            "name": option_name,
-            "config": option_config,
-            "enabled": True,
-            "timestamp": "",  # Will be filled by GitLab client
-        }
-        
-        config_files = [
-            AccountConfigFile(
-                file_path=f"{base_path}/options/{option_name}.json",
-                content=json.dumps(option_content, indent=2),
+        return self._generate([
+            (
+                f"{base_path}/options/{option_name}.json",
+                "account_option.json.j2",
+                {"option_name": option_name, "option_config": option_config, "enabled": True},
             ),
-        ]
-        
-        return config_files
+        ])
     
     def generate_remove_option_config(self, account_name: str, option_name: str) -> List[AccountConfigFile]:
         """
@@ -176,18 +433,10 @@ class ConfigGenerator:
         """
         base_path = f"aft-account-request/{account_name}"
         
-        # Create option configuration with enabled=False
-        option_content = {
-            "name": option_name,
-            "enabled": False,
-            "timestamp": "",  # Will be filled by GitLab client
-        }
-        
-        config_files = [
-            AccountConfigFile(
-                file_path=f"{base_path}/options/{option_name}.json",
-                content=json.dumps(option_content, indent=2),
+        return self._generate([
+            (
+                f"{base_path}/options/{option_name}.json",
+                "account_option.json.j2",
+                {"option_name": option_name, "option_config": None, "enabled": False},
             ),
-        ]
-        
-        return config_files 
\ No newline at end of file
+        ])
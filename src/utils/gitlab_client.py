@@ -1,9 +1,57 @@
 import os
-from typing import Dict, List
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
 
-import gitlab
+from models.account import AccountConfigFile, CommitResult
+from utils.circuit_breaker import CircuitOpenError, get_circuit_breaker
+from utils.commit_queue import CommitCoalescer, CommitQueue
+from utils.gitlab_transport import gitlab_adapter
+from utils.lazy_import import lazy_import
+from utils.rate_limiter import RateLimitedError, get_token_bucket
+from utils.repository_index import ACCOUNT_REQUEST_ROOT, RepositoryTreeIndex, git_blob_sha
 
-from models.account import AccountConfigFile
+# python-gitlab and requests load when the first client connects, so that
+# handlers importing only the exception types stay light
+gitlab = lazy_import("gitlab")
+requests = lazy_import("requests")
+
+T = TypeVar("T")
+
+
+def reconnect_errors() -> Tuple[Type[Exception], ...]:
+    """Errors after which the HTTP session is rebuilt and the call retried once"""
+    return (
+        gitlab.exceptions.GitlabAuthenticationError,
+        requests.exceptions.ConnectionError,
+    )
+
+
+# Fragments of GitLab commit errors caused by the branch moving under us
+CONFLICT_MARKERS = (
+    "could not update refs",
+    "has changed since",
+    "please refresh and try again",
+    "reference update",
+    "failed to update ref",
+)
+
+# Fragments of GitLab commit errors meaning our view of the tree was stale
+STALE_TREE_MARKERS = (
+    "a file with this name already exists",
+    "a file with this name doesn't exist",
+)
+
+# Errors raised before a call reaches GitLab, which the handlers report
+# with a Retry-After instead of as client failures
+PASSTHROUGH_ERRORS = (RateLimitedError, CircuitOpenError)
+
+# Actions GitLab checks against last_commit_id
+PINNED_ACTIONS = ("update", "delete", "move")
+
+# Fragment of the GitLab commit error for a file changed since its last_commit_id
+FILE_CHANGED_MARKER = "has changed since"
 
 
 class GitLabClientError(Exception):
@@ -11,92 +59,506 @@ class GitLabClientError(Exception):
     pass
 
 
+class AccountNotFoundError(GitLabClientError):
+    """The account has no configuration on the branch"""
+    pass
+
+
+class GitLabConflictError(GitLabClientError):
+    """The branch kept moving and the commit could not be applied"""
+    pass
+
+
+class CommitStats:
+    """Counters for commit attempts against the branch"""
+    
+    def __init__(self):
+        self.commits = 0
+        self.attempts = 0
+        self.retries = 0
+        self.conflicts = 0
+        self.exhausted = 0
+    
+    def as_dict(self) -> Dict[str, float]:
+        """Get the counters and the share of attempts that hit a conflict"""
+        return {
+            "commits": self.commits,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "conflicts": self.conflicts,
+            "exhausted": self.exhausted,
+            "conflict_rate": self.conflicts / self.attempts if self.attempts else 0.0,
+        }
+
+
+def is_conflict_response(status_code: Optional[int], message: str) -> bool:
+    """
+    Tell a branch-moved conflict apart from other commit errors
+    
+    Args:
+        status_code: HTTP status returned by the commits API
+        message: Error message returned by the commits API
+        
+    Returns:
+        True if re-sending the same actions against the new head may succeed
+    """
+    if status_code == 409:
+        return True
+    message = message.lower()
+    return status_code in (400, 422) and any(marker in message for marker in CONFLICT_MARKERS)
+
+
+def is_conflict_error(error: Exception) -> bool:
+    """Check whether a python-gitlab error is a branch-moved conflict"""
+    if not isinstance(error, gitlab.exceptions.GitlabError):
+        return False
+    return is_conflict_response(error.response_code, str(error.error_message or ""))
+
+
 class GitLabClient:
     """Client for interacting with GitLab repository"""
     
     def __init__(self):
+        self._load_config()
+        self._connect()
+        self._coalescer: Optional[CommitCoalescer] = None
+        self._tree_index: Optional[RepositoryTreeIndex] = None
+        self.stats = CommitStats()
+    
+    def _load_config(self) -> None:
+        """Read the GitLab settings from the environment"""
         # These would come from environment variables or parameter store in real implementation
         self.gitlab_url = os.environ.get("GITLAB_URL")
         self.gitlab_token = os.environ.get("GITLAB_TOKEN")
         self.project_id = os.environ.get("GITLAB_PROJECT_ID")
         self.branch = os.environ.get("GITLAB_BRANCH", "main")
+        self.timeout = float(os.environ.get("GITLAB_TIMEOUT", "10"))
+        self.coalescing = os.environ.get("GITLAB_COMMIT_COALESCING", "false").lower() == "true"
+        self.max_retries = int(os.environ.get("GITLAB_COMMIT_MAX_RETRIES", "4"))
+        self.retry_base_delay = float(os.environ.get("GITLAB_COMMIT_RETRY_DELAY", "0.2"))
+        self.retry_max_delay = float(os.environ.get("GITLAB_COMMIT_RETRY_MAX_DELAY", "5"))
         
         if not self.gitlab_url or not self.gitlab_token or not self.project_id:
             raise ValueError("GitLab configuration missing from environment")
-            
+    
+    def _connect(self) -> None:
+        """Create the GitLab session and a lazy project handle"""
         try:
-            self.gl = gitlab.Gitlab(url=self.gitlab_url, private_token=self.gitlab_token)
-            self.project = self.gl.projects.get(self.project_id)
+            self.gl = gitlab.Gitlab(
+                url=self.gitlab_url, private_token=self.gitlab_token, timeout=self.timeout
+            )
+            # Every API call, from any container, goes through the shared
+            # circuit breaker and takes a token from the shared bucket
+            bucket = get_token_bucket()
+            breaker = get_circuit_breaker()
+            if bucket is not None or breaker is not None:
+                self.gl.session.mount(self.gitlab_url, gitlab_adapter(bucket, breaker))
+            # lazy=True builds the handle locally instead of GETting the project
+            self.project = self.gl.projects.get(self.project_id, lazy=True)
         except Exception as e:
             raise GitLabClientError(f"Failed to initialize GitLab client: {str(e)}") from e
     
+    def reconnect(self) -> None:
+        """Drop the current session and build a new one from the environment"""
+        try:
+            self.gl.session.close()
+        except Exception:
+            pass
+        self._load_config()
+        self._connect()
+        if self._tree_index is not None:
+            self._tree_index.project = self.project
+    
+    @property
+    def tree_index(self) -> RepositoryTreeIndex:
+        """Index of the account request tree, created on first use"""
+        if self._tree_index is None:
+            self._tree_index = RepositoryTreeIndex(self.project, self.branch)
+        return self._tree_index
+    
+    def _call(self, func: Callable[[], T], idempotent: bool = True) -> T:
+        """
+        Run a GitLab API call, rebuilding the session once on auth or connection errors
+        
+        Non-idempotent calls are only sent again after an auth error, which
+        GitLab rejects before acting on the request. A connection error may
+        come after the request was applied, so it is raised, on a fresh
+        session, for the caller to check what happened first.
+        
+        Args:
+            func: Callable performing the API call with the current project handle
+            idempotent: Whether the call can safely be sent twice
+            
+        Returns:
+            Result of the call
+        """
+        try:
+            return func()
+        except reconnect_errors() as e:
+            # Stale pooled connection or rotated token: start over with a fresh session
+            self.reconnect()
+            if not idempotent and not isinstance(e, gitlab.exceptions.GitlabAuthenticationError):
+                raise
+            return func()
+    
     def commit_config_files(
         self, config_files: List[AccountConfigFile], commit_message: str
-    ) -> str:
+    ) -> CommitResult:
         """
         Commit configuration files to GitLab
         
+        Files whose content already matches the branch are left out. If none
+        of the files changed, no commit is made and the current head is
+        returned with ``no_change`` set.
+        
         Args:
             config_files: List of configuration files to commit
             commit_message: Commit message
             
         Returns:
-            Commit SHA
+            Commit result
         """
         try:
-            # Create commit data
-            commit_data = {
-                'branch': self.branch,
-                'commit_message': commit_message,
-                'actions': []
-            }
-            
-            # Add file actions
-            for file in config_files:
-                commit_data['actions'].append({
-                    'action': 'create',
-                    'file_path': file.file_path,
-                    'content': file.content,
-                })
-            
-            # Create the commit
-            commit = self.project.commits.create(commit_data)
-            return commit.id
+            try:
+                return self._commit_changed_files(config_files, commit_message)
+            except Exception as e:
+                if not any(marker in str(e).lower() for marker in STALE_TREE_MARKERS):
+                    raise
+                # Someone else created or removed one of the files: re-read the tree once
+                self._call(lambda: self.tree_index.refresh(force=True))
+                return self._commit_changed_files(config_files, commit_message)
+        except (GitLabConflictError, *PASSTHROUGH_ERRORS):
+            raise
         except Exception as e:
             raise GitLabClientError(f"Failed to commit files to GitLab: {str(e)}") from e
     
+    def _commit_changed_files(
+        self, config_files: List[AccountConfigFile], commit_message: str
+    ) -> CommitResult:
+        actions = self._write_actions(config_files)
+        if len(actions) < len(config_files):
+            # The index may be up to its TTL behind: only leave a file out if it
+            # still matches at the current head
+            actions = self._write_actions(config_files, force=True)
+        if not actions:
+            return CommitResult(commit_sha=self.tree_index.head_sha, no_change=True)
+        return CommitResult(commit_sha=self._submit(actions, commit_message))
+    
+    def _write_actions(
+        self, config_files: List[AccountConfigFile], force: bool = False
+    ) -> List[Dict[str, str]]:
+        """
+        Build the commit actions writing the files, choosing create or update from the tree index
+        
+        Files whose git blob ID matches the one in the tree are dropped.
+        
+        Args:
+            config_files: Configuration files to write
+            force: Check the branch head even if the index TTL has not elapsed
+            
+        Returns:
+            GitLab commit actions
+        """
+        index = self.tree_index
+        self._call(lambda: index.refresh(force=force))
+        
+        return [
+            {
+                'action': index.action_for(file.file_path),
+                'file_path': file.file_path,
+                'content': file.content,
+            }
+            for file in config_files
+            if index.blob_id(file.file_path) != git_blob_sha(file.content)
+        ]
+    
     def delete_account_config(self, account_name: str, commit_message: str) -> str:
         """
         Delete account configuration from GitLab
         
+        Every file under the account directory, including options and
+        operations, is removed in a single commit.
+        
         Args:
             account_name: Name of the account to delete
             commit_message: Commit message
             
         Returns:
             Commit SHA
+            
+        Raises:
+            AccountNotFoundError: If the account has no files on the branch
         """
         try:
-            base_path = f"aft-account-request/{account_name}"
+            base_path = f"{ACCOUNT_REQUEST_ROOT}/{account_name}"
+            
+            # One paginated listing of the whole account subtree
+            try:
+                tree = self._call(lambda: list(self.project.repository_tree(
+                    path=base_path, ref=self.branch, recursive=True, iterator=True, per_page=100
+                )))
+            except gitlab.exceptions.GitlabGetError as e:
+                if e.response_code != 404:
+                    raise
+                tree = []
+            actions = [
+                {
+                    'action': 'delete',
+                    'file_path': item["path"],
+                }
+                for item in tree
+                if item["type"] == "blob"
+            ]
+            if not actions:
+                raise AccountNotFoundError(f"Account {account_name} not found")
+            
+            return self._submit(actions, commit_message)
+        except (GitLabConflictError, AccountNotFoundError, *PASSTHROUGH_ERRORS):
+            raise
+        except Exception as e:
+            raise GitLabClientError(f"Failed to delete account configuration: {str(e)}") from e
+    
+    def commit_actions(self, actions: List[Dict[str, str]], commit_message: str) -> str:
+        """
+        Create a single commit from raw GitLab commit actions
+        
+        Update, delete and move actions are pinned to the last commit that
+        touched their file, as of the indexed branch head, so GitLab rejects
+        them if someone changed the file since. When the branch moved or a
+        file changed, the same actions are re-sent, pinned to the new state,
+        after a jittered exponential backoff. If the connection drops while
+        the commit is sent, the branch is checked for it before re-sending.
+        
+        Args:
+            actions: GitLab commit actions
+            commit_message: Commit message
+            
+        Returns:
+            Commit SHA
             
-            # Create commit data to delete files
+        Raises:
+            GitLabConflictError: If the branch was still moving after all retries
+        """
+        attempt = 0
+        while True:
+            last_commits = self._last_commits(actions) if needs_pin(actions) else {}
             commit_data = {
                 'branch': self.branch,
                 'commit_message': commit_message,
-                'actions': [
-                    {
-                        'action': 'delete',
-                        'file_path': f"{base_path}/request.json",
-                    },
-                    {
-                        'action': 'delete',
-                        'file_path': f"{base_path}/customizations.json",
-                    }
-                ]
+                'actions': pin_actions(actions, last_commits)
             }
             
-            # Create the commit
-            commit = self.project.commits.create(commit_data)
+            base_sha = self._known_head()
+            self.stats.attempts += 1
+            try:
+                commit = self._call(
+                    lambda: self.project.commits.create(commit_data), idempotent=False
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout):
+                # The response was lost, not necessarily the commit
+                commit = self._landed_commit(base_sha, commit_message, actions)
+                if commit is None:
+                    if attempt >= self.max_retries:
+                        raise
+                    self.stats.retries += 1
+                    attempt += 1
+                    continue
+            except gitlab.exceptions.GitlabError as e:
+                if not is_conflict_error(e):
+                    raise
+                self.stats.conflicts += 1
+                if attempt >= self.max_retries:
+                    self.stats.exhausted += 1
+                    raise GitLabConflictError(
+                        f"Branch {self.branch} kept moving after {attempt + 1} attempts: {str(e)}"
+                    ) from e
+                if FILE_CHANGED_MARKER in str(e.error_message or "").lower():
+                    # Someone else changed one of the files: look the pins up again at the new head
+                    self.tree_index.forget_last_commits(list(last_commits))
+                    self._call(lambda: self.tree_index.refresh(force=True))
+                self.stats.retries += 1
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            
+            self.stats.commits += 1
+            self.tree_index.record_commit(commit, actions)
             return commit.id
-        except Exception as e:
-            raise GitLabClientError(f"Failed to delete account configuration: {str(e)}") from e 
\ No newline at end of file
+    
+    def _known_head(self) -> str:
+        """Branch head from the tree index, or from the API when the index is not built"""
+        head_sha = self.tree_index.head_sha
+        if head_sha is None:
+            head_sha = self._call(lambda: self.project.branches.get(self.branch)).commit["id"]
+        return head_sha
+    
+    def _landed_commit(
+        self, base_sha: str, commit_message: str, actions: List[Dict[str, str]]
+    ) -> Optional[Any]:
+        """
+        Find a commit whose response was lost among the commits made on the branch since
+        
+        Concurrent writers often use the same message, so a commit only counts
+        as ours if it also wrote exactly our actions.
+        
+        Args:
+            base_sha: Branch head known before the commit was sent
+            commit_message: Message the commit was sent with
+            actions: GitLab commit actions that were sent
+            
+        Returns:
+            The commit, or None if no matching commit reached the branch
+        """
+        compare = self._call(
+            lambda: self.project.repository_compare(base_sha, self.branch, straight=True)
+        )
+        for landed in compare.get("commits", []):
+            if landed["message"].strip() != commit_message.strip():
+                continue
+            if self._applied_actions(landed["id"], actions):
+                return self._call(lambda: self.project.commits.get(landed["id"]))
+        return None
+    
+    def _applied_actions(self, commit_id: str, actions: List[Dict[str, str]]) -> bool:
+        """
+        Check that a commit made every action, from the file headers at that commit
+        
+        Written files must have been last changed by the commit and hold the
+        sent content; deleted and moved-away files must be gone.
+        """
+        for action in actions:
+            if action["action"] == "delete":
+                if self._file_headers(action["file_path"], commit_id) is not None:
+                    return False
+                continue
+            previous_path = action.get("previous_path") if action["action"] == "move" else None
+            if previous_path and self._file_headers(previous_path, commit_id) is not None:
+                return False
+            headers = self._file_headers(action["file_path"], commit_id)
+            if headers is None or headers.get("X-Gitlab-Last-Commit-Id") != commit_id:
+                return False
+            content = action.get("content")
+            if content is not None and headers.get("X-Gitlab-Blob-Id") != git_blob_sha(content):
+                return False
+        return True
+    
+    def _file_headers(self, file_path: str, ref: str) -> Optional[Dict[str, str]]:
+        """Headers of a file at a ref, or None if it does not exist there"""
+        try:
+            return self._call(lambda: self.project.files.head(file_path, ref=ref))
+        except gitlab.exceptions.GitlabHeadError as e:
+            if e.response_code != 404:
+                raise
+            return None
+    
+    def _last_commits(self, actions: List[Dict[str, str]]) -> Dict[str, str]:
+        """
+        Get the last commit that touched each file of the pinned actions
+        
+        Commits known to the tree index are used as they are; the others are
+        read from the file's headers at the indexed head, one HEAD request per
+        file, and remembered. Files missing at that head are left unpinned and
+        GitLab reports them itself.
+        
+        Args:
+            actions: GitLab commit actions
+            
+        Returns:
+            Last commit ID per file path
+        """
+        index = self.tree_index
+        ref = index.head_sha or self.branch
+        last_commits = {}
+        for action in actions:
+            if action["action"] not in PINNED_ACTIONS:
+                continue
+            file_path = pinned_path(action)
+            commit_id = index.last_commit_id(file_path)
+            if commit_id is None:
+                try:
+                    headers = self._call(lambda: self.project.files.head(file_path, ref=ref))
+                except gitlab.exceptions.GitlabHeadError as e:
+                    if e.response_code != 404:
+                        raise
+                    continue
+                commit_id = headers["X-Gitlab-Last-Commit-Id"]
+                index.remember_last_commit(file_path, commit_id)
+            last_commits[file_path] = commit_id
+        return last_commits
+    
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry"""
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+    
+    def _submit(self, actions: List[Dict[str, str]], commit_message: str) -> str:
+        """Commit the actions directly, or through the coalescing queue when enabled"""
+        if not self.coalescing:
+            return self.commit_actions(actions, commit_message)
+        
+        if self._coalescer is None:
+            self._coalescer = CommitCoalescer(
+                self.commit_actions,
+                queue=CommitQueue(),
+                max_batch=int(os.environ.get("GITLAB_COMMIT_BATCH_SIZE", "50")),
+                window=float(os.environ.get("GITLAB_COMMIT_WINDOW", "0.5")),
+            )
+        return self._coalescer.commit(actions, commit_message)
+
+
+def needs_pin(actions: List[Dict[str, str]]) -> bool:
+    """Check whether any action is checked against last_commit_id"""
+    return any(action["action"] in PINNED_ACTIONS for action in actions)
+
+
+def pinned_path(action: Dict[str, str]) -> str:
+    """Get the path whose last commit GitLab compares an action's last_commit_id with"""
+    return action.get("previous_path") or action["file_path"]
+
+
+def pin_actions(
+    actions: List[Dict[str, str]], last_commits: Dict[str, str]
+) -> List[Dict[str, str]]:
+    """
+    Copy the actions, adding last_commit_id where GitLab checks it
+
+    Args:
+        actions: GitLab commit actions
+        last_commits: Last commit that touched each file; files missing from it are not pinned
+
+    Returns:
+        Pinned actions
+    """
+    return [
+        {**action, 'last_commit_id': last_commits[pinned_path(action)]}
+        if action["action"] in PINNED_ACTIONS and pinned_path(action) in last_commits else action
+        for action in actions
+    ]
+
+
+_client: Optional[GitLabClient] = None
+_client_lock = threading.Lock()
+
+
+def get_gitlab_client() -> GitLabClient:
+    """
+    Get the GitLab client shared by all invocations of this container
+    
+    The client is created on first use and keeps its HTTP connection pool
+    across warm invocations.
+    
+    Returns:
+        Shared GitLabClient instance
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GitLabClient()
+    return _client
+
+
+def reset_gitlab_client() -> None:
+    """Discard the shared client so the next call builds a new one"""
+    global _client
+    with _client_lock:
+        _client = None
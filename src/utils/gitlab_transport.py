@@ -0,0 +1,84 @@
+import functools
+import time
+from typing import Any, Optional
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limiter import GITLAB_RATE_LIMIT_WAIT, TokenBucket, acquire
+
+
+def is_gitlab_failure(status_code: int) -> bool:
+    """
+    Check whether a GitLab response means GitLab itself is failing
+
+    Client errors, conflicts and GitLab's own 429 say nothing about its
+    health and are left to the caller.
+    """
+    return status_code >= 500
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter_class() -> type:
+    """requests adapter class, built on first use so requests is only imported with GitLab"""
+    from requests.adapters import HTTPAdapter
+
+    class GitLabAdapter(HTTPAdapter):
+        """Checks the circuit breaker and takes a token before every request it sends"""
+
+        def __init__(
+            self,
+            bucket: Optional[TokenBucket],
+            breaker: Optional[CircuitBreaker],
+            wait: float = GITLAB_RATE_LIMIT_WAIT,
+            **kwargs: Any,
+        ):
+            super().__init__(**kwargs)
+            self.bucket = bucket
+            self.breaker = breaker
+            self.wait = wait
+
+        def send(self, request: Any, **kwargs: Any) -> Any:
+            # An open breaker fails fast without spending a token
+            if self.breaker is not None:
+                self.breaker.before_call()
+            if self.bucket is not None:
+                acquire(self.bucket, self.wait)
+            if self.breaker is None:
+                return super().send(request, **kwargs)
+
+            start = time.monotonic()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception:
+                self.breaker.record(succeeded=False, duration=time.monotonic() - start)
+                raise
+            self.breaker.record(
+                succeeded=not is_gitlab_failure(response.status_code),
+                duration=time.monotonic() - start,
+            )
+            return response
+
+    return GitLabAdapter
+
+
+def gitlab_adapter(
+    bucket: Optional[TokenBucket],
+    breaker: Optional[CircuitBreaker],
+    wait: float = GITLAB_RATE_LIMIT_WAIT,
+) -> Any:
+    """
+    Create the requests transport adapter mounted on the python-gitlab session
+
+    It sees every GitLab API call, including the pages of tree listings and
+    the index refreshes. Calls fail fast while the breaker is open, are
+    admitted through the token bucket, and report their outcome and latency
+    to the breaker.
+
+    Args:
+        bucket: Shared token bucket, or None without rate limiting
+        breaker: Shared circuit breaker, or None without one
+        wait: Seconds a call waits for a token
+
+    Returns:
+        requests HTTPAdapter
+    """
+    return _adapter_class()(bucket, breaker, wait)
@@ -0,0 +1,317 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+from utils.api import error_response
+from utils.store_registry import StoreRegistry
+
+# Backend for stored responses: "dynamodb", "memory" or "none"
+IDEMPOTENCY_BACKEND = os.environ.get("IDEMPOTENCY_BACKEND", "memory")
+IDEMPOTENCY_TABLE = os.environ.get("IDEMPOTENCY_TABLE", "")
+# How long a key and its response are kept
+IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", "86400"))
+# How long a duplicate waits for the first execution before giving up
+IDEMPOTENCY_WAIT = float(os.environ.get("IDEMPOTENCY_WAIT", "10"))
+# An in-progress record older than this is considered abandoned
+IDEMPOTENCY_IN_PROGRESS_TIMEOUT = int(os.environ.get("IDEMPOTENCY_IN_PROGRESS_TIMEOUT", "60"))
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+class IdempotencyStore(ABC):
+    """
+    Storage for idempotency records.
+
+    A record is created atomically when the first request with a key starts,
+    holds the request fingerprint, and receives the response once the request
+    completes.
+    """
+
+    @abstractmethod
+    def start(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a key for a new execution
+
+        Args:
+            key: Scoped idempotency key
+            fingerprint: Hash of the request payload
+
+        Returns:
+            None if the key was claimed, otherwise the existing record
+        """
+
+    @abstractmethod
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        """Store the response of a finished execution"""
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        """Forget a key whose execution failed, so a retry can run again"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the record of a key"""
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Process-local store for tests and local runs"""
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL):
+        self.ttl = ttl
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            record = self._records.get(key)
+            if record and not _is_stale(record, now):
+                return dict(record)
+            self._records[key] = {
+                "status": IN_PROGRESS,
+                "fingerprint": fingerprint,
+                "started_at": now,
+                "expires_at": now + self.ttl,
+            }
+            return None
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._records:
+                self._records[key].update({"status": COMPLETED, "response": response})
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record else None
+
+
+class DynamoDBIdempotencyStore(IdempotencyStore):
+    """
+    Store shared by every Lambda container, backed by a DynamoDB table.
+
+    The table has a string partition key ``id`` and TTL on ``expires_at``.
+    Keys are claimed with a conditional put, so two concurrent requests with
+    the same key can never both execute.
+    """
+
+    def __init__(self, table_name: str = IDEMPOTENCY_TABLE, ttl: int = IDEMPOTENCY_TTL):
+        import boto3
+
+        self.ttl = ttl
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def start(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        from botocore.exceptions import ClientError
+
+        while True:
+            now = int(time.time())
+            try:
+                self.table.put_item(
+                    Item={
+                        "id": key,
+                        "status": IN_PROGRESS,
+                        "fingerprint": fingerprint,
+                        "started_at": now,
+                        "expires_at": now + self.ttl,
+                    },
+                    # Take over expired records and abandoned executions
+                    ConditionExpression=(
+                        "attribute_not_exists(id) OR expires_at < :now "
+                        "OR (#status = :in_progress AND started_at < :abandoned)"
+                    ),
+                    ExpressionAttributeNames={"#status": "status"},
+                    ExpressionAttributeValues={
+                        ":now": now,
+                        ":in_progress": IN_PROGRESS,
+                        ":abandoned": now - IDEMPOTENCY_IN_PROGRESS_TIMEOUT,
+                    },
+                )
+                return None
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            record = self.get(key)
+            if record is not None:
+                return record
+            # The holder released the key between our put and get: try to claim it again
+
+    def complete(self, key: str, response: Dict[str, Any]) -> None:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.table.update_item(
+                Key={"id": key},
+                UpdateExpression="SET #status = :completed, #response = :response",
+                # Never create a record without a fingerprint if ours expired meanwhile
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames={"#status": "status", "#response": "response"},
+                ExpressionAttributeValues={
+                    ":completed": COMPLETED, ":response": json.dumps(response)
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
+    def release(self, key: str) -> None:
+        self.table.delete_item(Key={"id": key})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={"id": key}, ConsistentRead=True).get("Item")
+        if not item:
+            return None
+        record = dict(item)
+        if "response" in record:
+            record["response"] = json.loads(record["response"])
+        record["started_at"] = float(record.get("started_at", 0))
+        return record
+
+
+def _is_stale(record: Dict[str, Any], now: float) -> bool:
+    """Whether a record may be taken over by a new execution"""
+    if record["expires_at"] < now:
+        return True
+    abandoned_before = now - IDEMPOTENCY_IN_PROGRESS_TIMEOUT
+    return record["status"] == IN_PROGRESS and record["started_at"] < abandoned_before
+
+
+_stores: StoreRegistry[IdempotencyStore] = StoreRegistry(IDEMPOTENCY_BACKEND, {
+    "dynamodb": DynamoDBIdempotencyStore,
+    "memory": InMemoryIdempotencyStore,
+})
+
+
+def get_idempotency_store() -> Optional[IdempotencyStore]:
+    """
+    Get the idempotency store configured for this container
+
+    Returns:
+        The shared store, or None when idempotency is disabled
+    """
+    return _stores.get()
+
+
+def set_idempotency_store(store: Optional[IdempotencyStore]) -> None:
+    """Replace the store, mainly for tests"""
+    _stores.set(store)
+
+
+def get_idempotency_key(event: Dict[str, Any]) -> Optional[str]:
+    """Read the Idempotency-Key header, whatever its case"""
+    for name, value in (event.get("headers") or {}).items():
+        if name.lower() == IDEMPOTENCY_HEADER and value:
+            return value
+    return None
+
+
+def get_caller_principal(event: Dict[str, Any]) -> str:
+    """
+    Identify the caller from the authorizer context
+
+    HTTP APIs put the Lambda authorizer context under ``lambda``; REST APIs
+    flatten it into the authorizer object next to ``principalId``.
+    """
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    context = authorizer.get("lambda") or authorizer
+    return str(context.get("principal_id") or authorizer.get("principalId") or "anonymous")
+
+
+def idempotent(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable:
+    """
+    Make a write handler safe to retry with an ``Idempotency-Key`` header
+
+    The first request with a key runs the handler and stores its successful
+    response. Replays with the same key and payload get the stored response
+    back without running the handler. A duplicate arriving while the first
+    execution is still running waits for it. Reusing a key with a different
+    payload is rejected with 422. Keys are scoped per handler and per caller,
+    so one caller can never replay another caller's response.
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        store = get_idempotency_store()
+        key = get_idempotency_key(event)
+        if store is None or key is None:
+            return handler(event, context)
+
+        scoped_key = f"{handler.__name__}#{get_caller_principal(event)}#{key}"
+        fingerprint = _fingerprint(event)
+
+        record = store.start(scoped_key, fingerprint)
+        if record is None:
+            return _execute(store, scoped_key, handler, event, context)
+
+        if record["fingerprint"] != fingerprint:
+            return _error(422, "Idempotency-Key was already used with a different request")
+
+        deadline = time.monotonic() + IDEMPOTENCY_WAIT
+        while record and record["status"] == IN_PROGRESS and time.monotonic() < deadline:
+            time.sleep(0.1)
+            record = store.get(scoped_key)
+
+        if record is None:
+            # The first execution failed and released the key: run it ourselves
+            if store.start(scoped_key, fingerprint) is None:
+                return _execute(store, scoped_key, handler, event, context)
+            record = store.get(scoped_key)
+
+        if record and record["status"] == COMPLETED:
+            response = dict(record["response"])
+            response["headers"] = {**response.get("headers", {}), "Idempotent-Replayed": "true"}
+            return response
+
+        return _error(
+            409, "A request with this Idempotency-Key is still in progress", retry_after=1
+        )
+
+    return wrapper
+
+
+def _execute(
+    store: IdempotencyStore,
+    key: str,
+    handler: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+    event: Dict[str, Any],
+    context: Any,
+) -> Dict[str, Any]:
+    try:
+        response = handler(event, context)
+    except Exception:
+        store.release(key)
+        raise
+
+    # Only successful responses are replayed; failures may succeed on retry
+    if 200 <= response.get("statusCode", 500) < 300:
+        store.complete(key, response)
+    else:
+        store.release(key)
+    return response
+
+
+def _fingerprint(event: Dict[str, Any]) -> str:
+    """Hash of the parts of the request that define the operation"""
+    request = {
+        "route": event.get("routeKey") or event.get("rawPath"),
+        "path": event.get("pathParameters"),
+        "body": event.get("body"),
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+def _error(status_code: int, message: str, retry_after: Optional[int] = None) -> Dict[str, Any]:
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return error_response(status_code, message, headers=headers)
@@ -0,0 +1,105 @@
+import json
+import math
+import os
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment package
+    orjson = None
+
+# "orjson" when available, otherwise the standard library encoder
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson" if orjson is not None else "json")
+
+
+class JsonSerializer:
+    """
+    Serializer for configuration files.
+
+    Output is always byte-identical to ``json.dumps(value, indent=2)``, the
+    canonical format of the files in the AFT repository, whichever backend
+    is used. The stdlib backend reuses a single encoder instead of building
+    one per call. The orjson backend is used for values it renders exactly
+    the same way, and falls back to the stdlib encoder for the rest:
+    non-ASCII text (escaped by json), floats in exponent notation or not
+    finite, integers beyond 64 bits and non-string keys.
+    """
+
+    def __init__(self, backend: str = JSON_BACKEND):
+        if backend == "orjson" and orjson is None:
+            backend = "json"
+        self.backend = backend
+        self._encoder = json.JSONEncoder(indent=2)
+
+    def dumps(self, value: Any) -> str:
+        """
+        Serialize a value
+
+        Args:
+            value: JSON-compatible value
+
+        Returns:
+            JSON text, indented by two spaces
+        """
+        if self.backend == "orjson" and orjson is not None and _orjson_compatible(value):
+            output = orjson.dumps(value, option=orjson.OPT_INDENT_2)
+            if output.isascii():
+                return output.decode("ascii")
+        return self._encoder.encode(value)
+
+
+def _orjson_compatible(value: Any) -> bool:
+    """Whether orjson renders a value exactly like json.dumps"""
+    if isinstance(value, str) or value is None or isinstance(value, bool):
+        return True
+    if isinstance(value, int):
+        return -(2 ** 63) <= value < 2 ** 64
+    if isinstance(value, float):
+        return math.isfinite(value) and "e" not in repr(value)
+    if isinstance(value, dict):
+        return all(isinstance(k, str) and _orjson_compatible(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return all(_orjson_compatible(item) for item in value)
+    return False
+
+
+def dumps_compact(
+    value: Any, sort_keys: bool = False, default: Optional[Callable[[Any], Any]] = None
+) -> str:
+    """
+    Serialize an API response body
+
+    Compact UTF-8 JSON, through orjson when it is available and can encode
+    the value, otherwise through the standard library.
+
+    Args:
+        value: JSON-compatible value
+        sort_keys: Sort object keys, for output that hashes the same every time
+        default: Converter for values JSON cannot represent, e.g. DynamoDB decimals
+
+    Returns:
+        JSON text
+    """
+    if JSON_BACKEND == "orjson" and orjson is not None:
+        try:
+            option = orjson.OPT_SORT_KEYS if sort_keys else 0
+            return orjson.dumps(value, default=default, option=option).decode("utf-8")
+        except TypeError:
+            # Non-string keys or integers beyond 64 bits
+            pass
+    return json.dumps(
+        value, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys, default=default
+    )
+
+
+_serializer: Optional[JsonSerializer] = None
+
+
+def get_serializer() -> JsonSerializer:
+    """Get the serializer shared by every generator in this container"""
+    global _serializer
+    if _serializer is None:
+        _serializer = JsonSerializer()
+    return _serializer
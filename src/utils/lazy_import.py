@@ -0,0 +1,35 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module on first attribute access instead of at import time
+
+    Keeps heavy dependencies such as python-gitlab and Jinja out of the cold
+    start of entry points that never use them. The module is registered in
+    ``sys.modules`` right away, so later plain imports share the same object.
+
+    Args:
+        name: Absolute module name
+
+    Returns:
+        The module, loaded when one of its attributes is first used
+
+    Raises:
+        ModuleNotFoundError: If the module is not installed
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
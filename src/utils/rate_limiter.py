@@ -0,0 +1,181 @@
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from utils.store_registry import StoreRegistry
+
+# Backend of the GitLab API token bucket: "dynamodb", "memory" or "none"
+GITLAB_RATE_LIMIT_BACKEND = os.environ.get("GITLAB_RATE_LIMIT_BACKEND", "memory")
+GITLAB_RATE_LIMIT_TABLE = os.environ.get("GITLAB_RATE_LIMIT_TABLE", "")
+# Sustained GitLab API calls per second, shared by every container
+GITLAB_RATE_LIMIT = float(os.environ.get("GITLAB_RATE_LIMIT", "30"))
+# Calls that may be made at once after an idle period
+GITLAB_RATE_BURST = float(os.environ.get("GITLAB_RATE_BURST", "60"))
+# How long a call waits for a token before the request is shed with 429
+GITLAB_RATE_LIMIT_WAIT = float(os.environ.get("GITLAB_RATE_LIMIT_WAIT", "1"))
+# Bucket shared by the callers that count against the same GitLab quota
+GITLAB_RATE_LIMIT_KEY = os.environ.get("GITLAB_RATE_LIMIT_KEY", "gitlab")
+
+# Optimistic updates attempted before a contended bucket is treated as empty
+MAX_UPDATE_ATTEMPTS = 5
+
+
+class RateLimitedError(Exception):
+    """No GitLab API token was available in time; reported as 429 Too Many Requests"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("GitLab API rate limit reached, retry later")
+        self.retry_after = retry_after
+
+
+class TokenBucket(ABC):
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+
+    Each GitLab API call takes one token.
+    """
+
+    def __init__(self, rate: float = GITLAB_RATE_LIMIT, capacity: float = GITLAB_RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+
+    @abstractmethod
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is expected
+        """
+
+    def _refill(self, tokens: float, updated_at: Optional[float], now: float) -> float:
+        if updated_at is None:
+            return self.capacity
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+
+
+class InMemoryTokenBucket(TokenBucket):
+    """Bucket local to the process, for local runs and tests"""
+
+    def __init__(self, rate: float = GITLAB_RATE_LIMIT, capacity: float = GITLAB_RATE_BURST):
+        super().__init__(rate, capacity)
+        self._tokens = capacity
+        self._updated_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            tokens = self._refill(self._tokens, self._updated_at, now)
+            self._updated_at = now
+            if tokens >= 1:
+                self._tokens = tokens - 1
+                return 0.0
+            self._tokens = tokens
+            return (1 - tokens) / self.rate
+
+
+class DynamoDBTokenBucket(TokenBucket):
+    """
+    Bucket shared by every Lambda container, stored in a DynamoDB item.
+
+    The table has a string partition key ``bucket``. The refill is computed
+    from the stored token count and timestamp. The write is conditional on
+    the timestamp it read, so concurrent callers never spend the same token.
+    """
+
+    def __init__(
+        self,
+        key: str = GITLAB_RATE_LIMIT_KEY,
+        table_name: str = GITLAB_RATE_LIMIT_TABLE,
+        rate: float = GITLAB_RATE_LIMIT,
+        capacity: float = GITLAB_RATE_BURST,
+    ):
+        import boto3
+
+        super().__init__(rate, capacity)
+        self.key = key
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def try_acquire(self) -> float:
+        from botocore.exceptions import ClientError
+
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            item = self.table.get_item(Key={"bucket": self.key}, ConsistentRead=True).get("Item")
+            previous = item["updated_at"] if item else None
+            now = time.time()
+            tokens = self._refill(
+                float(item["tokens"]) if item else self.capacity,
+                float(previous) if previous is not None else None,
+                now,
+            )
+            if tokens < 1:
+                return (1 - tokens) / self.rate
+
+            if previous is None:
+                condition: Dict[str, Any] = {
+                    "ConditionExpression": "attribute_not_exists(#bucket)",
+                    "ExpressionAttributeNames": {"#bucket": "bucket"},
+                }
+            else:
+                condition = {
+                    "ConditionExpression": "updated_at = :previous",
+                    "ExpressionAttributeValues": {":previous": previous},
+                }
+            try:
+                self.table.put_item(
+                    Item={
+                        "bucket": self.key,
+                        "tokens": Decimal(str(round(tokens - 1, 6))),
+                        "updated_at": Decimal(str(round(now, 6))),
+                    },
+                    **condition,
+                )
+                return 0.0
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        # Heavily contended: back off as if the bucket were empty
+        return 1 / self.rate
+
+
+def acquire(bucket: TokenBucket, wait: float = GITLAB_RATE_LIMIT_WAIT) -> None:
+    """
+    Take a token, waiting up to ``wait`` seconds for one
+
+    Raises:
+        RateLimitedError: If no token is expected within the wait
+    """
+    deadline = time.monotonic() + wait
+    while True:
+        delay = bucket.try_acquire()
+        if delay <= 0:
+            return
+        if time.monotonic() + delay > deadline:
+            raise RateLimitedError(retry_after=max(1, math.ceil(delay)))
+        time.sleep(delay)
+
+
+_buckets: StoreRegistry[TokenBucket] = StoreRegistry(GITLAB_RATE_LIMIT_BACKEND, {
+    "dynamodb": DynamoDBTokenBucket,
+    "memory": InMemoryTokenBucket,
+})
+
+
+def get_token_bucket() -> Optional[TokenBucket]:
+    """
+    Get the GitLab API token bucket configured for this container
+
+    Returns:
+        The shared bucket, or None when rate limiting is disabled
+    """
+    return _buckets.get()
+
+
+def set_token_bucket(bucket: Optional[TokenBucket]) -> None:
+    """Replace the bucket, mainly for tests"""
+    _buckets.set(bucket)
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+# Directory holding one sub-directory per account in the AFT repository
+ACCOUNT_REQUEST_ROOT = "aft-account-request"
+
+# Seconds the index is trusted before the branch head is checked again
+TREE_INDEX_TTL = float(os.environ.get("GITLAB_TREE_INDEX_TTL", "30"))
+
+
+def git_blob_sha(content: str) -> str:
+    """
+    Compute the git blob ID of a file content, as GitLab reports it in tree listings
+
+    Args:
+        content: File content
+
+    Returns:
+        Hex SHA-1 of the blob
+    """
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class RepositoryTreeIndex:
+    """
+    Cached index of the files under ``aft-account-request/`` on a branch.
+
+    The index maps each file path to its blob ID. It is built from a single
+    paginated recursive tree listing and then kept current incrementally:
+    our own commits are applied locally, and changes made by others are
+    picked up from the compare diff between the last known head and the
+    current one. Lookups never hit the API.
+
+    It also remembers the last commit that touched a file, when known, for
+    the ``last_commit_id`` GitLab checks update and delete actions against.
+    Tree listings do not report it; our own commits and lookups by the
+    client fill it in, and files changed by others are forgotten.
+    """
+
+    def __init__(
+        self,
+        project: Any,
+        branch: str,
+        root: str = ACCOUNT_REQUEST_ROOT,
+        ttl: float = TREE_INDEX_TTL,
+    ):
+        self.project = project
+        self.branch = branch
+        self.root = root
+        self.ttl = ttl
+        self.head_sha: Optional[str] = None
+        # Blob ID per path; None when the file exists but its blob ID is unknown
+        self._blobs: Dict[str, Optional[str]] = {}
+        # Last commit that touched each file, for the files where it is known
+        self._last_commits: Dict[str, str] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Bring the index up to date with the branch head
+
+        Args:
+            force: Check the branch head even if the TTL has not elapsed
+        """
+        with self._lock:
+            if not force and self.is_fresh():
+                return
+
+            head_sha = self.project.branches.get(self.branch).commit["id"]
+            if head_sha != self.head_sha:
+                if not self.apply_compare(head_sha, self._compare(head_sha)):
+                    self.load_tree(head_sha, self._list_tree(head_sha))
+            self.mark_checked()
+
+    def is_fresh(self) -> bool:
+        """Check whether the branch head was checked within the TTL"""
+        return self.head_sha is not None and time.monotonic() - self._checked_at < self.ttl
+
+    def mark_checked(self) -> None:
+        """Record that the index was just found current with the branch head"""
+        self._checked_at = time.monotonic()
+
+    def load_tree(self, head_sha: str, items: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the index with a full tree listing
+
+        ``refresh`` applies the listing, the compare diff and the TTL rules
+        with python-gitlab; clients with other transports do the I/O
+        themselves and apply the results through ``load_tree``,
+        ``apply_compare`` and ``mark_checked``, one refresh at a time.
+
+        Args:
+            head_sha: Commit the listing was made at
+            items: Tree entries under the root, as the tree API returns them
+        """
+        self._blobs = {item["path"]: item["id"] for item in items if item["type"] == "blob"}
+        self._last_commits = {}
+        self.head_sha = head_sha
+
+    def apply_compare(self, head_sha: str, compare: Optional[Dict[str, Any]]) -> bool:
+        """
+        Move the index to a new head from the compare diff of the indexed head
+
+        Args:
+            head_sha: New branch head
+            compare: Compare API result from the indexed head to head_sha, or
+                None if it could not be fetched
+
+        Returns:
+            False if the index must be rebuilt from a full listing instead
+        """
+        if self.head_sha is None or compare is None or compare.get("compare_timeout"):
+            return False
+
+        for diff in compare.get("diffs", []):
+            old_path, new_path = diff["old_path"], diff["new_path"]
+            self._last_commits.pop(old_path, None)
+            self._last_commits.pop(new_path, None)
+            if diff.get("deleted_file") or diff.get("renamed_file"):
+                self._blobs.pop(old_path, None)
+            if not diff.get("deleted_file") and new_path.startswith(f"{self.root}/"):
+                # The compare API does not return blob IDs
+                self._blobs[new_path] = None
+        self.head_sha = head_sha
+        return True
+
+    def exists(self, file_path: str) -> bool:
+        """Check whether a file exists on the branch"""
+        return file_path in self._blobs
+
+    def blob_id(self, file_path: str) -> Optional[str]:
+        """Get the blob ID of a file, or None if missing or unknown"""
+        return self._blobs.get(file_path)
+
+    def remember_blob(self, file_path: str, blob_id: str, head_sha: str) -> None:
+        """
+        Record the blob ID of a file read by the caller at a head
+
+        Ignored once the index has moved past that head, since the file may
+        have changed again.
+        """
+        with self._lock:
+            if self.head_sha == head_sha and file_path in self._blobs:
+                self._blobs[file_path] = blob_id
+
+    def action_for(self, file_path: str) -> str:
+        """Choose the commit action that writes a file"""
+        return "update" if self.exists(file_path) else "create"
+
+    def last_commit_id(self, file_path: str) -> Optional[str]:
+        """Get the last commit that touched a file, or None if unknown"""
+        return self._last_commits.get(file_path)
+
+    def remember_last_commit(self, file_path: str, commit_id: str) -> None:
+        """Record the last commit that touched a file, as looked up by the caller"""
+        with self._lock:
+            self._last_commits[file_path] = commit_id
+
+    def forget_last_commits(self, file_paths: List[str]) -> None:
+        """Drop the last commits of files, so that they are looked up again"""
+        with self._lock:
+            for file_path in file_paths:
+                self._last_commits.pop(file_path, None)
+
+    def list_paths(self, prefix: str = "") -> List[str]:
+        """List the indexed file paths under a prefix"""
+        return sorted(path for path in self._blobs if path.startswith(prefix))
+
+    def record_commit(self, commit: Any, actions: List[Dict[str, str]]) -> None:
+        """
+        Apply one of our own commits to the index without an API call
+
+        If the commit was not made directly on top of the indexed head, the
+        index is left alone and the next refresh picks the changes up from
+        the compare diff instead.
+
+        Args:
+            commit: Commit returned by the commits API
+            actions: Actions the commit was created with
+        """
+        with self._lock:
+            # Our commit touched these files last, whichever head it was made on
+            for action in actions:
+                if action["action"] == "delete":
+                    self._last_commits.pop(action["file_path"], None)
+                else:
+                    self._last_commits[action["file_path"]] = commit.id
+                if action.get("previous_path"):
+                    self._last_commits.pop(action["previous_path"], None)
+
+            parent_ids = getattr(commit, "parent_ids", None) or []
+            if self.head_sha is None or parent_ids != [self.head_sha]:
+                return
+
+            for action in actions:
+                file_path = action["file_path"]
+                if not file_path.startswith(f"{self.root}/"):
+                    continue
+                if action["action"] == "delete":
+                    self._blobs.pop(file_path, None)
+                else:
+                    content = action.get("content")
+                    self._blobs[file_path] = git_blob_sha(content) if content is not None else None
+            self.head_sha = commit.id
+
+    def _list_tree(self, head_sha: str) -> List[Dict[str, Any]]:
+        try:
+            return list(self.project.repository_tree(
+                path=self.root, ref=head_sha, recursive=True, iterator=True, per_page=100
+            ))
+        except Exception as e:
+            # GitLab answers 404 until the first account directory exists
+            if getattr(e, "response_code", None) != 404:
+                raise
+            return []
+
+    def _compare(self, head_sha: str) -> Optional[Dict[str, Any]]:
+        if self.head_sha is None:
+            return None
+        try:
+            return self.project.repository_compare(self.head_sha, head_sha, straight=True)
+        except Exception:
+            # History was rewritten or the old head is gone: start over
+            return None
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+# Accept write requests and commit them from a queue worker instead of inline
+ASYNC_WRITES = os.environ.get("ASYNC_WRITES", "false").lower() == "true"
+
+# Backend for the queue and status records: "aws" (SQS + DynamoDB) or "memory"
+REQUEST_QUEUE_BACKEND = os.environ.get("REQUEST_QUEUE_BACKEND", "memory")
+REQUEST_QUEUE_URL = os.environ.get("REQUEST_QUEUE_URL", "")
+REQUEST_DEAD_LETTER_QUEUE_URL = os.environ.get("REQUEST_DEAD_LETTER_QUEUE_URL", "")
+REQUEST_STATUS_TABLE = os.environ.get("REQUEST_STATUS_TABLE", "")
+# Bucket holding the messages too large to be sent through SQS
+REQUEST_PAYLOAD_BUCKET = os.environ.get("REQUEST_PAYLOAD_BUCKET", "")
+# Larger message bodies are stored in the bucket and sent by reference;
+# SQS rejects bodies over 256 KiB
+REQUEST_MESSAGE_MAX_BYTES = int(os.environ.get("REQUEST_MESSAGE_MAX_BYTES", str(240 * 1024)))
+# How long status records are kept
+REQUEST_STATUS_TTL = int(os.environ.get("REQUEST_STATUS_TTL", str(7 * 86400)))
+
+QUEUED = "queued"
+COMMITTED = "committed"
+FAILED = "failed"
+
+
+class RequestQueueError(Exception):
+    """Exception raised when a request cannot be queued"""
+    pass
+
+
+class InMemoryRequestQueue:
+    """Process-local queue for tests and local runs"""
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        # Received records handed to defer and dead_letter
+        self.deferred: List[Tuple[Dict[str, Any], int]] = []
+        self.dead_letters: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self.messages.append(message)
+
+    def receive_all(self) -> List[Dict[str, Any]]:
+        """Take every queued message, oldest first"""
+        with self._lock:
+            messages, self.messages = self.messages, []
+            return messages
+
+    def load(self, body: str) -> Dict[str, Any]:
+        """Decode the body of a received message"""
+        return json.loads(body)
+
+    def defer(self, record: Dict[str, Any], seconds: int) -> None:
+        """Hide a received message for the given number of seconds"""
+        with self._lock:
+            self.deferred.append((record, seconds))
+
+    def dead_letter(self, record: Dict[str, Any]) -> None:
+        """Move a received message to the dead-letter queue"""
+        with self._lock:
+            self.dead_letters.append(record)
+
+
+class SQSRequestQueue:
+    """
+    FIFO queue of accepted write requests, drained by the request worker Lambda.
+
+    Messages are grouped by the accounts they write, so requests for the
+    same account are delivered in the order they were accepted, and are
+    deduplicated on their request ID. Bodies over ``max_message_bytes`` are
+    stored in S3 and the message only carries their key.
+    """
+
+    def __init__(
+        self,
+        queue_url: str = REQUEST_QUEUE_URL,
+        payload_bucket: str = REQUEST_PAYLOAD_BUCKET,
+        max_message_bytes: int = REQUEST_MESSAGE_MAX_BYTES,
+        dead_letter_queue_url: str = REQUEST_DEAD_LETTER_QUEUE_URL,
+    ):
+        import boto3
+
+        self.queue_url = queue_url
+        self.dead_letter_queue_url = dead_letter_queue_url
+        self.payload_bucket = payload_bucket
+        self.max_message_bytes = max_message_bytes
+        self.sqs = boto3.client("sqs")
+        self._s3: Optional[Any] = None
+
+    @property
+    def s3(self) -> Any:
+        """S3 client, created for the first large message"""
+        if self._s3 is None:
+            import boto3
+
+            self._s3 = boto3.client("s3")
+        return self._s3
+
+    def send(self, message: Dict[str, Any]) -> None:
+        body = json.dumps(message)
+        if len(body.encode("utf-8")) > self.max_message_bytes:
+            key = f"requests/{message['request_id']}.json"
+            self.s3.put_object(Bucket=self.payload_bucket, Key=key, Body=body.encode("utf-8"))
+            body = json.dumps({"request_id": message["request_id"], "payload_key": key})
+        self.sqs.send_message(
+            QueueUrl=self.queue_url,
+            MessageBody=body,
+            MessageGroupId=message_group_id(message),
+            MessageDeduplicationId=message["request_id"],
+        )
+
+    def load(self, body: str) -> Dict[str, Any]:
+        """Decode the body of a received message, fetching it from S3 if it was stored there"""
+        message = json.loads(body)
+        if "payload_key" in message:
+            stored = self.s3.get_object(Bucket=self.payload_bucket, Key=message["payload_key"])
+            message = json.loads(stored["Body"].read())
+        return message
+
+    def defer(self, record: Dict[str, Any], seconds: int) -> None:
+        """Hide a received message for the given number of seconds"""
+        self.sqs.change_message_visibility(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=record["receiptHandle"],
+            # The longest visibility timeout SQS accepts is 12 hours
+            VisibilityTimeout=max(0, min(int(seconds), 43200)),
+        )
+
+    def dead_letter(self, record: Dict[str, Any]) -> None:
+        """
+        Move a received message to the dead-letter queue
+
+        The caller deletes the original by reporting it as processed.
+        """
+        self.sqs.send_message(
+            QueueUrl=self.dead_letter_queue_url,
+            MessageBody=record["body"],
+            MessageGroupId=record.get("attributes", {}).get("MessageGroupId", "dead-letter"),
+            MessageDeduplicationId=record["messageId"],
+        )
+
+
+def message_group_id(message: Dict[str, Any]) -> str:
+    """
+    FIFO message group of a request: the accounts it writes
+
+    A batch spanning several accounts forms its own group, ordered with the
+    other requests for exactly the same accounts; the worker's account
+    leases still keep it from running alongside a request for one of them.
+
+    Args:
+        message: Queued request
+
+    Returns:
+        Message group ID, at most the 128 characters SQS accepts
+    """
+    account_names = message.get("account_names") or [message.get("account_name", "")]
+    group = ",".join(sorted(account_names))
+    return group if len(group) <= 128 else hashlib.sha256(group.encode("utf-8")).hexdigest()
+
+
+class InMemoryRequestStatusStore:
+    """Process-local status records for tests and local runs"""
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, request_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records[request_id] = dict(record)
+
+    def update(self, request_id: str, **fields: Any) -> None:
+        with self._lock:
+            self._records.setdefault(request_id, {}).update(fields)
+
+    def increment(self, request_id: str, field: str) -> None:
+        with self._lock:
+            record = self._records.setdefault(request_id, {})
+            record[field] = record.get(field, 0) + 1
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(request_id)
+            return dict(record) if record else None
+
+
+class DynamoDBRequestStatusStore:
+    """Status records in a DynamoDB table keyed by ``request_id``, expiring on ``expires_at``"""
+
+    def __init__(self, table_name: str = REQUEST_STATUS_TABLE, ttl: int = REQUEST_STATUS_TTL):
+        import boto3
+
+        self.ttl = ttl
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def put(self, request_id: str, record: Dict[str, Any]) -> None:
+        self.table.put_item(Item={
+            **record,
+            "request_id": request_id,
+            "expires_at": int(time.time()) + self.ttl,
+        })
+
+    def update(self, request_id: str, **fields: Any) -> None:
+        names = {f"#{key}": key for key in fields}
+        values = {f":{key}": value for key, value in fields.items()}
+        self.table.update_item(
+            Key={"request_id": request_id},
+            UpdateExpression="SET " + ", ".join(f"#{key} = :{key}" for key in fields),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    def increment(self, request_id: str, field: str) -> None:
+        """Add one to a counter, atomically across workers"""
+        self.table.update_item(
+            Key={"request_id": request_id},
+            UpdateExpression="ADD #field :one",
+            ExpressionAttributeNames={"#field": field},
+            ExpressionAttributeValues={":one": 1},
+        )
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={"request_id": request_id}).get("Item")
+        if not item:
+            return None
+        record = dict(item)
+        record.pop("expires_at", None)
+        return record
+
+
+_queue: Optional[Any] = None
+_status_store: Optional[Any] = None
+
+
+def get_request_queue() -> Any:
+    """Get the request queue configured for this container"""
+    global _queue
+    if _queue is None:
+        _queue = SQSRequestQueue() if REQUEST_QUEUE_BACKEND == "aws" else InMemoryRequestQueue()
+    return _queue
+
+
+def get_request_status_store() -> Any:
+    """Get the request status store configured for this container"""
+    global _status_store
+    if _status_store is None:
+        if REQUEST_QUEUE_BACKEND == "aws":
+            _status_store = DynamoDBRequestStatusStore()
+        else:
+            _status_store = InMemoryRequestStatusStore()
+    return _status_store
+
+
+def reset_request_queue() -> None:
+    """Drop the shared queue and status store, mainly for tests"""
+    global _queue, _status_store
+    _queue = None
+    _status_store = None
+
+
+def enqueue_request(operation: str, payload: Dict[str, Any], summary: Dict[str, Any]) -> str:
+    """
+    Record a write request as queued and send it to the worker
+
+    Args:
+        operation: "commit" for rendered files or "delete" for an account deletion
+        payload: Data the worker needs for the operation
+        summary: Fields reported by the status endpoint, such as the account name
+
+    Returns:
+        Request ID
+
+    Raises:
+        RequestQueueError: If the request could not be queued
+    """
+    request_id = uuid.uuid4().hex
+    now = int(time.time())
+    store = get_request_status_store()
+    try:
+        store.put(request_id, {**summary, "status": QUEUED, "created_at": now, "updated_at": now})
+        get_request_queue().send({"request_id": request_id, "operation": operation, **payload})
+    except Exception as e:
+        raise RequestQueueError(f"Failed to queue request: {str(e)}") from e
+    return request_id
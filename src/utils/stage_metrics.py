@@ -0,0 +1,145 @@
+import contextvars
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+# Where stage timings go: "emf" (CloudWatch Embedded Metric Format on stdout),
+# "memory" (kept in process, for tests) or "off"
+STAGE_METRICS = os.environ.get("STAGE_METRICS", "emf").lower()
+STAGE_METRICS_NAMESPACE = os.environ.get("POWERTOOLS_METRICS_NAMESPACE", "AftApi")
+
+# Stages timed by the account handlers
+PARSE = "Parse"
+VALIDATE = "Validate"
+RENDER = "Render"
+GITLAB_INIT = "GitLabInit"
+COMMIT = "Commit"
+ENQUEUE = "Enqueue"
+READ = "Read"
+
+# Shared no-op returned by stage() when nothing is being timed
+_NOOP = nullcontext()
+
+
+class StdoutMetricsSink:
+    """Writes EMF records to stdout, where the Lambda runtime ships them to CloudWatch"""
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        print(json.dumps(record, separators=(",", ":")))
+
+
+class InMemoryMetricsSink:
+    """Keeps EMF records in process for tests and local runs"""
+
+    def __init__(self) -> None:
+        self.records: List[Dict[str, Any]] = []
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        self.records.append(record)
+
+    def durations(self) -> List[Dict[str, float]]:
+        """Stage durations in milliseconds, one mapping per emitted record"""
+        result = []
+        for record in self.records:
+            names = [m["Name"] for d in record["_aws"]["CloudWatchMetrics"] for m in d["Metrics"]]
+            result.append({name[:-len("Duration")]: record[name] for name in names})
+        return result
+
+    def clear(self) -> None:
+        self.records = []
+
+
+class StageTimer:
+    """Stage durations of one handler invocation"""
+
+    def __init__(self, handler: str, cold_start: bool):
+        self.handler = handler
+        self.cold_start = cold_start
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block, adding to the stage's total if it runs more than once"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def to_emf(self) -> Dict[str, Any]:
+        """Serialize the durations as one EMF record through powertools Metrics"""
+        from aws_lambda_powertools.metrics import EphemeralMetrics, MetricUnit
+
+        metrics = EphemeralMetrics(namespace=STAGE_METRICS_NAMESPACE)
+        metrics.add_dimension(name="handler", value=self.handler)
+        metrics.add_dimension(name="start", value="cold" if self.cold_start else "warm")
+        for name, duration in self.durations.items():
+            metrics.add_metric(name=f"{name}Duration", unit=MetricUnit.Milliseconds, value=duration)
+        # A plain dict rather than powertools' TypedDict, which the sinks do not need
+        return dict(metrics.serialize_metric_set())
+
+
+_current: contextvars.ContextVar[Optional[StageTimer]] = contextvars.ContextVar(
+    "stage_timer", default=None
+)
+_cold_start = True
+_sink: Optional[Any] = None
+
+
+def get_metrics_sink() -> Optional[Any]:
+    """Get the sink configured for this container, None when stage metrics are off"""
+    global _sink
+    if _sink is None and STAGE_METRICS != "off":
+        _sink = InMemoryMetricsSink() if STAGE_METRICS == "memory" else StdoutMetricsSink()
+    return _sink
+
+
+def set_metrics_sink(sink: Optional[Any]) -> None:
+    """Replace the sink, e.g. with an InMemoryMetricsSink in tests; None restores the default"""
+    global _sink
+    _sink = sink
+
+
+def stage(name: str) -> ContextManager[None]:
+    """
+    Time a stage of the current handler invocation
+
+    Args:
+        name: Stage name, e.g. PARSE or COMMIT
+
+    Returns:
+        Context manager timing the block, a shared no-op outside a timed handler
+    """
+    timer = _current.get()
+    return timer.stage(name) if timer is not None else _NOOP
+
+
+def stage_metrics(handler: Callable) -> Callable:
+    """
+    Emit the stage durations of each invocation as one EMF record
+
+    Records carry the handler name and whether the invocation was a cold start
+    as dimensions. Stage metrics add a ContextVar lookup per stage when off.
+    """
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        global _cold_start
+        sink = get_metrics_sink()
+        if sink is None:
+            return handler(event, context)
+
+        timer = StageTimer(handler.__name__, _cold_start)
+        _cold_start = False
+        token = _current.set(timer)
+        try:
+            return handler(event, context)
+        finally:
+            _current.reset(token)
+            if timer.durations:
+                sink.emit(timer.to_emf())
+
+    return wrapper
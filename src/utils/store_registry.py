@@ -0,0 +1,43 @@
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class StoreRegistry(Generic[T]):
+    """
+    Container-wide instance of a backend chosen by a ``*_BACKEND`` setting.
+
+    Idempotency records, account leases, the GitLab token bucket and the
+    circuit breaker all pick their storage the same way: "dynamodb" to share
+    state between containers, "memory" (or "sqlite") for local runs and
+    tests, and "none" to turn the feature off. The instance is built on
+    first use and kept for the life of the container.
+    """
+
+    def __init__(self, backend: str, factories: Dict[str, Callable[[], T]]):
+        """
+        Args:
+            backend: Configured backend name
+            factories: Builder of the instance per backend name; any other
+                name, such as "none", disables the feature
+        """
+        self.backend = backend
+        self.factories = factories
+        self._instance: Optional[T] = None
+
+    def get(self) -> Optional[T]:
+        """
+        Get the shared instance, building it on first use
+
+        Returns:
+            The instance, or None when the feature is disabled
+        """
+        if self._instance is None:
+            factory = self.factories.get(self.backend)
+            if factory is not None:
+                self._instance = factory()
+        return self._instance
+
+    def set(self, instance: Optional[T]) -> None:
+        """Replace the instance, mainly for tests; None rebuilds it on next use"""
+        self._instance = instance
@@ -1,3 +1,4 @@
+import re
 from typing import Optional
 
 from models.account import AccountRequest
@@ -8,6 +9,38 @@ class ValidationError(Exception):
     pass
 
 
+# Option names become file names under the account's options/ directory
+OPTION_NAME_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def validate_account_name(account_name: str) -> None:
+    """
+    Validate an account name, which names the account's directory in the repository
+    
+    Args:
+        account_name: Account name from a request body or path parameter
+    
+    Raises:
+        ValidationError: If the name is not alphanumeric, e.g. ``a/..`` or ``foo/bar``
+    """
+    if not account_name.isalnum():
+        raise ValidationError("Account name must be alphanumeric")
+
+
+def validate_option_name(option_name: str) -> None:
+    """
+    Validate an option name, which names a file under the account's options directory
+    
+    Args:
+        option_name: Option name from a request body or path parameter
+    
+    Raises:
+        ValidationError: If the name has characters other than letters, digits, ``-`` and ``_``
+    """
+    if not OPTION_NAME_PATTERN.fullmatch(option_name):
+        raise ValidationError("Option name must only contain letters, digits, '-' and '_'")
+
+
 def validate_account_request(
     account_request: AccountRequest, update: bool = False
 ) -> None:
@@ -22,8 +55,7 @@ def validate_account_request(
         ValidationError: If validation fails
     """
     # Validate account name format
-    if not account_request.account_name.isalnum():
-        raise ValidationError("Account name must be alphanumeric")
+    validate_account_name(account_request.account_name)
     
     # Validate email format
     if "@" not in account_request.email:
@@ -10,6 +10,10 @@ terraform {
       source  = "hashicorp/aws"
       version = "~> 5.0"
     }
+    external = {
+      source  = "hashicorp/external"
+      version = "~> 2.3"
+    }
   }
 }
 
@@ -28,11 +32,28 @@ module "cognito" {
   environment = var.environment
 }
 
+# DynamoDB tables for request state
+module "dynamodb" {
+  source = "./modules/dynamodb"
+  
+  environment = var.environment
+}
+
+# Queue of write requests accepted in asynchronous mode
+module "sqs" {
+  source = "./modules/sqs"
+  
+  environment = var.environment
+}
+
 # IAM module
 module "iam" {
   source = "./modules/iam"
   
   environment = var.environment
+  dynamodb_table_arns = module.dynamodb.table_arns
+  sqs_queue_arns = [module.sqs.queue_arn, module.sqs.dlq_arn]
+  s3_bucket_arns = [module.sqs.payload_bucket_arn]
 }
 
 # Lambda module
@@ -50,6 +71,27 @@ module "lambda" {
   # Cognito configuration
   cognito_user_pool_id = module.cognito.user_pool_id
   cognito_app_client_id = module.cognito.user_pool_client_id
+  
+  # Request state
+  idempotency_table_name = module.dynamodb.idempotency_table_name
+  request_status_table_name = module.dynamodb.request_status_table_name
+  account_lock_table_name = module.dynamodb.account_lock_table_name
+  rate_limit_table_name = module.dynamodb.rate_limit_table_name
+  gitlab_rate_limit = var.gitlab_rate_limit
+  gitlab_rate_burst = var.gitlab_rate_burst
+  circuit_breaker_table_name = module.dynamodb.circuit_breaker_table_name
+  gitlab_breaker_failures = var.gitlab_breaker_failures
+  gitlab_breaker_open_seconds = var.gitlab_breaker_open_seconds
+  gitlab_outage_spool = var.gitlab_outage_spool
+  request_queue_url = module.sqs.queue_url
+  request_queue_arn = module.sqs.queue_arn
+  request_dead_letter_queue_url = module.sqs.dlq_url
+  request_max_deliveries = module.sqs.max_receive_count
+  request_payload_bucket = module.sqs.payload_bucket_name
+  async_writes = var.async_writes
+  stage_metrics = var.stage_metrics
+  
+  single_router = var.single_router
 }
 
 # API Gateway module
@@ -59,4 +101,5 @@ module "api_gateway" {
   environment = var.environment
   lambda_function_arns = module.lambda.function_arns
   lambda_authorizer_role_arn = module.iam.lambda_authorizer_role_arn
+  single_router = var.single_router
 } 
\ No newline at end of file
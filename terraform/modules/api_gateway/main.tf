@@ -1,3 +1,31 @@
+locals {
+  routes = [
+    "list_accounts",
+    "get_account",
+    "create_account",
+    "batch_create_accounts",
+    "update_account",
+    "delete_account",
+    "upgrade_account",
+    "downgrade_account",
+    "add_option",
+    "remove_option",
+    "get_request_status",
+  ]
+  
+  # Function serving each route, either its own or the single router
+  route_function_arns = {
+    for route in local.routes :
+    route => var.single_router ? var.lambda_function_arns["router"] : var.lambda_function_arns[route]
+  }
+  
+  # Statement IDs must be unique per function once the router serves every route
+  route_statement_ids = {
+    for route in local.routes :
+    route => var.single_router ? "AllowAPIGatewayInvoke-${route}" : "AllowAPIGatewayInvoke"
+  }
+}
+
 resource "aws_apigatewayv2_api" "aft_api" {
   name          = "aft-api-${var.environment}"
   protocol_type = "HTTP"
@@ -6,7 +34,8 @@ resource "aws_apigatewayv2_api" "aft_api" {
   cors_configuration {
     allow_origins = ["*"]
     allow_methods = ["GET", "POST", "PUT", "DELETE"]
-    allow_headers = ["Content-Type", "Authorization"]
+    allow_headers = ["Content-Type", "Authorization", "Idempotency-Key", "If-None-Match"]
+    expose_headers = ["ETag"]
     max_age       = 300
   }
   
@@ -44,16 +73,35 @@ resource "aws_apigatewayv2_stage" "default" {
 resource "aws_apigatewayv2_authorizer" "jwt_authorizer" {
   api_id           = aws_apigatewayv2_api.aft_api.id
   authorizer_type  = "REQUEST"
-  identity_sources = ["$request.header.Authorization"]
+  # The method is part of the cache key because read and write permissions differ
+  identity_sources = ["$request.header.Authorization", "$context.httpMethod"]
   name             = "jwt-authorizer"
   
   authorizer_uri           = var.lambda_function_arns["authorizer"]
   authorizer_payload_format_version = "2.0"
   enable_simple_responses  = true
+  authorizer_result_ttl_in_seconds = var.authorizer_result_ttl
   
   authorizer_credentials_arn = var.lambda_authorizer_role_arn
 }
 
+# Read routes for account requests
+resource "aws_apigatewayv2_route" "list_accounts" {
+  api_id             = aws_apigatewayv2_api.aft_api.id
+  route_key          = "GET /accounts"
+  target             = "integrations/${aws_apigatewayv2_integration.list_accounts.id}"
+  authorization_type = "CUSTOM"
+  authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
+}
+
+resource "aws_apigatewayv2_route" "get_account" {
+  api_id             = aws_apigatewayv2_api.aft_api.id
+  route_key          = "GET /accounts/{accountName}"
+  target             = "integrations/${aws_apigatewayv2_integration.get_account.id}"
+  authorization_type = "CUSTOM"
+  authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
+}
+
 # API Routes for account operations
 resource "aws_apigatewayv2_route" "create_account" {
   api_id             = aws_apigatewayv2_api.aft_api.id
@@ -63,6 +111,14 @@ resource "aws_apigatewayv2_route" "create_account" {
   authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
 }
 
+resource "aws_apigatewayv2_route" "batch_create_accounts" {
+  api_id             = aws_apigatewayv2_api.aft_api.id
+  route_key          = "POST /accounts:batch"
+  target             = "integrations/${aws_apigatewayv2_integration.batch_create_accounts.id}"
+  authorization_type = "CUSTOM"
+  authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
+}
+
 resource "aws_apigatewayv2_route" "update_account" {
   api_id             = aws_apigatewayv2_api.aft_api.id
   route_key          = "PUT /accounts/{accountName}"
@@ -113,19 +169,52 @@ resource "aws_apigatewayv2_route" "remove_option" {
   authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
 }
 
+# Route for the status of queued requests
+resource "aws_apigatewayv2_route" "get_request_status" {
+  api_id             = aws_apigatewayv2_api.aft_api.id
+  route_key          = "GET /requests/{requestId}"
+  target             = "integrations/${aws_apigatewayv2_integration.get_request_status.id}"
+  authorization_type = "CUSTOM"
+  authorizer_id      = aws_apigatewayv2_authorizer.jwt_authorizer.id
+}
+
 # Lambda integrations
+resource "aws_apigatewayv2_integration" "list_accounts" {
+  api_id                 = aws_apigatewayv2_api.aft_api.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = local.route_function_arns["list_accounts"]
+  payload_format_version = "2.0"
+  description            = "List accounts integration"
+}
+
+resource "aws_apigatewayv2_integration" "get_account" {
+  api_id                 = aws_apigatewayv2_api.aft_api.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = local.route_function_arns["get_account"]
+  payload_format_version = "2.0"
+  description            = "Get account integration"
+}
+
 resource "aws_apigatewayv2_integration" "create_account" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["create_account"]
+  integration_uri        = local.route_function_arns["create_account"]
   payload_format_version = "2.0"
   description            = "Create account integration"
 }
 
+resource "aws_apigatewayv2_integration" "batch_create_accounts" {
+  api_id                 = aws_apigatewayv2_api.aft_api.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = local.route_function_arns["batch_create_accounts"]
+  payload_format_version = "2.0"
+  description            = "Bulk account creation integration"
+}
+
 resource "aws_apigatewayv2_integration" "update_account" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["update_account"]
+  integration_uri        = local.route_function_arns["update_account"]
   payload_format_version = "2.0"
   description            = "Update account integration"
 }
@@ -133,7 +222,7 @@ resource "aws_apigatewayv2_integration" "update_account" {
 resource "aws_apigatewayv2_integration" "delete_account" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["delete_account"]
+  integration_uri        = local.route_function_arns["delete_account"]
   payload_format_version = "2.0"
   description            = "Delete account integration"
 }
@@ -142,7 +231,7 @@ resource "aws_apigatewayv2_integration" "delete_account" {
 resource "aws_apigatewayv2_integration" "upgrade_account" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["upgrade_account"]
+  integration_uri        = local.route_function_arns["upgrade_account"]
   payload_format_version = "2.0"
   description            = "Upgrade account integration"
 }
@@ -150,7 +239,7 @@ resource "aws_apigatewayv2_integration" "upgrade_account" {
 resource "aws_apigatewayv2_integration" "downgrade_account" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["downgrade_account"]
+  integration_uri        = local.route_function_arns["downgrade_account"]
   payload_format_version = "2.0"
   description            = "Downgrade account integration"
 }
@@ -158,7 +247,7 @@ resource "aws_apigatewayv2_integration" "downgrade_account" {
 resource "aws_apigatewayv2_integration" "add_option" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["add_option"]
+  integration_uri        = local.route_function_arns["add_option"]
   payload_format_version = "2.0"
   description            = "Add account option integration"
 }
@@ -166,69 +255,109 @@ resource "aws_apigatewayv2_integration" "add_option" {
 resource "aws_apigatewayv2_integration" "remove_option" {
   api_id                 = aws_apigatewayv2_api.aft_api.id
   integration_type       = "AWS_PROXY"
-  integration_uri        = var.lambda_function_arns["remove_option"]
+  integration_uri        = local.route_function_arns["remove_option"]
   payload_format_version = "2.0"
   description            = "Remove account option integration"
 }
 
+resource "aws_apigatewayv2_integration" "get_request_status" {
+  api_id                 = aws_apigatewayv2_api.aft_api.id
+  integration_type       = "AWS_PROXY"
+  integration_uri        = local.route_function_arns["get_request_status"]
+  payload_format_version = "2.0"
+  description            = "Request status integration"
+}
+
 # Lambda permissions
+resource "aws_lambda_permission" "list_accounts_permission" {
+  statement_id  = local.route_statement_ids["list_accounts"]
+  action        = "lambda:InvokeFunction"
+  function_name = element(split(":", local.route_function_arns["list_accounts"]), 6)
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts"
+}
+
+resource "aws_lambda_permission" "get_account_permission" {
+  statement_id  = local.route_statement_ids["get_account"]
+  action        = "lambda:InvokeFunction"
+  function_name = element(split(":", local.route_function_arns["get_account"]), 6)
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*"
+}
+
 resource "aws_lambda_permission" "create_account_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["create_account"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["create_account"]), 6)
+  function_name = element(split(":", local.route_function_arns["create_account"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts"
 }
 
+resource "aws_lambda_permission" "batch_create_accounts_permission" {
+  statement_id  = local.route_statement_ids["batch_create_accounts"]
+  action        = "lambda:InvokeFunction"
+  function_name = element(split(":", local.route_function_arns["batch_create_accounts"]), 6)
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts:batch"
+}
+
 resource "aws_lambda_permission" "update_account_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["update_account"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["update_account"]), 6)
+  function_name = element(split(":", local.route_function_arns["update_account"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*"
 }
 
 resource "aws_lambda_permission" "delete_account_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["delete_account"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["delete_account"]), 6)
+  function_name = element(split(":", local.route_function_arns["delete_account"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*"
 }
 
 # Additional Lambda permissions
 resource "aws_lambda_permission" "upgrade_account_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["upgrade_account"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["upgrade_account"]), 6)
+  function_name = element(split(":", local.route_function_arns["upgrade_account"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*/upgrade"
 }
 
 resource "aws_lambda_permission" "downgrade_account_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["downgrade_account"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["downgrade_account"]), 6)
+  function_name = element(split(":", local.route_function_arns["downgrade_account"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*/downgrade"
 }
 
 resource "aws_lambda_permission" "add_option_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["add_option"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["add_option"]), 6)
+  function_name = element(split(":", local.route_function_arns["add_option"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*/options"
 }
 
 resource "aws_lambda_permission" "remove_option_permission" {
-  statement_id  = "AllowAPIGatewayInvoke"
+  statement_id  = local.route_statement_ids["remove_option"]
   action        = "lambda:InvokeFunction"
-  function_name = element(split(":", var.lambda_function_arns["remove_option"]), 6)
+  function_name = element(split(":", local.route_function_arns["remove_option"]), 6)
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/accounts/*/options/*"
 }
 
+resource "aws_lambda_permission" "get_request_status_permission" {
+  statement_id  = local.route_statement_ids["get_request_status"]
+  action        = "lambda:InvokeFunction"
+  function_name = element(split(":", local.route_function_arns["get_request_status"]), 6)
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.aft_api.execution_arn}/*/*/requests/*"
+}
+
 # Authorizer lambda permission
 resource "aws_lambda_permission" "authorizer_permission" {
   statement_id  = "AllowAPIGatewayInvoke"
@@ -11,4 +11,16 @@ variable "lambda_function_arns" {
 variable "lambda_authorizer_role_arn" {
   description = "ARN of the IAM role for Lambda authorizer"
   type        = string
-} 
\ No newline at end of file
+}
+
+variable "authorizer_result_ttl" {
+  description = "Seconds API Gateway caches authorizer results per identity source"
+  type        = number
+  default     = 300
+}
+
+variable "single_router" {
+  description = "Integrate every route with the single router function"
+  type        = bool
+  default     = false
+}
\ No newline at end of file
@@ -0,0 +1,94 @@
+# Responses of write requests, keyed by Idempotency-Key
+resource "aws_dynamodb_table" "idempotency" {
+  name         = "aft-api-idempotency-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "id"
+  
+  attribute {
+    name = "id"
+    type = "S"
+  }
+  
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Status of write requests accepted in asynchronous mode
+resource "aws_dynamodb_table" "request_status" {
+  name         = "aft-api-request-status-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "request_id"
+  
+  attribute {
+    name = "request_id"
+    type = "S"
+  }
+  
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Leases serializing write operations per account
+resource "aws_dynamodb_table" "account_locks" {
+  name         = "aft-api-account-locks-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "account_name"
+  
+  attribute {
+    name = "account_name"
+    type = "S"
+  }
+  
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Token bucket shared by every container calling the GitLab API
+resource "aws_dynamodb_table" "rate_limits" {
+  name         = "aft-api-rate-limits-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "bucket"
+  
+  attribute {
+    name = "bucket"
+    type = "S"
+  }
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Circuit breaker state shared by every container calling the GitLab API
+resource "aws_dynamodb_table" "circuit_breakers" {
+  name         = "aft-api-circuit-breakers-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "breaker"
+  
+  attribute {
+    name = "breaker"
+    type = "S"
+  }
+  
+  tags = {
+    Environment = var.environment
+  }
+}
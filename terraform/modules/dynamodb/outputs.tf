@@ -0,0 +1,35 @@
+output "idempotency_table_name" {
+  description = "Name of the idempotency table"
+  value       = aws_dynamodb_table.idempotency.name
+}
+
+output "request_status_table_name" {
+  description = "Name of the request status table"
+  value       = aws_dynamodb_table.request_status.name
+}
+
+output "account_lock_table_name" {
+  description = "Name of the account lock table"
+  value       = aws_dynamodb_table.account_locks.name
+}
+
+output "rate_limit_table_name" {
+  description = "Name of the GitLab API rate limit table"
+  value       = aws_dynamodb_table.rate_limits.name
+}
+
+output "circuit_breaker_table_name" {
+  description = "Name of the GitLab circuit breaker table"
+  value       = aws_dynamodb_table.circuit_breakers.name
+}
+
+output "table_arns" {
+  description = "ARNs of the tables the Lambda functions use"
+  value = [
+    aws_dynamodb_table.idempotency.arn,
+    aws_dynamodb_table.request_status.arn,
+    aws_dynamodb_table.account_locks.arn,
+    aws_dynamodb_table.rate_limits.arn,
+    aws_dynamodb_table.circuit_breakers.arn,
+  ]
+}
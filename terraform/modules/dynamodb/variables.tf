@@ -0,0 +1,4 @@
+variable "environment" {
+  description = "Environment name (dev, stage, prod)"
+  type        = string
+}
@@ -37,6 +37,35 @@ resource "aws_iam_role_policy" "lambda_execution_policy" {
         Effect   = "Allow"
         Resource = "arn:aws:logs:*:*:*"
       },
+      {
+        Action = [
+          "dynamodb:GetItem",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+        ]
+        Effect   = "Allow"
+        Resource = var.dynamodb_table_arns
+      },
+      {
+        Action = [
+          "sqs:SendMessage",
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:ChangeMessageVisibility",
+          "sqs:GetQueueAttributes",
+        ]
+        Effect   = "Allow"
+        Resource = var.sqs_queue_arns
+      },
+      {
+        Action = [
+          "s3:GetObject",
+          "s3:PutObject",
+        ]
+        Effect   = "Allow"
+        Resource = [for arn in var.s3_bucket_arns : "${arn}/*"]
+      },
     ]
   })
 }
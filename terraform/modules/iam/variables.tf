@@ -1,4 +1,19 @@
 variable "environment" {
   description = "Environment name (dev, stage, prod)"
   type        = string
-} 
\ No newline at end of file
+} 
+
+variable "dynamodb_table_arns" {
+  description = "ARNs of the DynamoDB tables the Lambda functions use"
+  type        = list(string)
+}
+
+variable "sqs_queue_arns" {
+  description = "ARNs of the SQS queues the Lambda functions use"
+  type        = list(string)
+}
+
+variable "s3_bucket_arns" {
+  description = "ARNs of the S3 buckets whose objects the Lambda functions read and write"
+  type        = list(string)
+}
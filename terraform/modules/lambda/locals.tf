@@ -7,10 +7,22 @@ locals {
   }
   
   lambda_functions = {
+    list_accounts = {
+      handler      = "handlers.account_handlers.list_accounts_handler"
+      description  = "Handler listing account requests"
+    },
+    get_account = {
+      handler      = "handlers.account_handlers.get_account_handler"
+      description  = "Handler reading one account request"
+    },
     create_account = {
       handler      = "handlers.account_handlers.create_account_handler"
       description  = "Handler for account creation requests"
     },
+    batch_create_accounts = {
+      handler      = "handlers.account_handlers.batch_create_accounts_handler"
+      description  = "Handler for bulk account creation requests"
+    },
     update_account = {
       handler      = "handlers.account_handlers.update_account_handler"
       description  = "Handler for account update requests"
@@ -35,6 +47,10 @@ locals {
       handler      = "handlers.account_handlers.remove_option_handler"
       description  = "Handler for removing options from an account"
     },
+    get_request_status = {
+      handler      = "handlers.request_handlers.get_request_status_handler"
+      description  = "Handler reporting the status of queued requests"
+    },
     authorizer = {
       handler      = "handlers.auth_handler.lambda_authorizer"
       description  = "JWT token authorizer for API Gateway"
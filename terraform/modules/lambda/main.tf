@@ -7,10 +7,22 @@ locals {
   }
   
   lambda_functions = {
+    list_accounts = {
+      description = "Lambda function to list account requests"
+      handler     = "handlers.account_handlers.list_accounts_handler"
+    },
+    get_account = {
+      description = "Lambda function to read one account request"
+      handler     = "handlers.account_handlers.get_account_handler"
+    },
     create_account = {
       description = "Lambda function to handle account creation requests"
       handler     = "handlers.account_handlers.create_account_handler"
     },
+    batch_create_accounts = {
+      description = "Lambda function to handle bulk account creation requests"
+      handler     = "handlers.account_handlers.batch_create_accounts_handler"
+    },
     update_account = {
       description = "Lambda function to handle account update requests"
       handler     = "handlers.account_handlers.update_account_handler"
@@ -34,20 +46,47 @@ locals {
     remove_option = {
       description = "Lambda function to handle removing options from accounts"
       handler     = "handlers.account_handlers.remove_option_handler"
+    },
+    get_request_status = {
+      description = "Lambda function to report the status of queued requests"
+      handler     = "handlers.request_handlers.get_request_status_handler"
     }
   }
+  
+  # With a single router, one function serves every route (the authorizer stays separate)
+  router_functions = merge(
+    {
+      router = {
+        description = "Lambda function dispatching every AFT API route"
+        handler     = "handlers.router.router_handler"
+      }
+    },
+    { for k, v in local.lambda_functions : k => v if k == "authorizer" }
+  )
+  
+  deployed_functions = var.single_router ? local.router_functions : local.lambda_functions
+}
+
+# Precompile the Jinja templates so cold starts never parse template source.
+# The compiled modules are not checked in, so they are rebuilt on every plan,
+# before the source directory is zipped, rather than only when a template changes.
+data "external" "compiled_templates" {
+  program     = ["env", "PYTHONPATH=src", "python3", "-m", "tools.compile_templates", "--terraform"]
+  working_dir = "${path.module}/../../.."
 }
 
 # Create a zip file of the Lambda source code
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_dir  = "${path.module}/../../src"
+  source_dir  = "${path.module}/../../../src"
   output_path = "${path.module}/lambda_function.zip"
+  
+  depends_on = [data.external.compiled_templates]
 }
 
 # Create Lambda functions
 resource "aws_lambda_function" "functions" {
-  for_each = local.lambda_functions
+  for_each = local.deployed_functions
   
   function_name    = "aft-api-${each.key}-${var.environment}"
   description      = each.value.description
@@ -68,8 +107,31 @@ resource "aws_lambda_function" "functions" {
       GITLAB_URL  = var.gitlab_url
       GITLAB_PROJECT_ID = var.gitlab_project_id
       GITLAB_BRANCH = var.gitlab_branch
+      # Only the read handlers serve the catalog; warming it elsewhere would slow every cold start
+      ACCOUNT_CATALOG_WARM = contains(["list_accounts", "get_account"], each.key) ? "true" : "false"
       COGNITO_USER_POOL_ID = var.cognito_user_pool_id
       COGNITO_APP_CLIENT_ID = var.cognito_app_client_id
+      ACCOUNT_BATCH_MAX_ITEMS = var.account_batch_max_items
+      IDEMPOTENCY_BACKEND = "dynamodb"
+      IDEMPOTENCY_TABLE = var.idempotency_table_name
+      ASYNC_WRITES = var.async_writes ? "true" : "false"
+      REQUEST_QUEUE_BACKEND = "aws"
+      REQUEST_QUEUE_URL = var.request_queue_url
+      REQUEST_PAYLOAD_BUCKET = var.request_payload_bucket
+      REQUEST_STATUS_TABLE = var.request_status_table_name
+      ACCOUNT_LOCK_BACKEND = "dynamodb"
+      ACCOUNT_LOCK_TABLE = var.account_lock_table_name
+      GITLAB_RATE_LIMIT_BACKEND = "dynamodb"
+      GITLAB_RATE_LIMIT_TABLE = var.rate_limit_table_name
+      GITLAB_RATE_LIMIT = var.gitlab_rate_limit
+      GITLAB_RATE_BURST = var.gitlab_rate_burst
+      GITLAB_BREAKER_BACKEND = "dynamodb"
+      GITLAB_BREAKER_TABLE = var.circuit_breaker_table_name
+      GITLAB_BREAKER_FAILURES = var.gitlab_breaker_failures
+      GITLAB_BREAKER_OPEN_SECONDS = var.gitlab_breaker_open_seconds
+      GITLAB_OUTAGE_SPOOL = var.gitlab_outage_spool ? "true" : "false"
+      STAGE_METRICS = var.stage_metrics ? "emf" : "off"
+      POWERTOOLS_METRICS_NAMESPACE = "AftApi"
     }
   }
   
@@ -79,6 +141,60 @@ resource "aws_lambda_function" "functions" {
   }
 }
 
+# Worker committing requests queued in asynchronous mode
+resource "aws_lambda_function" "request_worker" {
+  function_name    = "aft-api-request-worker-${var.environment}"
+  description      = "Lambda function committing queued requests to GitLab"
+  role             = var.iam_role_arn
+  handler          = "handlers.request_handlers.request_worker_handler"
+  runtime          = local.common_lambda_config.runtime
+  timeout          = local.common_lambda_config.timeout
+  memory_size      = local.common_lambda_config.memory_size
+  architectures    = local.common_lambda_config.architecture
+  
+  filename         = data.archive_file.lambda_zip.output_path
+  source_code_hash = data.archive_file.lambda_zip.output_base64sha256
+  
+  environment {
+    variables = {
+      ENVIRONMENT = var.environment
+      LOG_LEVEL   = var.environment == "prod" ? "INFO" : "DEBUG"
+      GITLAB_URL  = var.gitlab_url
+      GITLAB_PROJECT_ID = var.gitlab_project_id
+      GITLAB_BRANCH = var.gitlab_branch
+      REQUEST_QUEUE_BACKEND = "aws"
+      REQUEST_QUEUE_URL = var.request_queue_url
+      REQUEST_DEAD_LETTER_QUEUE_URL = var.request_dead_letter_queue_url
+      REQUEST_PAYLOAD_BUCKET = var.request_payload_bucket
+      REQUEST_STATUS_TABLE = var.request_status_table_name
+      REQUEST_MAX_RECEIVES = var.request_max_receives
+      REQUEST_MAX_DELIVERIES = var.request_max_deliveries
+      ACCOUNT_LOCK_BACKEND = "dynamodb"
+      ACCOUNT_LOCK_TABLE = var.account_lock_table_name
+      GITLAB_RATE_LIMIT_BACKEND = "dynamodb"
+      GITLAB_RATE_LIMIT_TABLE = var.rate_limit_table_name
+      GITLAB_RATE_LIMIT = var.gitlab_rate_limit
+      GITLAB_RATE_BURST = var.gitlab_rate_burst
+      GITLAB_BREAKER_BACKEND = "dynamodb"
+      GITLAB_BREAKER_TABLE = var.circuit_breaker_table_name
+      GITLAB_BREAKER_FAILURES = var.gitlab_breaker_failures
+      GITLAB_BREAKER_OPEN_SECONDS = var.gitlab_breaker_open_seconds
+    }
+  }
+  
+  tags = {
+    Environment = var.environment
+    Function    = "request_worker"
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "request_worker" {
+  event_source_arn        = var.request_queue_arn
+  function_name           = aws_lambda_function.request_worker.arn
+  batch_size              = 10
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
 # CloudWatch Log Groups for Lambda functions
 resource "aws_cloudwatch_log_group" "lambda_logs" {
   for_each = local.lambda_functions
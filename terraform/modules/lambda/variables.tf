@@ -32,4 +32,114 @@ variable "cognito_user_pool_id" {
 variable "cognito_app_client_id" {
   description = "Cognito App Client ID"
   type        = string
-} 
\ No newline at end of file
+} 
+
+variable "idempotency_table_name" {
+  description = "DynamoDB table storing responses of write requests by Idempotency-Key"
+  type        = string
+}
+
+variable "single_router" {
+  description = "Deploy one router function for every route instead of one function per route"
+  type        = bool
+  default     = false
+}
+
+variable "account_batch_max_items" {
+  description = "Largest number of accounts accepted by POST /accounts:batch"
+  type        = number
+  default     = 100
+}
+
+variable "stage_metrics" {
+  description = "Emit per-stage handler latencies as CloudWatch embedded metrics"
+  type        = bool
+  default     = true
+}
+
+variable "async_writes" {
+  description = "Queue write requests for the request worker instead of committing them inline"
+  type        = bool
+  default     = false
+}
+
+variable "request_queue_url" {
+  description = "URL of the SQS queue of accepted write requests"
+  type        = string
+}
+
+variable "request_queue_arn" {
+  description = "ARN of the SQS queue of accepted write requests"
+  type        = string
+}
+
+variable "request_dead_letter_queue_url" {
+  description = "URL of the SQS dead-letter queue the request worker moves failed requests to"
+  type        = string
+}
+
+variable "request_payload_bucket" {
+  description = "S3 bucket holding request messages too large for SQS"
+  type        = string
+}
+
+variable "request_status_table_name" {
+  description = "DynamoDB table storing the status of queued requests"
+  type        = string
+}
+
+variable "account_lock_table_name" {
+  description = "DynamoDB table holding the per-account operation leases"
+  type        = string
+}
+
+variable "rate_limit_table_name" {
+  description = "DynamoDB table holding the GitLab API token bucket"
+  type        = string
+}
+
+variable "gitlab_rate_limit" {
+  description = "Sustained GitLab API calls per second across all functions"
+  type        = number
+  default     = 30
+}
+
+variable "gitlab_rate_burst" {
+  description = "GitLab API calls allowed at once after an idle period"
+  type        = number
+  default     = 60
+}
+
+variable "circuit_breaker_table_name" {
+  description = "DynamoDB table holding the GitLab circuit breaker state"
+  type        = string
+}
+
+variable "gitlab_breaker_failures" {
+  description = "Consecutive failed or slow GitLab API calls that open the circuit breaker"
+  type        = number
+  default     = 5
+}
+
+variable "gitlab_breaker_open_seconds" {
+  description = "Seconds the circuit breaker fails calls fast before probing GitLab again"
+  type        = number
+  default     = 30
+}
+
+variable "gitlab_outage_spool" {
+  description = "Queue write requests for the request worker while the GitLab circuit breaker is open"
+  type        = bool
+  default     = true
+}
+
+variable "request_max_receives" {
+  description = "Failed attempts before a queued request is marked as failed and dead-lettered"
+  type        = number
+  default     = 5
+}
+
+variable "request_max_deliveries" {
+  description = "Deliveries before the queue redrive policy dead-letters a message, deferrals included"
+  type        = number
+}
@@ -0,0 +1,69 @@
+data "aws_caller_identity" "current" {}
+
+# Write requests accepted in asynchronous mode, drained by the request worker.
+# FIFO: requests for the same account (message group) are delivered in order,
+# and the request ID is the deduplication ID.
+resource "aws_sqs_queue" "requests" {
+  name                        = "aft-api-requests-${var.environment}.fifo"
+  fifo_queue                  = true
+  content_based_deduplication = false
+  deduplication_scope         = "messageGroup"
+  fifo_throughput_limit       = "perMessageGroupId"
+  visibility_timeout_seconds  = var.visibility_timeout
+  message_retention_seconds   = 345600
+  
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.requests_dlq.arn
+    maxReceiveCount     = var.max_receive_count
+  })
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+resource "aws_sqs_queue" "requests_dlq" {
+  name                      = "aft-api-requests-dlq-${var.environment}.fifo"
+  fifo_queue                = true
+  message_retention_seconds = 1209600
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+# Request messages over the SQS size limit, sent through the queue by reference
+resource "aws_s3_bucket" "request_payloads" {
+  bucket = "aft-api-request-payloads-${var.environment}-${data.aws_caller_identity.current.account_id}"
+  
+  tags = {
+    Environment = var.environment
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "request_payloads" {
+  bucket = aws_s3_bucket.request_payloads.id
+  
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+# Kept as long as their message can still be redriven from the dead-letter queue
+resource "aws_s3_bucket_lifecycle_configuration" "request_payloads" {
+  bucket = aws_s3_bucket.request_payloads.id
+  
+  rule {
+    id     = "expire-request-payloads"
+    status = "Enabled"
+    
+    filter {
+      prefix = "requests/"
+    }
+    
+    expiration {
+      days = 15
+    }
+  }
+}
@@ -0,0 +1,34 @@
+output "queue_url" {
+  description = "URL of the request queue"
+  value       = aws_sqs_queue.requests.url
+}
+
+output "queue_arn" {
+  description = "ARN of the request queue"
+  value       = aws_sqs_queue.requests.arn
+}
+
+output "dlq_arn" {
+  description = "ARN of the request dead-letter queue"
+  value       = aws_sqs_queue.requests_dlq.arn
+}
+
+output "dlq_url" {
+  description = "URL of the request dead-letter queue"
+  value       = aws_sqs_queue.requests_dlq.url
+}
+
+output "max_receive_count" {
+  description = "Deliveries before the redrive policy moves a message to the dead-letter queue"
+  value       = var.max_receive_count
+}
+
+output "payload_bucket_name" {
+  description = "Name of the bucket holding request messages too large for SQS"
+  value       = aws_s3_bucket.request_payloads.bucket
+}
+
+output "payload_bucket_arn" {
+  description = "ARN of the bucket holding request messages too large for SQS"
+  value       = aws_s3_bucket.request_payloads.arn
+}
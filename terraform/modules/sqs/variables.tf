@@ -0,0 +1,18 @@
+variable "environment" {
+  description = "Environment name (dev, stage, prod)"
+  type        = string
+}
+
+variable "visibility_timeout" {
+  description = "Seconds a received message stays hidden; at least six times the worker timeout"
+  type        = number
+  default     = 180
+}
+
+# The worker dead-letters failed requests itself after REQUEST_MAX_RECEIVES
+# attempts; deliveries deferred while an account is busy only count here
+variable "max_receive_count" {
+  description = "Deliveries before a message moves to the dead-letter queue"
+  type        = number
+  default     = 50
+}
@@ -29,4 +29,52 @@ variable "gitlab_branch" {
   description = "GitLab branch to use"
   type        = string
   default     = "main"
-} 
\ No newline at end of file
+} 
+
+variable "single_router" {
+  description = "Serve every API route from one router Lambda function"
+  type        = bool
+  default     = false
+}
+
+variable "gitlab_rate_limit" {
+  description = "Sustained GitLab API calls per second across all functions"
+  type        = number
+  default     = 30
+}
+
+variable "gitlab_rate_burst" {
+  description = "GitLab API calls allowed at once after an idle period"
+  type        = number
+  default     = 60
+}
+
+variable "gitlab_breaker_failures" {
+  description = "Consecutive failed or slow GitLab API calls that open the circuit breaker"
+  type        = number
+  default     = 5
+}
+
+variable "gitlab_breaker_open_seconds" {
+  description = "Seconds the circuit breaker fails calls fast before probing GitLab again"
+  type        = number
+  default     = 30
+}
+
+variable "gitlab_outage_spool" {
+  description = "Queue write requests for the request worker while GitLab is unavailable"
+  type        = bool
+  default     = true
+}
+
+variable "stage_metrics" {
+  description = "Emit per-stage handler latencies as CloudWatch embedded metrics"
+  type        = bool
+  default     = true
+}
+
+variable "async_writes" {
+  description = "Accept write requests into a queue and commit them from a worker"
+  type        = bool
+  default     = false
+}
@@ -0,0 +1,9 @@
+"""Test fixture for the Lambda context object"""
+
+
+class LambdaContext:
+    """Context with the attributes powertools reads"""
+    function_name = "aft-api-test"
+    memory_limit_in_mb = 128
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:aft-api-test"
+    aws_request_id = "test-request-id"
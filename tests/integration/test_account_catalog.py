@@ -0,0 +1,139 @@
+import json
+import shutil
+
+import pytest
+
+from handlers import account_handlers
+from models.account import AccountRequest
+from tests.fixtures.lambda_context import LambdaContext
+from tools.gitlab_stub.server import GitLabStub
+from utils.account_catalog import AccountCatalog
+from utils.config_generator import ConfigGenerator
+from utils.gitlab_client import GitLabClient
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        shutil.which("git") is None, reason="git is required for the GitLab stand-in"
+    ),
+]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    with GitLabStub(str(tmp_path / "repo.git"), token="stub-token") as stub:
+        monkeypatch.setenv("GITLAB_URL", stub.url)
+        monkeypatch.setenv("GITLAB_TOKEN", "stub-token")
+        monkeypatch.setenv("GITLAB_PROJECT_ID", "aft/account-requests")
+        client = GitLabClient()
+        client.stub = stub
+        yield client
+
+
+def _create(client, name, ou="Sandbox", tags=None):
+    request = AccountRequest(
+        account_name=name,
+        email=f"{name}@example.com",
+        organizational_unit=ou,
+        account_tags=tags or {},
+    )
+    client.commit_config_files(ConfigGenerator().generate_account_config(request), f"Create {name}")
+
+
+def test_list_filters_and_paginates(client):
+    """Test OU and tag filters and cursor pagination"""
+    for i in range(5):
+        ou = "Sandbox" if i % 2 else "Workloads"
+        _create(client, f"account{i}", ou=ou, tags={"team": f"t{i % 3}"})
+    catalog = AccountCatalog(client.tree_index)
+
+    sandbox, _ = catalog.list(organizational_unit="Sandbox")
+    tagged, _ = catalog.list(tag="team=t0")
+    first, cursor = catalog.list(limit=2)
+    second, cursor = catalog.list(limit=2, cursor=cursor)
+    third, cursor = catalog.list(limit=2, cursor=cursor)
+
+    assert [a["account_name"] for a in sandbox] == ["account1", "account3"]
+    assert [a["account_name"] for a in tagged] == ["account0", "account3"]
+    assert [a["account_name"] for a in first + second + third] == [f"account{i}" for i in range(5)]
+    assert cursor is None
+
+
+def test_refresh_reads_only_changed_requests(client):
+    """Test unchanged accounts are served from memory after a change"""
+    for i in range(3):
+        _create(client, f"account{i}")
+    client.tree_index.ttl = 0
+    catalog = AccountCatalog(client.tree_index)
+    catalog.list()
+    reads = client.stub.request_counts.get("GET raw blob", 0)
+
+    _create(client, "account1", ou="Workloads")
+    account = catalog.get("account1")
+
+    assert account["organizational_unit"] == "Workloads"
+    assert client.stub.request_counts["GET raw blob"] == reads + 1
+
+
+def test_requests_changed_by_others_are_read_once(client):
+    """Test a request read by path is not fetched again on later head changes"""
+    for i in range(3):
+        _create(client, f"account{i}")
+    client.tree_index.ttl = 0
+    catalog = AccountCatalog(client.tree_index)
+    catalog.list()
+    other = GitLabClient()
+
+    _create(other, "account1", ou="Workloads")
+    catalog.list()
+    reads = client.stub.request_counts["GET raw file"]
+    _create(other, "account2", ou="Workloads")
+    accounts, _ = catalog.list()
+
+    assert [a["organizational_unit"] for a in accounts] == ["Sandbox", "Workloads", "Workloads"]
+    assert client.stub.request_counts["GET raw file"] == reads + 1
+
+
+def test_interrupted_refresh_keeps_fetched_batches(client, monkeypatch):
+    """Test a refresh failing midway resumes from the last completed batch"""
+    for i in range(4):
+        _create(client, f"account{i}")
+    catalog = AccountCatalog(client.tree_index, fetch_concurrency=2)
+    read = catalog._read
+
+    def dropping_read(path, blob_id, head_sha):
+        if "account3" in path:
+            raise ConnectionError("connection dropped")
+        return read(path, blob_id, head_sha)
+
+    monkeypatch.setattr(catalog, "_read", dropping_read)
+    with pytest.raises(ConnectionError):
+        catalog.refresh()
+    reads = client.stub.request_counts["GET raw blob"]
+    monkeypatch.setattr(catalog, "_read", read)
+    accounts, _ = catalog.list()
+
+    assert [a["account_name"] for a in accounts] == [f"account{i}" for i in range(4)]
+    # Only the failed batch is fetched again
+    assert client.stub.request_counts["GET raw blob"] == reads + 2
+
+
+def test_get_account_supports_conditional_requests(client, monkeypatch):
+    """Test the ETag of an unchanged account yields 304"""
+    _create(client, "testaccount")
+    catalog = AccountCatalog(client.tree_index)
+    monkeypatch.setattr(account_handlers, "get_account_catalog", lambda: catalog)
+    event = {"pathParameters": {"accountName": "testaccount"}, "headers": {}}
+
+    first = account_handlers.get_account_handler(event, LambdaContext())
+    event["headers"]["if-none-match"] = first["headers"]["ETag"]
+    second = account_handlers.get_account_handler(event, LambdaContext())
+    missing = account_handlers.get_account_handler(
+        {"pathParameters": {"accountName": "missing"}}, LambdaContext()
+    )
+
+    assert first["statusCode"] == 200
+    assert json.loads(first["body"])["email"] == "testaccount@example.com"
+    assert second["statusCode"] == 304
+    assert second["body"] == ""
+    assert missing["statusCode"] == 404
@@ -0,0 +1,104 @@
+import json
+import shutil
+
+import pytest
+
+from models.account import AccountConfigFile
+from tools.gitlab_stub.repository import REF_MOVED
+from tools.gitlab_stub.server import GitLabStub
+from utils.gitlab_client import AccountNotFoundError, GitLabClient
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(
+        shutil.which("git") is None, reason="git is required for the GitLab stand-in"
+    ),
+]
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    with GitLabStub(str(tmp_path / "repo.git"), token="stub-token") as stub:
+        monkeypatch.setenv("GITLAB_URL", stub.url)
+        monkeypatch.setenv("GITLAB_TOKEN", "stub-token")
+        monkeypatch.setenv("GITLAB_PROJECT_ID", "aft/account-requests")
+        monkeypatch.setenv("GITLAB_COMMIT_RETRY_DELAY", "0")
+        yield stub
+
+
+def _request_file(content):
+    return AccountConfigFile(
+        file_path="aft-account-request/testaccount/request.json", content=json.dumps(content)
+    )
+
+
+def test_account_lifecycle_against_stub(stub):
+    """Test create, update, no-op and delete commits against a real git repository"""
+    client = GitLabClient()
+
+    created = client.commit_config_files([_request_file({"ou": "Sandbox"})], "Create account")
+    updated = client.commit_config_files([_request_file({"ou": "Workloads"})], "Update account")
+    unchanged = client.commit_config_files([_request_file({"ou": "Workloads"})], "Update account")
+
+    assert created.commit_sha != updated.commit_sha
+    assert unchanged.no_change is True
+    assert unchanged.commit_sha == updated.commit_sha
+    content = stub.repository.read_file("main", "aft-account-request/testaccount/request.json")
+    assert json.loads(content) == {"ou": "Workloads"}
+
+    client.delete_account_config("testaccount", "Delete account")
+    assert stub.repository.tree("main", recursive=True) == []
+    with pytest.raises(AccountNotFoundError):
+        client.delete_account_config("testaccount", "Delete account")
+
+
+def test_injected_conflict_is_retried(stub):
+    """Test a scripted branch conflict is retried deterministically"""
+    client = GitLabClient()
+
+    # Build the tree index first so the scripted fault hits the commit
+    client.tree_index.refresh()
+    stub.faults.fail_next(400, REF_MOVED.format(branch="main"))
+    client.commit_config_files([_request_file({"ou": "Sandbox"})], "Create account")
+
+    assert client.stats.conflicts == 1
+    assert client.stats.commits == 1
+    assert stub.request_counts["POST commits"] == 2
+
+
+def test_update_of_file_changed_before_head(stub):
+    """Test a fresh client updates a file whose last commit is older than the branch head"""
+    GitLabClient().commit_config_files([_request_file({"ou": "Sandbox"})], "Create account")
+    other = AccountConfigFile(
+        file_path="aft-account-request/otheraccount/request.json", content="{}"
+    )
+    GitLabClient().commit_config_files([other], "Create account")
+
+    client = GitLabClient()
+    client.commit_config_files([_request_file({"ou": "Workloads"})], "Update account")
+
+    content = stub.repository.read_file("main", "aft-account-request/testaccount/request.json")
+    assert json.loads(content) == {"ou": "Workloads"}
+    assert client.stats.conflicts == 0
+
+
+def test_commit_landed_before_the_connection_dropped_is_found(stub):
+    """Test the stub lists new commits in compare results, as the lost-response check needs"""
+    client = GitLabClient()
+    base_sha = stub.repository.head("main")
+    created = client.commit_config_files([_request_file({"ou": "Sandbox"})], "Create account")
+    action = {
+        "action": "create",
+        "file_path": "aft-account-request/testaccount/request.json",
+        "content": json.dumps({"ou": "Sandbox"}),
+    }
+
+    landed = client._landed_commit(base_sha, "Create account", [action])
+    # Same message, other content: a concurrent writer's commit, not ours
+    other = client._landed_commit(
+        base_sha, "Create account", [{**action, "content": json.dumps({"ou": "Workloads"})}]
+    )
+
+    assert landed.id == created.commit_sha
+    assert landed.parent_ids == [base_sha]
+    assert other is None
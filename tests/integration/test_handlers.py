@@ -3,8 +3,11 @@ import os
 import pytest
 from unittest.mock import patch
 
+from handlers import account_handlers
 from handlers.account_handlers import create_account_handler
+from models.account import CommitResult
 from tests.fixtures.account_requests import VALID_CREATE_REQUEST
+from tests.fixtures.lambda_context import LambdaContext
 
 
 class MockContext:
@@ -19,7 +22,7 @@ def test_create_account_handler_success(mock_gitlab_client):
     """Test successful account creation handler execution"""
     # Setup mock GitLab client
     mock_instance = mock_gitlab_client.return_value
-    mock_instance.commit_config_files.return_value = "abc123"
+    mock_instance.commit_config_files.return_value = CommitResult(commit_sha="abc123")
     
     # Create test event
     event = {
@@ -50,5 +53,26 @@ def test_create_account_handler_invalid_input():
     response = create_account_handler(event, MockContext())
     
     # Verify error response
-    assert response["statusCode"] == 500
-    assert "error" in json.loads(response["body"]) 
\ No newline at end of file
+    assert response["statusCode"] == 400
+    assert "error" in json.loads(response["body"]) 
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("handler_name,event", [
+    ("delete_account_handler", {"pathParameters": {"accountName": "a/.."}}),
+    ("delete_account_handler", {"body": json.dumps({"account_name": "foo/bar"})}),
+    ("upgrade_account_handler", {
+        "pathParameters": {"accountName": "foo/bar"}, "body": json.dumps({"targetTier": "gold"})
+    }),
+    ("remove_option_handler", {
+        "pathParameters": {"accountName": "test", "optionName": "../request"}
+    }),
+    ("get_account_handler", {"pathParameters": {"accountName": "a/.."}}),
+])
+def test_path_like_names_are_rejected(handler_name, event):
+    """Test names that would escape the account directory are rejected before touching GitLab"""
+    with patch.object(account_handlers, "get_gitlab_client") as get_gitlab_client:
+        response = getattr(account_handlers, handler_name)(event, LambdaContext())
+
+    assert response["statusCode"] == 400
+    get_gitlab_client.assert_not_called()
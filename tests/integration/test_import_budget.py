@@ -0,0 +1,34 @@
+import functools
+
+import pytest
+
+from tools.import_budget import ImportProfile, check, load_budgets, measure
+
+pytestmark = pytest.mark.integration
+
+BUDGETS = load_budgets()
+
+
+@functools.lru_cache(maxsize=None)
+def _profile(module: str) -> ImportProfile:
+    return measure(module)
+
+
+@pytest.mark.parametrize("handler", sorted(BUDGETS))
+def test_handler_within_import_budget(handler):
+    """Test each Lambda entry point avoids its forbidden packages and stays within its budget"""
+    module = handler.rsplit(".", 1)[0]
+    violations = check(handler, BUDGETS[handler], _profile(module))
+    if any("budget" in violation for violation in violations):
+        # Timings are noisy, so confirm an over-budget result with a fresh measurement
+        violations = check(handler, BUDGETS[handler], measure(module))
+    assert violations == []
+
+
+def test_budgets_cover_every_handler_module():
+    """Test the budgets name handlers that exist"""
+    import importlib
+
+    for handler in BUDGETS:
+        module, function = handler.rsplit(".", 1)
+        assert callable(getattr(importlib.import_module(module), function))
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from handlers import account_handlers
+from models.account import CommitResult
+from tests.fixtures.lambda_context import LambdaContext
+from utils.account_lock import (
+    AccountLockedError,
+    InMemoryAccountLockStore,
+    SQLiteAccountLockStore,
+    account_locks,
+    set_account_lock_store,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = InMemoryAccountLockStore() if request.param == "memory" else SQLiteAccountLockStore(
+        str(tmp_path / "locks.sqlite3")
+    )
+    set_account_lock_store(store)
+    yield store
+    set_account_lock_store(None)
+
+
+def test_lease_is_exclusive_until_released(store):
+    """Test only one owner holds an account at a time"""
+    assert store.acquire("acme", "first", 60)
+    assert not store.acquire("acme", "second", 60)
+    
+    store.release("acme", "second")
+    assert not store.acquire("acme", "second", 60)
+    
+    store.release("acme", "first")
+    assert store.acquire("acme", "second", 60)
+
+
+def test_expired_lease_is_taken_over(store):
+    """Test a lease left by a dead holder frees the account once it expires"""
+    assert store.acquire("acme", "first", 0)
+    
+    assert store.acquire("acme", "second", 60)
+
+
+def test_other_accounts_are_not_blocked(store):
+    """Test a held account does not block operations on other accounts"""
+    with account_locks(["acme"]):
+        with account_locks(["globex"], wait=0):
+            pass
+
+
+def test_busy_account_is_rejected_after_waiting(store):
+    """Test a request gives up with AccountLockedError once the wait runs out"""
+    with account_locks(["acme"]):
+        start = time.monotonic()
+        with pytest.raises(AccountLockedError):
+            with account_locks(["acme"], wait=0.2):
+                pass
+        assert time.monotonic() - start >= 0.2
+
+
+def test_waiting_request_runs_once_the_account_is_free(store):
+    """Test a request queues briefly for an account released by the holder"""
+    acquired = threading.Event()
+    
+    def hold():
+        with account_locks(["acme"]):
+            acquired.set()
+            time.sleep(0.2)
+    
+    holder = threading.Thread(target=hold)
+    holder.start()
+    acquired.wait()
+    with account_locks(["acme"], wait=5):
+        pass
+    holder.join()
+
+
+@pytest.fixture
+def gitlab_client(monkeypatch):
+    client = MagicMock()
+    client.commit_config_files.return_value = CommitResult(commit_sha="abc123")
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    return client
+
+
+def test_concurrent_operation_on_account_is_409(store, gitlab_client, monkeypatch):
+    """Test a handler answers 409 with Retry-After while the account is busy"""
+    monkeypatch.setattr("utils.account_lock.ACCOUNT_LOCK_WAIT", 0)
+    event = {"pathParameters": {"accountName": "acme"}, "body": json.dumps({"targetTier": "gold"})}
+    
+    with account_locks(["acme"]):
+        response = account_handlers.upgrade_account_handler(event, LambdaContext())
+    
+    assert response["statusCode"] == 409
+    assert response["headers"]["Retry-After"] == "1"
+    gitlab_client.commit_config_files.assert_not_called()
+    
+    response = account_handlers.downgrade_account_handler(event, LambdaContext())
+    assert response["statusCode"] == 202
@@ -0,0 +1,85 @@
+import base64
+import json
+from typing import Dict, List
+
+import pytest
+
+from handlers import account_handlers
+from models.account import AccountRequest, TierChangeRequest
+from tests.fixtures.lambda_context import LambdaContext
+from utils.api import BadRequestError, error_response, parse_body, path_parameter, read_body
+
+ACCOUNT = {
+    "account_name": "apitest", "email": "apitest@example.com", "organizational_unit": "Sandbox"
+}
+
+
+def test_body_is_validated_straight_from_json():
+    """Test the raw body is parsed into the model in one step"""
+    request = parse_body({"body": json.dumps(ACCOUNT)}, AccountRequest)
+    
+    assert isinstance(request, AccountRequest)
+    assert request.account_name == "apitest"
+
+
+def test_base64_body_is_decoded():
+    """Test bodies API Gateway delivers base64 encoded are decoded first"""
+    body = base64.b64encode(json.dumps(ACCOUNT).encode()).decode()
+    event = {"body": body, "isBase64Encoded": True}
+    
+    assert parse_body(event, AccountRequest).email == "apitest@example.com"
+
+
+def test_invalid_base64_body_is_rejected():
+    """Test a body that is not base64 is a bad request"""
+    with pytest.raises(BadRequestError):
+        read_body({"body": "not base64!", "isBase64Encoded": True})
+
+
+def test_aliases_and_plain_types_are_supported():
+    """Test camelCase API fields and non-model types validate through the same path"""
+    assert parse_body({"body": '{"targetTier": "gold"}'}, TierChangeRequest).target_tier == "gold"
+    assert parse_body({"body": '[{"a": 1}]'}, List[Dict[str, int]]) == [{"a": 1}]
+
+
+@pytest.mark.parametrize("body", ["{not json", '{"account_name": "apitest"}', "[]", None])
+def test_malformed_bodies_raise_bad_request(body):
+    """Test invalid JSON and schema mismatches both become BadRequestError with details"""
+    with pytest.raises(BadRequestError) as excinfo:
+        parse_body({"body": body}, AccountRequest)
+    
+    assert excinfo.value.details
+
+
+def test_missing_path_parameter_is_bad_request():
+    """Test a missing path parameter names the parameter"""
+    with pytest.raises(BadRequestError, match="accountName is required"):
+        path_parameter({"pathParameters": None}, "accountName")
+
+
+def test_error_envelope():
+    """Test errors share one envelope and extra headers are kept"""
+    response = error_response(429, "Slow down", headers={"Retry-After": "1"})
+    
+    assert response["headers"] == {"Content-Type": "application/json", "Retry-After": "1"}
+    assert json.loads(response["body"]) == {"error": "Slow down"}
+
+
+@pytest.mark.parametrize("handler, event", [
+    (account_handlers.create_account_handler, {"body": "{not json"}),
+    (account_handlers.update_account_handler, {"body": json.dumps({"account_name": "apitest"})}),
+    (account_handlers.delete_account_handler, {"body": "{}"}),
+    (account_handlers.upgrade_account_handler, {
+        "pathParameters": {"accountName": "apitest"}, "body": "{}"
+    }),
+    (account_handlers.add_option_handler, {
+        "pathParameters": {"accountName": "apitest"}, "body": "[1]"
+    }),
+    (account_handlers.remove_option_handler, {"pathParameters": {"accountName": "apitest"}}),
+])
+def test_handlers_reject_malformed_input_with_400(handler, event):
+    """Test every write handler answers malformed input with 400 instead of 500"""
+    response = handler(event, LambdaContext())
+    
+    assert response["statusCode"] == 400
+    assert "error" in json.loads(response["body"])
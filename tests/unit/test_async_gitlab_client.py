@@ -0,0 +1,298 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from models.account import AccountConfigFile
+from utils.async_gitlab_client import AsyncGitLabClient
+from utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    InMemoryBreakerStateStore,
+    set_circuit_breaker,
+)
+from utils.rate_limiter import InMemoryTokenBucket, RateLimitedError, set_token_bucket
+from utils.repository_index import git_blob_sha
+
+
+@pytest.fixture(autouse=True)
+def gitlab_env(monkeypatch):
+    monkeypatch.setenv("GITLAB_URL", "https://gitlab.example.com")
+    monkeypatch.setenv("GITLAB_TOKEN", "token")
+    monkeypatch.setenv("GITLAB_PROJECT_ID", "42")
+    monkeypatch.setenv("GITLAB_COMMIT_RETRY_DELAY", "0")
+
+
+@pytest.fixture(autouse=True)
+def gitlab_guards():
+    # Fresh shared bucket and breaker per test, roomy enough not to get in the way
+    bucket = InMemoryTokenBucket(rate=1000, capacity=1000)
+    breaker = CircuitBreaker(InMemoryBreakerStateStore(), sync_interval=0)
+    set_token_bucket(bucket)
+    set_circuit_breaker(breaker)
+    yield bucket, breaker
+    set_token_bucket(None)
+    set_circuit_breaker(None)
+
+
+class FakeGitLab:
+    """Minimal commits/tree/branches/files API served through httpx.MockTransport"""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+        self.head = "head0"
+        self.last_commits = {file_path: "head0" for file_path in self.files}
+        self.commits = []
+        self.changed = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.responses = []
+
+    async def handler(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.responses:
+                return self.responses.pop(0)
+            return self._route(request)
+        finally:
+            self.in_flight -= 1
+
+    def _route(self, request):
+        path = request.url.path
+        if path.endswith("/repository/branches/main"):
+            return httpx.Response(200, json={"commit": {"id": self.head}})
+        if path.endswith("/repository/tree"):
+            prefix = request.url.params["path"] + "/"
+            items = [
+                {"id": git_blob_sha(content), "path": file_path, "type": "blob"}
+                for file_path, content in self.files.items()
+                if file_path.startswith(prefix)
+            ]
+            return httpx.Response(200, json=items)
+        if path.endswith("/repository/compare"):
+            heads = list(self.changed)
+            base = request.url.params["from"]
+            since = heads[heads.index(base) + 1:] if base in heads else heads
+            diffs = [
+                {"old_path": file_path, "new_path": file_path}
+                for head in since
+                for file_path in self.changed[head]
+            ]
+            return httpx.Response(200, json={"diffs": diffs, "compare_timeout": False})
+        if request.method == "HEAD" and "/repository/files/" in path:
+            file_path = path.split("/repository/files/", 1)[1]
+            if file_path not in self.files:
+                return httpx.Response(404)
+            headers = {"X-Gitlab-Last-Commit-Id": self.last_commits[file_path]}
+            return httpx.Response(200, headers=headers)
+        if path.endswith("/repository/commits"):
+            payload = json.loads(request.content)
+            for action in payload["actions"]:
+                # GitLab requires the pin to be exactly the file's last commit
+                pin = action.get("last_commit_id")
+                if pin and pin != self.last_commits.get(action["file_path"]):
+                    return httpx.Response(
+                        400, json={"message": "The file has changed since you started editing it"}
+                    )
+            parent = self.head
+            self.head = f"head{len(self.commits) + 1}"
+            self.commits.append(payload)
+            self.changed[self.head] = [action["file_path"] for action in payload["actions"]]
+            for action in payload["actions"]:
+                if action["action"] == "delete":
+                    self.files.pop(action["file_path"], None)
+                    self.last_commits.pop(action["file_path"], None)
+                else:
+                    self.files[action["file_path"]] = action["content"]
+                    self.last_commits[action["file_path"]] = self.head
+            return httpx.Response(201, json={"id": self.head, "parent_ids": [parent]})
+        return httpx.Response(404, json={"message": "404 Not Found"})
+
+    def push(self, file_path, content):
+        """Commit a change made by someone else"""
+        self.head = f"head{len(self.commits) + 1}"
+        self.commits.append({"actions": [{"action": "update", "file_path": file_path}]})
+        self.changed[self.head] = [file_path]
+        self.files[file_path] = content
+        self.last_commits[file_path] = self.head
+
+
+def _files(name, content="{}"):
+    return [
+        AccountConfigFile(file_path=f"aft-account-request/{name}/request.json", content=content)
+    ]
+
+
+def _run(fake, coro_factory, **kwargs):
+    async def main():
+        transport = httpx.MockTransport(fake.handler)
+        async with AsyncGitLabClient(transport=transport, **kwargs) as client:
+            return await coro_factory(client)
+    return asyncio.run(main())
+
+
+def test_commit_many_is_bounded():
+    """Test fan-out commits never exceed the concurrency bound"""
+    fake = FakeGitLab()
+    operations = [(_files(f"acct{i}"), f"Create account: acct{i}") for i in range(10)]
+
+    results = _run(fake, lambda client: client.commit_many(operations), max_concurrency=3)
+
+    assert all(not isinstance(result, Exception) for result in results)
+    assert len(fake.commits) == 10
+    assert fake.max_in_flight <= 3
+
+
+def test_unchanged_files_are_skipped():
+    """Test identical content does not produce a commit"""
+    fake = FakeGitLab({"aft-account-request/acct/request.json": "{}"})
+
+    result = _run(fake, lambda client: client.commit_config_files(_files("acct"), "Update"))
+
+    assert result.no_change is True
+    assert fake.commits == []
+
+
+def test_retry_after_is_honoured():
+    """Test a 429 is retried once GitLab's Retry-After has elapsed"""
+    fake = FakeGitLab()
+    fake.responses.append(_too_many_requests())
+
+    result = _run(fake, lambda client: client.commit_config_files(_files("acct"), "Create"))
+
+    assert result.commit_sha == "head1"
+
+
+def _too_many_requests():
+    return httpx.Response(429, headers={"Retry-After": "0"}, json={"message": "429"})
+
+
+def test_rate_limit_is_raised_after_all_retries(monkeypatch):
+    """Test a 429 that outlasts the retries is raised instead of returned as a response"""
+    monkeypatch.setenv("GITLAB_COMMIT_MAX_RETRIES", "1")
+    fake = FakeGitLab()
+    fake.responses.extend([_too_many_requests(), _too_many_requests()])
+
+    with pytest.raises(RateLimitedError):
+        _run(fake, lambda client: client.commit_config_files(_files("acct"), "Create"))
+
+    assert fake.commits == []
+
+
+def test_requests_take_tokens_from_the_shared_bucket():
+    """Test the async client is throttled by the same bucket as the sync client"""
+    # One token, and the next one is not expected within the wait
+    set_token_bucket(InMemoryTokenBucket(rate=0.1, capacity=1))
+    fake = FakeGitLab()
+
+    with pytest.raises(RateLimitedError) as excinfo:
+        _run(fake, lambda client: client.commit_config_files(_files("acct"), "Create"))
+
+    assert excinfo.value.retry_after == 10
+    assert fake.commits == []
+
+
+def test_open_breaker_fails_fast(gitlab_guards):
+    """Test no request is sent while the shared circuit breaker is open"""
+    _, breaker = gitlab_guards
+    for _ in range(breaker.failure_threshold):
+        breaker.record(succeeded=False, duration=0)
+    fake = FakeGitLab()
+
+    with pytest.raises(CircuitOpenError):
+        _run(fake, lambda client: client.commit_config_files(_files("acct"), "Create"))
+
+    assert fake.max_in_flight == 0
+
+
+def test_server_errors_are_reported_to_the_breaker(gitlab_guards):
+    """Test 5xx responses count as GitLab failures"""
+    _, breaker = gitlab_guards
+    fake = FakeGitLab()
+    fake.responses.append(httpx.Response(502, json={"message": "502 Bad Gateway"}))
+
+    with pytest.raises(Exception):
+        _run(fake, lambda client: client.commit_config_files(_files("acct"), "Create"))
+
+    assert breaker.store.get()["failures"] == 1
+
+
+def test_delete_account_config_removes_subtree():
+    """Test deletion removes every file of the account in one commit"""
+    fake = FakeGitLab({
+        "aft-account-request/acct/request.json": "{}",
+        "aft-account-request/acct/options/backup.json": "{}",
+        "aft-account-request/other/request.json": "{}",
+    })
+
+    _run(fake, lambda client: client.delete_account_config("acct", "Delete account: acct"))
+
+    assert len(fake.commits) == 1
+    assert list(fake.files) == ["aft-account-request/other/request.json"]
+
+
+def test_update_of_file_changed_before_head_is_pinned_to_its_commit():
+    """Test updates are pinned to the file's own last commit when the branch moved on"""
+    fake = FakeGitLab({"aft-account-request/acct/request.json": "{}"})
+    fake.files["aft-account-request/other/request.json"] = "{}"
+    fake.last_commits["aft-account-request/other/request.json"] = fake.head = "head9"
+
+    files = _files("acct", '{"a": 1}')
+    result = _run(fake, lambda client: client.commit_config_files(files, "Update"))
+
+    assert result.no_change is False
+    assert fake.commits[0]["actions"][0]["last_commit_id"] == "head0"
+
+
+def test_client_is_reusable_across_event_loops():
+    """Test a client created outside any loop works from successive asyncio.run calls"""
+    fake = FakeGitLab()
+    client = AsyncGitLabClient(transport=httpx.MockTransport(fake.handler), max_concurrency=1)
+
+    for run in range(2):
+        operations = [(_files(f"acct{run}{i}"), "Create") for i in range(3)]
+        results = asyncio.run(client.commit_many(operations))
+        assert all(not isinstance(result, Exception) for result in results)
+
+    assert len(fake.commits) == 6
+    asyncio.run(client.aclose())
+
+
+def test_cached_tree_follows_changes_made_by_others():
+    """Test the tree index follows the compare diff instead of being cached forever"""
+    fake = FakeGitLab()
+
+    async def scenario(client):
+        await client.commit_config_files(_files("acct", '{"a": 1}'), "Create")
+        fake.push("aft-account-request/acct/request.json", '{"a": 2}')
+        # Same content as our own last write, but someone changed the file since
+        return await client.commit_config_files(_files("acct", '{"a": 1}'), "Update")
+
+    result = _run(fake, scenario)
+
+    assert result.no_change is False
+    assert fake.files["aft-account-request/acct/request.json"] == '{"a": 1}'
+    assert fake.commits[-1]["actions"][0]["last_commit_id"] == "head2"
+
+
+def test_file_matching_a_partly_stale_index_is_still_written():
+    """Test a file left out against a stale index is checked at the current head"""
+    fake = FakeGitLab()
+    files = _files("acct", '{"a": 1}') + _files("other", '{"b": 1}')
+
+    async def scenario(client):
+        await client.commit_config_files(files, "Create")
+        fake.push("aft-account-request/acct/request.json", '{"a": 2}')
+        # Within the TTL: the index still holds our own write of acct
+        return await client.commit_config_files(
+            _files("acct", '{"a": 1}') + _files("other", '{"b": 2}'), "Update"
+        )
+
+    result = _run(fake, scenario)
+
+    assert result.no_change is False
+    assert fake.files["aft-account-request/acct/request.json"] == '{"a": 1}'
+    assert fake.files["aft-account-request/other/request.json"] == '{"b": 2}'
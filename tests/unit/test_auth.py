@@ -0,0 +1,122 @@
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+from utils import auth
+from utils.auth import AuthError, JWKSCache
+
+
+def _make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_jwk = jwk.construct(pem, algorithm="RS256").public_key().to_dict()
+    public_jwk.update({"kid": kid, "use": "sig"})
+    return pem, public_jwk
+
+
+def _jwks_response(*public_jwks):
+    response = MagicMock()
+    response.json.return_value = {"keys": list(public_jwks)}
+    return response
+
+
+def _sign(pem, kid, **claims):
+    payload = {
+        "sub": "user-1",
+        "aud": auth.APP_CLIENT_ID,
+        "iss": f"https://cognito-idp.{auth.AWS_REGION}.amazonaws.com/{auth.USER_POOL_ID}",
+        "exp": int(time.time()) + 300,
+    }
+    payload.update(claims)
+    return jwt.encode(payload, pem, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def signing_key():
+    return _make_key("kid-1")
+
+
+@pytest.fixture
+def jwks_cache(monkeypatch):
+    cache = JWKSCache("https://example.com/jwks.json", ttl=3600, min_refresh_interval=0)
+    monkeypatch.setattr(auth, "_jwks_cache", cache)
+    monkeypatch.setattr(auth, "APP_CLIENT_ID", "test-client")
+    return cache
+
+
+def test_validate_token_fetches_jwks_once(signing_key, jwks_cache):
+    """Test the JWKS is fetched once and reused across validations"""
+    pem, public_jwk = signing_key
+    token = _sign(pem, "kid-1")
+
+    with patch("utils.auth.requests.get", return_value=_jwks_response(public_jwk)) as mock_get:
+        for _ in range(3):
+            claims = auth.validate_token(token)
+            assert claims["sub"] == "user-1"
+
+    assert mock_get.call_count == 1
+
+
+def test_unknown_kid_triggers_single_refresh(signing_key, jwks_cache):
+    """Test a rotated key is picked up by refreshing on a kid miss"""
+    pem, public_jwk = signing_key
+    rotated_pem, rotated_jwk = _make_key("kid-2")
+
+    responses = [_jwks_response(public_jwk), _jwks_response(public_jwk, rotated_jwk)]
+    with patch("utils.auth.requests.get", side_effect=responses) as mock_get:
+        auth.validate_token(_sign(pem, "kid-1"))
+        claims = auth.validate_token(_sign(rotated_pem, "kid-2"))
+
+    assert claims["sub"] == "user-1"
+    assert mock_get.call_count == 2
+
+
+def test_unknown_kid_rejected_after_refresh(signing_key, jwks_cache):
+    """Test a kid Cognito does not know is rejected"""
+    pem, public_jwk = signing_key
+
+    with patch("utils.auth.requests.get", return_value=_jwks_response(public_jwk)):
+        with pytest.raises(AuthError) as exc_info:
+            auth.validate_token(_sign(pem, "unknown"))
+
+    assert exc_info.value.status_code == 401
+
+
+def test_failed_refresh_serves_stale_keys_and_backs_off(signing_key, jwks_cache):
+    """Test a Cognito outage does not turn every call into another JWKS fetch"""
+    pem, public_jwk = signing_key
+    token = _sign(pem, "kid-1")
+    with patch("utils.auth.requests.get", return_value=_jwks_response(public_jwk)):
+        auth.validate_token(token)
+    jwks_cache.min_refresh_interval = 60
+    # As if the keys had been fetched two hours ago
+    jwks_cache._fetched_at -= 7200
+    jwks_cache._attempted_at -= 7200
+
+    with patch("utils.auth.requests.get", side_effect=ConnectionError("timeout")) as mock_get:
+        for _ in range(3):
+            assert auth.validate_token(token)["sub"] == "user-1"
+
+    assert mock_get.call_count == 1
+
+
+def test_expired_cache_is_refreshed(signing_key, jwks_cache):
+    """Test keys are fetched again once the TTL has elapsed"""
+    pem, public_jwk = signing_key
+    jwks_cache.ttl = 0
+    token = _sign(pem, "kid-1")
+
+    with patch("utils.auth.requests.get", return_value=_jwks_response(public_jwk)) as mock_get:
+        auth.validate_token(token)
+        time.sleep(0.01)
+        auth.validate_token(token)
+
+    assert mock_get.call_count == 2
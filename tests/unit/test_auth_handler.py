@@ -0,0 +1,119 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+from handlers import auth_handler
+from handlers.auth_handler import DecisionCache, lambda_authorizer
+
+
+class MockContext:
+    function_name = "test-authorizer"
+    memory_limit_in_mb = 128
+    invoked_function_arn = "arn:aws:lambda:eu-west-1:123456789012:function:test-authorizer"
+    aws_request_id = "test-request-id"
+
+
+def _event(method="POST", token="token-1"):
+    return {
+        "methodArn": "arn:aws:execute-api:eu-west-1:123456789012:api/$default/POST/accounts",
+        "headers": {"Authorization": f"Bearer {token}"},
+        "requestContext": {"http": {"method": method}},
+    }
+
+
+def _claims(groups, exp_in=300):
+    return {
+        "sub": "user-1",
+        "email": "user@example.com",
+        "cognito:groups": groups,
+        "exp": int(time.time()) + exp_in,
+    }
+
+
+@pytest.fixture(autouse=True)
+def decision_cache(monkeypatch):
+    cache = DecisionCache(max_size=2)
+    monkeypatch.setattr(auth_handler, "_decision_cache", cache)
+    return cache
+
+
+def test_repeated_token_is_verified_once(decision_cache):
+    """Test a repeated token reuses the cached decision"""
+    claims = _claims(["Administrators"])
+    with patch("handlers.auth_handler.validate_token", return_value=claims) as mock_validate:
+        for _ in range(3):
+            policy = lambda_authorizer(_event(), MockContext())
+            assert policy["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+
+    assert mock_validate.call_count == 1
+    assert decision_cache.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+
+def test_decision_is_cached_per_method(decision_cache):
+    """Test a read-only user is still denied writes after a cached read"""
+    with patch("handlers.auth_handler.validate_token", return_value=_claims(["Readers"])):
+        read_policy = lambda_authorizer(_event(method="GET"), MockContext())
+        write_policy = lambda_authorizer(_event(method="POST"), MockContext())
+
+    assert read_policy["policyDocument"]["Statement"][0]["Effect"] == "Allow"
+    assert write_policy["policyDocument"]["Statement"][0]["Effect"] == "Deny"
+
+
+def test_expired_decision_is_not_reused(decision_cache):
+    """Test entries expire at the token exp claim"""
+    key = DecisionCache.make_key("token-1", "POST")
+    decision_cache.put(key, {"effect": "Allow"}, time.time() - 1)
+
+    assert decision_cache.get(key) is None
+
+
+def test_cache_evicts_least_recently_used(decision_cache):
+    """Test the cache stays within its size bound"""
+    expires_at = time.time() + 300
+    for token in ("a", "b", "c"):
+        decision_cache.put(DecisionCache.make_key(token, "GET"), {"effect": "Allow"}, expires_at)
+
+    assert decision_cache.get(DecisionCache.make_key("a", "GET")) is None
+    assert decision_cache.get(DecisionCache.make_key("c", "GET")) is not None
+
+
+def _v2_event(method="POST", token="token-1"):
+    return {
+        "version": "2.0",
+        "type": "REQUEST",
+        "routeArn": "arn:aws:execute-api:eu-west-1:123456789012:api/$default/POST/accounts",
+        "identitySource": [f"Bearer {token}", method],
+        "headers": {"authorization": f"Bearer {token}"},
+        "requestContext": {"http": {"method": method}},
+    }
+
+
+def test_payload_v2_returns_simple_response():
+    """Test payload format 2.0 events get a simple response"""
+    with patch("handlers.auth_handler.validate_token", return_value=_claims(["Administrators"])):
+        response = lambda_authorizer(_v2_event(), MockContext())
+
+    assert response["isAuthorized"] is True
+    assert response["context"]["email"] == "user@example.com"
+    assert "policyDocument" not in response
+
+
+def test_payload_v2_denies_with_simple_response():
+    """Test invalid tokens are denied with a simple response"""
+    event = _v2_event()
+    event["headers"] = {}
+
+    response = lambda_authorizer(event, MockContext())
+
+    assert response == {"isAuthorized": False}
+
+
+def test_policy_mode_overrides_payload_version(monkeypatch):
+    """Test the response mode can force IAM policies"""
+    monkeypatch.setattr(auth_handler, "AUTHORIZER_RESPONSE_MODE", "policy")
+
+    with patch("handlers.auth_handler.validate_token", return_value=_claims(["Administrators"])):
+        response = lambda_authorizer(_v2_event(), MockContext())
+
+    assert response["policyDocument"]["Statement"][0]["Effect"] == "Allow"
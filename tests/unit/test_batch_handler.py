@@ -0,0 +1,77 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from handlers import account_handlers
+from models.account import CommitResult
+from tests.fixtures.lambda_context import LambdaContext
+
+
+def _account(name):
+    return {"account_name": name, "email": f"{name}@example.com", "organizational_unit": "Sandbox"}
+
+
+@pytest.fixture
+def gitlab_client(monkeypatch):
+    client = MagicMock()
+    client.commit_config_files.return_value = CommitResult(commit_sha="abc123")
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    return client
+
+
+def test_batch_is_committed_once(gitlab_client):
+    """Test every valid account is pushed in a single commit"""
+    event = {"body": json.dumps([_account("one"), _account("two"), _account("three")])}
+
+    response = account_handlers.batch_create_accounts_handler(event, LambdaContext())
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 202
+    assert body["accepted"] == 3
+    assert body["commit_sha"] == "abc123"
+    gitlab_client.commit_config_files.assert_called_once()
+    files = gitlab_client.commit_config_files.call_args.kwargs["config_files"]
+    assert len(files) == 6
+
+
+def test_invalid_items_are_reported_per_item(gitlab_client):
+    """Test invalid and duplicate items are rejected without failing the batch"""
+    lines = [
+        json.dumps(_account("one")),
+        json.dumps({"account_name": "two"}),
+        "not json",
+        json.dumps(_account("one")),
+    ]
+    event = {"body": "\n".join(lines)}
+
+    response = account_handlers.batch_create_accounts_handler(event, LambdaContext())
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 202
+    statuses = [item["status"] for item in body["items"]]
+    assert statuses == ["accepted", "rejected", "rejected", "rejected"]
+    assert "Duplicate" in body["items"][3]["error"]
+    files = gitlab_client.commit_config_files.call_args.kwargs["config_files"]
+    assert {f.file_path.split("/")[1] for f in files} == {"one"}
+
+
+def test_batch_without_valid_items_is_not_committed(gitlab_client):
+    """Test nothing is committed when every item is invalid"""
+    event = {"body": json.dumps([{"account_name": "bad-name!"}])}
+
+    response = account_handlers.batch_create_accounts_handler(event, LambdaContext())
+
+    assert response["statusCode"] == 400
+    gitlab_client.commit_config_files.assert_not_called()
+
+
+def test_oversized_batch_is_rejected(gitlab_client, monkeypatch):
+    """Test batches above the size limit are refused"""
+    monkeypatch.setattr(account_handlers, "ACCOUNT_BATCH_MAX_ITEMS", 2)
+    event = {"body": json.dumps([_account(f"account{i}") for i in range(3)])}
+
+    response = account_handlers.batch_create_accounts_handler(event, LambdaContext())
+
+    assert response["statusCode"] == 413
+    gitlab_client.commit_config_files.assert_not_called()
@@ -0,0 +1,230 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from handlers import account_handlers, request_handlers
+from models.account import AccountConfigFile, CommitResult
+from tests.fixtures.lambda_context import LambdaContext
+from utils import gitlab_client as gitlab_client_module
+from utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    InMemoryBreakerStateStore,
+)
+from utils.gitlab_client import GitLabClient
+from utils.gitlab_transport import gitlab_adapter
+from utils.rate_limiter import InMemoryTokenBucket
+from utils.request_queue import get_request_queue, get_request_status_store, reset_request_queue
+
+
+def _breaker(**kwargs):
+    options = {"failure_threshold": 3, "slow_call": 1, "open_seconds": 0.05, "sync_interval": 0}
+    options.update(kwargs)
+    return CircuitBreaker(InMemoryBreakerStateStore(), **options)
+
+
+def _open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record(succeeded=False, duration=0)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    """Test the breaker trips at the threshold and a success resets the count"""
+    breaker = _breaker()
+    breaker.record(succeeded=False, duration=0)
+    breaker.record(succeeded=False, duration=0)
+    breaker.record(succeeded=True, duration=0)
+    breaker.record(succeeded=False, duration=0)
+    assert breaker.state == CLOSED
+
+    breaker.record(succeeded=False, duration=0)
+    breaker.record(succeeded=False, duration=0)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 1
+
+
+def test_slow_calls_count_as_failures():
+    """Test calls over the latency threshold trip the breaker even when they succeed"""
+    breaker = _breaker()
+
+    for _ in range(3):
+        breaker.record(succeeded=True, duration=2)
+
+    assert breaker.state == OPEN
+
+
+def test_single_probe_closes_the_breaker():
+    """Test only one caller probes a half-open breaker and its success closes it"""
+    breaker = _breaker()
+    other_container = CircuitBreaker(breaker.store, open_seconds=0.05, sync_interval=0)
+    _open(breaker)
+    time.sleep(0.06)
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        other_container.before_call()
+
+    breaker.record(succeeded=True, duration=0)
+
+    assert breaker.state == CLOSED
+    other_container.before_call()
+
+
+def test_failed_probe_reopens_the_breaker():
+    """Test a failing probe sends the breaker back to open for another period"""
+    breaker = _breaker()
+    _open(breaker)
+    time.sleep(0.06)
+    breaker.before_call()
+
+    breaker.record(succeeded=False, duration=0)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_adapter_counts_server_errors_only():
+    """Test 5xx responses and connection errors trip the breaker but 4xx responses do not"""
+    breaker = _breaker()
+    adapter = gitlab_adapter(None, breaker)
+
+    with patch("requests.adapters.HTTPAdapter.send", return_value=MagicMock(status_code=404)):
+        for _ in range(5):
+            adapter.send(MagicMock())
+    assert breaker.state == CLOSED
+
+    with patch("requests.adapters.HTTPAdapter.send", return_value=MagicMock(status_code=502)):
+        adapter.send(MagicMock())
+        adapter.send(MagicMock())
+    with patch("requests.adapters.HTTPAdapter.send", side_effect=ConnectionError("reset")):
+        with pytest.raises(ConnectionError):
+            adapter.send(MagicMock())
+
+    assert breaker.state == OPEN
+
+
+def test_open_breaker_fails_fast_without_spending_tokens():
+    """Test an open breaker rejects calls before they take a token or reach GitLab"""
+    breaker = _breaker()
+    _open(breaker)
+    bucket = InMemoryTokenBucket(rate=0.01, capacity=1)
+    adapter = gitlab_adapter(bucket, breaker, wait=0)
+
+    with patch("requests.adapters.HTTPAdapter.send") as send:
+        with pytest.raises(CircuitOpenError):
+            adapter.send(MagicMock())
+
+    send.assert_not_called()
+    assert bucket.try_acquire() == 0.0
+
+
+def test_client_does_not_wrap_open_breaker(monkeypatch):
+    """Test the GitLab client lets the breaker error through for the handlers to report"""
+    monkeypatch.setenv("GITLAB_URL", "https://gitlab.example.com")
+    monkeypatch.setenv("GITLAB_TOKEN", "token")
+    monkeypatch.setenv("GITLAB_PROJECT_ID", "42")
+    with patch("utils.gitlab_client.gitlab.Gitlab"):
+        client = GitLabClient()
+    client.project.repository_tree.side_effect = CircuitOpenError(retry_after=7)
+
+    with pytest.raises(CircuitOpenError):
+        config_file = AccountConfigFile(
+            file_path="aft-account-request/test/request.json", content="{}"
+        )
+        client.commit_config_files([config_file], "msg")
+    with pytest.raises(CircuitOpenError):
+        client.delete_account_config("test", "msg")
+
+
+@pytest.fixture
+def unavailable_gitlab(monkeypatch):
+    client = MagicMock()
+    client.commit_config_files.side_effect = CircuitOpenError(retry_after=12)
+    client.delete_account_config.side_effect = CircuitOpenError(retry_after=12)
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    monkeypatch.setattr(gitlab_client_module, "get_gitlab_client", lambda: client)
+    reset_request_queue()
+    yield client
+    reset_request_queue()
+
+
+def _create_event(name):
+    return {"body": json.dumps({
+        "account_name": name, "email": f"{name}@example.com", "organizational_unit": "Sandbox"
+    })}
+
+
+def _sqs_event(messages):
+    return {"Records": [
+        {
+            "messageId": f"message-{i}",
+            "body": json.dumps(message),
+            "attributes": {"ApproximateReceiveCount": "1"},
+        }
+        for i, message in enumerate(messages)
+    ]}
+
+
+def test_handler_answers_503_while_gitlab_is_down(unavailable_gitlab):
+    """Test writes fail fast with Retry-After when spooling is off"""
+    event = _create_event("downaccount")
+    response = account_handlers.create_account_handler(event, LambdaContext())
+
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "12"
+    assert get_request_queue().receive_all() == []
+
+
+def test_writes_are_spooled_and_replayed_after_recovery(unavailable_gitlab, monkeypatch):
+    """Test writes made during an outage are queued, then committed once GitLab is back"""
+    monkeypatch.setattr(account_handlers, "GITLAB_OUTAGE_SPOOL", True)
+
+    event = _create_event("spooledaccount")
+    created = account_handlers.create_account_handler(event, LambdaContext())
+    deleted = account_handlers.delete_account_handler(
+        {"pathParameters": {"accountName": "oldaccount"}}, LambdaContext()
+    )
+
+    assert created["statusCode"] == deleted["statusCode"] == 202
+    body = json.loads(created["body"])
+    assert body["spooled"] is True
+    assert body["status"] == "queued"
+    assert json.loads(deleted["body"])["spooled"] is True
+    messages = get_request_queue().receive_all()
+    assert [m["operation"] for m in messages] == ["commit", "delete"]
+
+    # Still down: the whole batch is hidden until the breaker may close,
+    # without spending an attempt
+    deletes = unavailable_gitlab.delete_account_config.call_count
+    result = request_handlers.request_worker_handler(_sqs_event(messages), LambdaContext())
+    assert result == {"batchItemFailures": [
+        {"itemIdentifier": "message-0"}, {"itemIdentifier": "message-1"}
+    ]}
+    assert unavailable_gitlab.delete_account_config.call_count == deletes
+    assert [seconds for _, seconds in get_request_queue().deferred] == [12, 12]
+    status = get_request_status_store().get(body["request_id"])
+    assert status["status"] == "queued"
+    assert status["deferrals"] == 1
+
+    unavailable_gitlab.commit_config_files.side_effect = None
+    unavailable_gitlab.commit_config_files.return_value = CommitResult(commit_sha="abc123")
+    unavailable_gitlab.delete_account_config.side_effect = None
+    unavailable_gitlab.delete_account_config.return_value = "def456"
+
+    result = request_handlers.request_worker_handler(_sqs_event(messages), LambdaContext())
+
+    assert result == {"batchItemFailures": []}
+    status = get_request_status_store().get(body["request_id"])
+    assert status["status"] == "committed"
+    assert status["commit_sha"] == "abc123"
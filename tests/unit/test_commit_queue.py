@@ -0,0 +1,122 @@
+import threading
+import time
+
+import pytest
+
+from utils.commit_queue import (
+    CANCELLED,
+    COMMITTED,
+    FAILED,
+    CommitCoalescer,
+    CommitQueue,
+    CommitQueueError,
+)
+from utils.rate_limiter import RateLimitedError
+
+
+def _actions(account_name):
+    return [{
+        "action": "create",
+        "file_path": f"aft-account-request/{account_name}/request.json",
+        "content": "{}",
+    }]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return CommitQueue(path=str(tmp_path / "queue.sqlite3"))
+
+
+def test_concurrent_operations_share_one_commit(queue):
+    """Test operations queued within the window are committed together"""
+    commits = []
+
+    def commit_actions(actions, commit_message):
+        commits.append(actions)
+        return f"sha{len(commits)}"
+
+    coalescer = CommitCoalescer(commit_actions, queue=queue, max_batch=10, window=0.3)
+    results = {}
+    # Another caller is already waiting, so the first thread opens the window too
+    queue.enqueue(_actions("waiting"), "Create account: waiting")
+
+    def submit(name):
+        results[name] = coalescer.commit(_actions(name), f"Create account: {name}")
+
+    threads = [threading.Thread(target=submit, args=(f"acct{i}",)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(commits) == 1
+    assert len(commits[0]) == 6
+    assert set(results.values()) == {"sha1"}
+
+
+def test_failed_batch_reports_failures_per_operation(queue):
+    """Test a failing operation does not fail the rest of its batch"""
+    def commit_actions(actions, commit_message):
+        if any("broken" in action["file_path"] for action in actions):
+            raise RuntimeError("A file with this name already exists")
+        return "good-sha"
+
+    coalescer = CommitCoalescer(commit_actions, queue=queue, max_batch=10, window=0)
+    good_id = queue.enqueue(_actions("good"), "Create account: good")
+    broken_id = queue.enqueue(_actions("broken"), "Create account: broken")
+
+    assert coalescer.drain() == 2
+
+    assert queue.get(good_id)["status"] == COMMITTED
+    assert queue.get(good_id)["commit_sha"] == "good-sha"
+    assert queue.get(broken_id)["status"] == FAILED
+    with pytest.raises(RuntimeError):
+        coalescer.wait(broken_id, timeout=1)
+    # A coalescer of another process only has the message
+    with pytest.raises(CommitQueueError, match="already exists"):
+        CommitCoalescer(commit_actions, queue=queue).wait(broken_id, timeout=1)
+
+
+def test_caller_gets_the_original_error(queue):
+    """Test errors the handlers map to a status code reach the caller unwrapped"""
+    def commit_actions(actions, commit_message):
+        raise RateLimitedError(retry_after=3)
+
+    coalescer = CommitCoalescer(commit_actions, queue=queue, window=0)
+
+    with pytest.raises(RateLimitedError) as excinfo:
+        coalescer.commit(_actions("acct"), "Create account: acct")
+    assert excinfo.value.retry_after == 3
+
+
+def test_lone_caller_skips_the_window(queue):
+    """Test an operation alone in the queue is committed without waiting for the window"""
+    coalescer = CommitCoalescer(lambda actions, message: "sha1", queue=queue, window=5)
+
+    started = time.monotonic()
+    assert coalescer.commit(_actions("acct"), "Create account: acct") == "sha1"
+    assert time.monotonic() - started < 1
+
+
+def test_timed_out_operation_is_cancelled(queue):
+    """Test an operation whose caller gave up is never committed later"""
+    coalescer = CommitCoalescer(lambda actions, message: "sha1", queue=queue, window=0)
+    op_id = queue.enqueue(_actions("acct"), "Create account: acct")
+
+    with pytest.raises(CommitQueueError, match="Timed out"):
+        coalescer.wait(op_id, timeout=0)
+
+    assert queue.get(op_id)["status"] == CANCELLED
+
+
+def test_operations_on_same_file_are_split_across_commits(queue):
+    """Test a batch never contains two actions for the same path"""
+    queue.enqueue(_actions("same"), "first")
+    queue.enqueue(_actions("same"), "second")
+
+    first = queue.claim_batch(10)
+    assert [operation["commit_message"] for operation in first] == ["first"]
+    assert queue.claim_batch(10) == []
+
+    queue.complete([first[0]["id"]], "sha1")
+    assert [operation["commit_message"] for operation in queue.claim_batch(10)] == ["second"]
@@ -1,8 +1,16 @@
 import json
+
+import jinja2
 import pytest
 
 from models.account import AccountRequest
-from utils.config_generator import ConfigGenerator
+from utils import config_generator
+from utils.config_generator import (
+    ConfigGenerator,
+    RenderCache,
+    compile_templates,
+    create_template_environment,
+)
 
 
 def test_generate_account_config_basic():
@@ -58,4 +66,178 @@ def test_generate_account_config_with_sso():
     assert custom_content["sso_user"] is not None
     assert custom_content["sso_user"]["email"] == "sso@example.com"
     assert custom_content["sso_user"]["first_name"] == "Test"
-    assert custom_content["sso_user"]["last_name"] == "User" 
\ No newline at end of file
+    assert custom_content["sso_user"]["last_name"] == "User"
+
+
+def test_rendered_config_matches_json_dumps():
+    """Test templates render byte-identical output to json.dumps(indent=2)"""
+    # Given
+    account_request = AccountRequest(
+        account_name="testaccount",
+        email="test@example.com",
+        organizational_unit='Sand"box <&> é',
+        account_tags={"team": "platform", "cost-center": "42"},
+        sso_user_email="sso@example.com",
+        sso_user_first_name="Test",
+    )
+    generator = ConfigGenerator()
+    
+    # When
+    request_file, custom_file = generator.generate_account_config(account_request)
+    option_file = generator.generate_add_option_config(
+        "testaccount", "backup", {"plan": {"days": 7}}
+    )[0]
+    
+    # Then
+    assert request_file.content == json.dumps({
+        "name": "testaccount",
+        "email": "test@example.com",
+        "organizational_unit": 'Sand"box <&> é',
+        "account_tags": {"team": "platform", "cost-center": "42"},
+        "custom_fields": {},
+    }, indent=2)
+    assert custom_file.content == json.dumps({
+        "custom_fields": {},
+        "sso_user": {"email": "sso@example.com", "first_name": "Test", "last_name": None},
+    }, indent=2)
+    assert option_file.content == json.dumps({
+        "name": "backup",
+        "config": {"plan": {"days": 7}},
+        "enabled": True,
+        "timestamp": "",
+    }, indent=2)
+
+
+def test_precompiled_templates_are_loaded(tmp_path):
+    """Test templates compiled at build time render without the sources"""
+    # Given
+    compile_templates(str(tmp_path))
+    environment = create_template_environment(jinja2.ModuleLoader(str(tmp_path)))
+    
+    # When
+    config_files = ConfigGenerator(environment).generate_upgrade_config("testaccount", "gold")
+    
+    # Then
+    assert json.loads(config_files[0].content) == {
+        "operation": "upgrade",
+        "target_tier": "gold",
+        "timestamp": "",
+    }
+
+
+def test_missing_precompiled_templates_are_reported_in_lambda(tmp_path, monkeypatch, caplog):
+    """Test a Lambda package without compiled templates logs which ones fall back to source"""
+    # Given
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "aft-api-router-test")
+    monkeypatch.setattr(config_generator, "COMPILED_TEMPLATES_DIR", str(tmp_path))
+    
+    # When
+    create_template_environment()
+    
+    # Then
+    assert "account_request.json.j2" in caplog.text
+    assert caplog.records[-1].levelname == "ERROR"
+    
+    # Once compiled, nothing is reported
+    caplog.clear()
+    compile_templates(str(tmp_path))
+    create_template_environment()
+    assert caplog.text == ""
+
+
+def test_generators_share_one_environment():
+    """Test the template environment is built once per container"""
+    assert ConfigGenerator().template_env is ConfigGenerator().template_env
+
+
+def test_generate_many_matches_single_generation():
+    """Test bulk generation yields the same files as per-account generation"""
+    # Given
+    account_requests = [
+        AccountRequest(
+            account_name=f"account{i}",
+            email=f"account{i}@example.com",
+            organizational_unit="Sandbox",
+            sso_user_email=f"sso{i}@example.com" if i % 2 else None,
+        )
+        for i in range(5)
+    ]
+    generator = ConfigGenerator()
+    
+    # When
+    files = list(generator.generate_many(account_requests))
+    
+    # Then
+    expected = [f for r in account_requests for f in generator.generate_account_config(r)]
+    assert [(f.file_path, f.content) for f in files] == [(f.file_path, f.content) for f in expected]
+
+
+def test_generate_many_is_lazy():
+    """Test bulk generation consumes requests only as files are pulled"""
+    # Given
+    consumed = []
+    
+    def account_requests():
+        for i in range(1000):
+            consumed.append(i)
+            yield AccountRequest(
+                account_name=f"account{i}",
+                email=f"account{i}@example.com",
+                organizational_unit="Sandbox",
+            )
+    
+    # When
+    files = ConfigGenerator().generate_many(account_requests())
+    first = next(files)
+    
+    # Then
+    assert first.file_path == "aft-account-request/account0/request.json"
+    assert consumed == [0]
+
+
+def test_render_cache_returns_identical_files():
+    """Test cached renders match fresh renders and are counted"""
+    # Given
+    account_request = AccountRequest(
+        account_name="testaccount",
+        email="test@example.com",
+        organizational_unit="Sandbox",
+    )
+    cache = RenderCache(max_size=10)
+    generator = ConfigGenerator(render_cache=cache)
+    
+    # When
+    first = generator.generate_account_config(account_request)
+    second = generator.generate_account_config(account_request.model_copy())
+    
+    # Then
+    assert second == first
+    assert second[0] is not first[0]
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_render_cache_evicts_least_recently_used():
+    """Test the cache stays within its size"""
+    # Given
+    cache = RenderCache(max_size=2)
+    generator = ConfigGenerator(render_cache=cache)
+    
+    # When
+    generator.generate_upgrade_config("one", "gold")
+    generator.generate_upgrade_config("two", "gold")
+    generator.generate_upgrade_config("one", "gold")
+    generator.generate_upgrade_config("three", "gold")
+    generator.generate_upgrade_config("one", "gold")
+    
+    # Then
+    assert cache.stats() == {"hits": 2, "misses": 3, "evictions": 1, "size": 2}
+
+
+def test_render_cache_key_includes_template_version():
+    """Test renders cached for other templates are not reused"""
+    files = [
+        ("path.json", "account_operation.json.j2", {"operation": "upgrade", "target_tier": "gold"})
+    ]
+    
+    v1_key = RenderCache(template_version="v1").make_key(files)
+    assert v1_key != RenderCache(template_version="v2").make_key(files)
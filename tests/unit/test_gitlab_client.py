@@ -0,0 +1,399 @@
+from unittest.mock import MagicMock, patch
+
+import gitlab
+import pytest
+import requests
+
+from models.account import AccountConfigFile
+from utils.gitlab_client import (
+    AccountNotFoundError,
+    GitLabClient,
+    GitLabClientError,
+    GitLabConflictError,
+    get_gitlab_client,
+    reset_gitlab_client,
+)
+from utils.repository_index import git_blob_sha
+
+
+@pytest.fixture(autouse=True)
+def gitlab_env(monkeypatch):
+    monkeypatch.setenv("GITLAB_URL", "https://gitlab.example.com")
+    monkeypatch.setenv("GITLAB_TOKEN", "token")
+    monkeypatch.setenv("GITLAB_PROJECT_ID", "42")
+    reset_gitlab_client()
+    yield
+    reset_gitlab_client()
+
+
+@pytest.fixture
+def mock_gitlab():
+    with patch("utils.gitlab_client.gitlab.Gitlab") as mock_gitlab:
+        yield mock_gitlab
+
+
+def _written_by(commit_id, content):
+    """files.head answering as if commit_id last wrote content to every file"""
+    def head(file_path, ref):
+        return {"X-Gitlab-Last-Commit-Id": commit_id, "X-Gitlab-Blob-Id": git_blob_sha(content)}
+    return head
+
+
+def _files():
+    return [AccountConfigFile(file_path="aft-account-request/test/request.json", content="{}")]
+
+
+def test_client_is_shared_and_project_is_lazy(mock_gitlab):
+    """Test the shared client is built once without fetching the project"""
+    client = get_gitlab_client()
+
+    assert get_gitlab_client() is client
+    mock_gitlab.assert_called_once()
+    mock_gitlab.return_value.projects.get.assert_called_once_with("42", lazy=True)
+
+
+def test_commit_reconnects_after_auth_error(mock_gitlab):
+    """Test the session is rebuilt and the commit retried after an auth error"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.commits.create.side_effect = [
+        gitlab.exceptions.GitlabAuthenticationError("401 Unauthorized"),
+        MagicMock(id="abc123"),
+    ]
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Create account: test")
+
+    assert result.commit_sha == "abc123"
+    assert mock_gitlab.call_count == 2
+
+
+def test_commit_is_not_resent_when_it_landed_before_the_connection_dropped(mock_gitlab):
+    """Test a commit whose response was lost is found on the branch instead of sent twice"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.commits.create.side_effect = requests.exceptions.ConnectionError("reset by peer")
+    project.repository_compare.return_value = {"commits": [
+        {"id": "other456", "message": "Create account: other"},
+        {"id": "abc123", "message": "Create account: test\n"},
+    ]}
+    project.commits.get.return_value = MagicMock(id="abc123", parent_ids=["other456"])
+    project.files.head.side_effect = _written_by("abc123", "{}")
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Create account: test")
+
+    assert result.commit_sha == "abc123"
+    project.commits.create.assert_called_once()
+    project.repository_compare.assert_called_once_with("head123", "main", straight=True)
+    project.commits.get.assert_called_once_with("abc123")
+    assert mock_gitlab.call_count == 2
+
+
+def test_commit_with_the_same_message_from_another_writer_is_not_taken(mock_gitlab):
+    """Test a timed-out commit is re-sent when the commit with its message wrote other content"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.commits.create.side_effect = [
+        requests.exceptions.ReadTimeout("read timed out"),
+        MagicMock(id="def456"),
+    ]
+    project.repository_compare.return_value = {"commits": [
+        {"id": "abc123", "message": "Create account: test"},
+    ]}
+    project.files.head.side_effect = _written_by("abc123", '{"other": true}')
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Create account: test")
+
+    assert result.commit_sha == "def456"
+    assert project.commits.create.call_count == 2
+    project.commits.get.assert_not_called()
+
+
+def test_commit_is_resent_when_it_did_not_land(mock_gitlab):
+    """Test a commit lost with the connection is sent again on a fresh session"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.commits.create.side_effect = [
+        requests.exceptions.ConnectionError("reset by peer"),
+        MagicMock(id="abc123"),
+    ]
+    project.repository_compare.return_value = {"commits": []}
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Create account: test")
+
+    assert result.commit_sha == "abc123"
+    assert project.commits.create.call_count == 2
+    project.commits.get.assert_not_called()
+
+
+def _conflict():
+    return gitlab.exceptions.GitlabCreateError(
+        "Could not update refs/heads/main. Please refresh and try again.", response_code=400
+    )
+
+
+def test_commit_retries_branch_moved_conflicts(mock_gitlab, monkeypatch):
+    """Test a branch-moved conflict is retried with the same actions"""
+    monkeypatch.setenv("GITLAB_COMMIT_RETRY_DELAY", "0")
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.commits.create.side_effect = [_conflict(), MagicMock(id="abc123")]
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Create account: test")
+
+    assert result.commit_sha == "abc123"
+    first, second = [call.args[0] for call in project.commits.create.call_args_list]
+    assert first["actions"] == second["actions"]
+    assert client.stats.as_dict()["conflicts"] == 1
+    assert client.stats.as_dict()["conflict_rate"] == 0.5
+
+
+def test_commit_does_not_retry_real_errors(mock_gitlab):
+    """Test non-conflict errors fail without retrying"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.commits.create.side_effect = gitlab.exceptions.GitlabCreateError(
+        "Your changes could not be committed because the file path is invalid", response_code=400
+    )
+
+    client = GitLabClient()
+    with pytest.raises(GitLabClientError):
+        client.commit_config_files(_files(), "Create account: test")
+
+    assert project.commits.create.call_count == 1
+
+
+def test_commit_gives_up_after_max_retries(mock_gitlab, monkeypatch):
+    """Test persistent conflicts surface as GitLabConflictError"""
+    monkeypatch.setenv("GITLAB_COMMIT_RETRY_DELAY", "0")
+    monkeypatch.setenv("GITLAB_COMMIT_MAX_RETRIES", "2")
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.commits.create.side_effect = _conflict()
+
+    client = GitLabClient()
+    with pytest.raises(GitLabConflictError):
+        client.commit_config_files(_files(), "Create account: test")
+
+    assert project.commits.create.call_count == 3
+
+
+def _account_tree(*names):
+    return [
+        {"id": f"blob-{name}", "path": f"aft-account-request/test/{name}", "type": "blob"}
+        for name in names
+    ]
+
+
+def _last_commit(commit_id):
+    return {"X-Gitlab-Last-Commit-Id": commit_id}
+
+
+def test_delete_actions_are_pinned_to_each_file(mock_gitlab):
+    """Test delete actions carry the last commit of their own file as last_commit_id"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.repository_tree.return_value = _account_tree("request.json", "options/backup.json")
+    project.files.head.side_effect = lambda path, ref: _last_commit(
+        f"commit-{path.rsplit('/', 1)[-1]}"
+    )
+    project.commits.create.return_value = MagicMock(id="abc123")
+
+    client = GitLabClient()
+    client.delete_account_config("test", "Delete account: test")
+
+    actions = project.commits.create.call_args.args[0]["actions"]
+    assert {action["file_path"]: action["last_commit_id"] for action in actions} == {
+        "aft-account-request/test/request.json": "commit-request.json",
+        "aft-account-request/test/options/backup.json": "commit-backup.json",
+    }
+
+
+def test_unchanged_files_are_not_committed(mock_gitlab):
+    """Test resubmitting identical content returns the head without committing"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha("{}"),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Update account: test")
+
+    assert result.commit_sha == "head123"
+    assert result.no_change is True
+    project.commits.create.assert_not_called()
+
+
+def test_no_change_is_confirmed_at_current_head(mock_gitlab):
+    """Test a match in a cached index is checked against the current head before skipping"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha("{}"),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+    client = GitLabClient()
+    client.tree_index.refresh()
+
+    # Someone else changes the file within the index TTL
+    project.branches.get.return_value.commit = {"id": "head456"}
+    project.repository_compare.return_value = {"diffs": [{
+        "old_path": "aft-account-request/test/request.json",
+        "new_path": "aft-account-request/test/request.json",
+    }]}
+    project.files.head.return_value = _last_commit("head456")
+    project.commits.create.return_value = MagicMock(id="abc123", parent_ids=["head456"])
+
+    result = client.commit_config_files(_files(), "Update account: test")
+
+    assert result.no_change is False
+    assert result.commit_sha == "abc123"
+    project.repository_compare.assert_called_once_with("head123", "head456", straight=True)
+
+
+def test_file_matching_a_partly_stale_index_is_still_written(mock_gitlab):
+    """Test a file is only left out of a commit if it still matches at the current head"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha("{}"),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+    client = GitLabClient()
+    client.tree_index.refresh()
+
+    # Someone else changes the request within the index TTL
+    project.branches.get.return_value.commit = {"id": "head456"}
+    project.repository_compare.return_value = {"diffs": [{
+        "old_path": "aft-account-request/test/request.json",
+        "new_path": "aft-account-request/test/request.json",
+    }]}
+    project.files.head.return_value = _last_commit("head456")
+    project.commits.create.return_value = MagicMock(id="abc123", parent_ids=["head456"])
+    files = _files() + [AccountConfigFile(
+        file_path="aft-account-request/test/options/backup.json", content="{}"
+    )]
+
+    client.commit_config_files(files, "Update account: test")
+
+    actions = project.commits.create.call_args.args[0]["actions"]
+    assert [action["file_path"] for action in actions] == [file.file_path for file in files]
+
+
+def test_changed_files_are_updated(mock_gitlab):
+    """Test files already in the tree are sent as updates"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha('{"old": true}'),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+    project.files.head.return_value = _last_commit("head123")
+    project.commits.create.return_value = MagicMock(id="abc123", parent_ids=["head123"])
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Update account: test")
+
+    assert result.no_change is False
+    actions = project.commits.create.call_args.args[0]["actions"]
+    assert actions[0]["action"] == "update"
+    assert actions[0]["last_commit_id"] == "head123"
+
+
+def test_update_of_file_changed_before_head_is_pinned_to_its_commit(mock_gitlab):
+    """Test an update is pinned to the file's own last commit, not to the newer branch head"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha('{"old": true}'),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+    project.files.head.return_value = _last_commit("older456")
+    project.commits.create.return_value = MagicMock(id="abc123", parent_ids=["head123"])
+
+    client = GitLabClient()
+    client.commit_config_files(_files(), "Update account: test")
+
+    project.files.head.assert_called_once_with(
+        "aft-account-request/test/request.json", ref="head123"
+    )
+    actions = project.commits.create.call_args.args[0]["actions"]
+    assert actions[0]["last_commit_id"] == "older456"
+
+    # Our own commit is now the file's last commit, no lookup needed
+    updated = AccountConfigFile(
+        file_path="aft-account-request/test/request.json", content='{"new": 2}'
+    )
+    client.commit_config_files([updated], "Update account: test")
+    project.files.head.assert_called_once()
+    assert project.commits.create.call_args.args[0]["actions"][0]["last_commit_id"] == "abc123"
+
+
+def test_changed_file_is_pinned_again_before_retry(mock_gitlab, monkeypatch):
+    """Test a file changed by someone else is looked up again at the new head before retrying"""
+    monkeypatch.setenv("GITLAB_COMMIT_RETRY_DELAY", "0")
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.branches.get.return_value.commit = {"id": "head123"}
+    project.repository_tree.return_value = [{
+        "id": git_blob_sha('{"old": true}'),
+        "path": "aft-account-request/test/request.json",
+        "type": "blob",
+    }]
+    project.files.head.side_effect = [_last_commit("older456"), _last_commit("theirs789")]
+    project.commits.create.side_effect = [
+        gitlab.exceptions.GitlabCreateError(
+            "You are attempting to update a file that has changed since you started editing it.",
+            response_code=400,
+        ),
+        MagicMock(id="abc123", parent_ids=["head999"]),
+    ]
+
+    client = GitLabClient()
+    result = client.commit_config_files(_files(), "Update account: test")
+
+    assert result.commit_sha == "abc123"
+    pins = [
+        call.args[0]["actions"][0]["last_commit_id"]
+        for call in project.commits.create.call_args_list
+    ]
+    assert pins == ["older456", "theirs789"]
+
+
+def test_delete_removes_whole_account_subtree(mock_gitlab):
+    """Test deletion covers option and operation files in one commit"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.repository_tree.return_value = _account_tree(
+        "request.json", "customizations.json", "options/backup.json", "operations/upgrade.json"
+    ) + [{"id": "tree-options", "path": "aft-account-request/test/options", "type": "tree"}]
+    project.commits.create.return_value = MagicMock(id="abc123")
+
+    client = GitLabClient()
+    client.delete_account_config("test", "Delete account: test")
+
+    project.commits.create.assert_called_once()
+    actions = project.commits.create.call_args.args[0]["actions"]
+    assert sorted(action["file_path"] for action in actions) == [
+        "aft-account-request/test/customizations.json",
+        "aft-account-request/test/operations/upgrade.json",
+        "aft-account-request/test/options/backup.json",
+        "aft-account-request/test/request.json",
+    ]
+    assert {action["action"] for action in actions} == {"delete"}
+
+
+def test_delete_unknown_account(mock_gitlab):
+    """Test deleting an account without files fails without committing"""
+    project = mock_gitlab.return_value.projects.get.return_value
+    project.repository_tree.return_value = []
+
+    client = GitLabClient()
+    with pytest.raises(AccountNotFoundError):
+        client.delete_account_config("test", "Delete account: test")
+
+    project.commits.create.assert_not_called()
@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from utils import idempotency
+from utils.idempotency import (
+    DynamoDBIdempotencyStore,
+    InMemoryIdempotencyStore,
+    idempotent,
+    set_idempotency_store,
+)
+
+
+@pytest.fixture(autouse=True)
+def store():
+    store = InMemoryIdempotencyStore()
+    set_idempotency_store(store)
+    yield store
+    set_idempotency_store(None)
+
+
+def _event(key="key-1", body=None, principal="alice"):
+    return {
+        "routeKey": "POST /accounts",
+        "headers": {"Idempotency-Key": key} if key else {},
+        "body": json.dumps(body or {"account_name": "test"}),
+        "requestContext": {"authorizer": {"lambda": {"principal_id": principal}}},
+    }
+
+
+def _counting_handler(status_code=202, delay=0.0):
+    calls = []
+
+    @idempotent
+    def handler(event, context):
+        calls.append(event)
+        time.sleep(delay)
+        return {
+            "statusCode": status_code,
+            "headers": {"Content-Type": "application/json"},
+            "body": json.dumps({"commit_sha": f"sha{len(calls)}"}),
+        }
+
+    return handler, calls
+
+
+def test_replay_returns_stored_response():
+    """Test a retried request gets the original response without running again"""
+    handler, calls = _counting_handler()
+
+    first = handler(_event(), None)
+    second = handler(_event(), None)
+
+    assert len(calls) == 1
+    assert second["statusCode"] == 202
+    assert json.loads(second["body"]) == {"commit_sha": "sha1"}
+    assert second["headers"]["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first["headers"]
+
+
+def test_requests_without_key_are_not_deduplicated():
+    """Test the header is opt-in"""
+    handler, calls = _counting_handler()
+
+    handler(_event(key=None), None)
+    handler(_event(key=None), None)
+
+    assert len(calls) == 2
+
+
+def test_key_reused_with_different_payload_is_rejected():
+    """Test a key cannot be replayed for another request"""
+    handler, calls = _counting_handler()
+
+    handler(_event(body={"account_name": "one"}), None)
+    response = handler(_event(body={"account_name": "two"}), None)
+
+    assert response["statusCode"] == 422
+    assert len(calls) == 1
+
+
+def test_failed_request_can_be_retried():
+    """Test error responses are not stored"""
+    handler, calls = _counting_handler(status_code=500)
+
+    handler(_event(), None)
+    handler(_event(), None)
+
+    assert len(calls) == 2
+
+
+def test_in_flight_duplicate_waits_for_first_execution():
+    """Test a concurrent duplicate gets the first execution's response"""
+    handler, calls = _counting_handler(delay=0.3)
+    responses = []
+
+    threads = [
+        threading.Thread(target=lambda: responses.append(handler(_event(), None)))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [json.loads(r["body"]) for r in responses] == [{"commit_sha": "sha1"}] * 3
+
+
+def test_in_flight_duplicate_gives_up_after_wait(monkeypatch):
+    """Test a duplicate that waits too long is told to retry later"""
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT", 0.1)
+    handler, calls = _counting_handler(delay=0.5)
+    responses = []
+
+    first = threading.Thread(target=lambda: responses.append(handler(_event(), None)))
+    first.start()
+    time.sleep(0.05)
+    duplicate = handler(_event(), None)
+    first.join()
+
+    assert duplicate["statusCode"] == 409
+    assert duplicate["headers"]["Retry-After"] == "1"
+    assert len(calls) == 1
+
+
+def test_keys_are_scoped_per_caller():
+    """Test another caller reusing a key runs its own request instead of getting a replay"""
+    handler, calls = _counting_handler()
+
+    handler(_event(principal="alice"), None)
+    response = handler(_event(principal="bob"), None)
+
+    assert len(calls) == 2
+    assert json.loads(response["body"]) == {"commit_sha": "sha2"}
+    assert "Idempotent-Replayed" not in response["headers"]
+
+
+def _conditional_check_failed():
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "failed"}}, "PutItem"
+    )
+
+
+class FakeTable:
+    """put_item loses the race once, and the winner releases before get_item runs"""
+
+    def __init__(self):
+        self.items = {}
+        self.lost_race = False
+
+    def put_item(self, Item, **kwargs):
+        if not self.lost_race:
+            self.lost_race = True
+            raise _conditional_check_failed()
+        self.items[Item["id"]] = Item
+
+    def get_item(self, Key, **kwargs):
+        item = self.items.get(Key["id"])
+        return {"Item": item} if item else {}
+
+    def update_item(self, Key, **kwargs):
+        if Key["id"] not in self.items:
+            raise _conditional_check_failed()
+        self.items[Key["id"]]["status"] = "completed"
+
+
+def test_dynamodb_start_claims_key_released_during_the_race():
+    """Test a key released between the failed put and the get is claimed again"""
+    store = DynamoDBIdempotencyStore.__new__(DynamoDBIdempotencyStore)
+    store.ttl = 60
+    store.table = FakeTable()
+
+    assert store.start("handler#alice#key-1", "fingerprint") is None
+    assert store.table.items["handler#alice#key-1"]["status"] == "in_progress"
+
+    # Completing a record that expired meanwhile does not recreate it
+    store.complete("handler#alice#other", {"statusCode": 202})
+    assert "handler#alice#other" not in store.table.items
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from utils.json_serializer import JsonSerializer
+
+VALUES = [
+    {},
+    [],
+    {"name": "test", "tags": {"team": "platform"}, "list": [1, 2, {"nested": []}]},
+    {"text": 'quotes " backslash \\ control \n\t and <html> & stuff'},
+    {"unicode": "café ☃ \U0001F600"},
+    {"floats": [0.1, 1.5, -0.0, 1e16, 1e-7, 123456789.123]},
+    {"ints": [0, -1, 2 ** 63, 2 ** 70, True, False, None]},
+    {1: "non-string key"},
+    [float("nan"), float("inf")],
+]
+
+
+@pytest.mark.parametrize("backend", ["orjson", "json"])
+@pytest.mark.parametrize("value", VALUES)
+def test_output_matches_json_dumps(backend, value):
+    """Test every backend produces the canonical json.dumps(indent=2) text"""
+    assert JsonSerializer(backend).dumps(value) == json.dumps(value, indent=2)
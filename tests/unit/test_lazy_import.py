@@ -0,0 +1,22 @@
+import sys
+
+from utils.lazy_import import lazy_import
+
+
+def test_module_loads_on_first_attribute_access(monkeypatch):
+    """Test the module body runs only when an attribute is used"""
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    
+    module = lazy_import("colorsys")
+    assert sys.modules["colorsys"] is module
+    assert type(module).__name__ == "_LazyModule"
+    
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert type(module).__name__ == "module"
+
+
+def test_loaded_module_is_returned_as_is():
+    """Test an already imported module is not wrapped"""
+    import json
+    
+    assert lazy_import("json") is json
@@ -0,0 +1,82 @@
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from handlers import account_handlers
+from tests.fixtures.lambda_context import LambdaContext
+from utils.gitlab_transport import gitlab_adapter
+from utils.rate_limiter import InMemoryTokenBucket, RateLimitedError, acquire
+
+
+def test_burst_is_admitted_then_throttled():
+    """Test a full bucket admits a burst and then reports the wait for the next token"""
+    bucket = InMemoryTokenBucket(rate=10, capacity=3)
+    
+    assert [bucket.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    delay = bucket.try_acquire()
+    assert 0 < delay <= 0.1
+
+
+def test_bucket_refills_over_time():
+    """Test tokens come back at the configured rate"""
+    bucket = InMemoryTokenBucket(rate=50, capacity=1)
+    assert bucket.try_acquire() == 0.0
+    
+    time.sleep(0.05)
+    
+    assert bucket.try_acquire() == 0.0
+
+
+def test_acquire_waits_briefly_for_a_token():
+    """Test a caller queues for a token expected within the wait"""
+    bucket = InMemoryTokenBucket(rate=20, capacity=1)
+    bucket.try_acquire()
+    
+    start = time.monotonic()
+    acquire(bucket, wait=1)
+    
+    assert time.monotonic() - start >= 0.03
+
+
+def test_acquire_sheds_load_with_retry_after():
+    """Test a caller is rejected when no token is expected within the wait"""
+    bucket = InMemoryTokenBucket(rate=0.5, capacity=1)
+    bucket.try_acquire()
+    
+    with pytest.raises(RateLimitedError) as excinfo:
+        acquire(bucket, wait=0.1)
+    
+    assert excinfo.value.retry_after == 2
+
+
+def test_adapter_takes_a_token_per_request():
+    """Test every request sent through the adapter is counted"""
+    bucket = InMemoryTokenBucket(rate=0.01, capacity=2)
+    adapter = gitlab_adapter(bucket, None, wait=0)
+    
+    with patch("requests.adapters.HTTPAdapter.send", return_value="response") as send:
+        assert adapter.send(MagicMock()) == "response"
+        assert adapter.send(MagicMock()) == "response"
+        with pytest.raises(RateLimitedError):
+            adapter.send(MagicMock())
+    
+    assert send.call_count == 2
+
+
+def test_handler_answers_429_with_retry_after(monkeypatch):
+    """Test a request that cannot get a GitLab token is shed with 429"""
+    client = MagicMock()
+    client.commit_config_files.side_effect = RateLimitedError(retry_after=3)
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    event = {"body": json.dumps({
+        "account_name": "ratelimited",
+        "email": "ratelimited@example.com",
+        "organizational_unit": "Sandbox"
+    })}
+    
+    response = account_handlers.create_account_handler(event, LambdaContext())
+    
+    assert response["statusCode"] == 429
+    assert response["headers"]["Retry-After"] == "3"
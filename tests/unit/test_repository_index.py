@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from utils.repository_index import RepositoryTreeIndex
+
+
+def _tree(*paths):
+    return [{"id": f"blob-{path}", "path": path, "type": "blob"} for path in paths]
+
+
+@pytest.fixture
+def project():
+    project = MagicMock()
+    project.branches.get.return_value.commit = {"id": "head1"}
+    project.repository_tree.return_value = _tree("aft-account-request/existing/request.json")
+    return project
+
+
+def test_action_is_chosen_from_single_listing(project):
+    """Test create/update is decided locally after one tree listing"""
+    index = RepositoryTreeIndex(project, "main")
+    index.refresh()
+
+    assert index.action_for("aft-account-request/existing/request.json") == "update"
+    assert index.action_for("aft-account-request/new/request.json") == "create"
+    project.repository_tree.assert_called_once()
+
+
+def test_refresh_applies_compare_diff(project):
+    """Test changes by others are applied from the compare diff"""
+    index = RepositoryTreeIndex(project, "main", ttl=0)
+    index.refresh()
+
+    project.branches.get.return_value.commit = {"id": "head2"}
+    project.repository_compare.return_value = {"diffs": [
+        {"old_path": "aft-account-request/existing/request.json",
+         "new_path": "aft-account-request/existing/request.json", "deleted_file": True},
+        {"old_path": "aft-account-request/other/request.json",
+         "new_path": "aft-account-request/other/request.json", "new_file": True},
+    ]}
+    index.refresh()
+
+    assert not index.exists("aft-account-request/existing/request.json")
+    assert index.exists("aft-account-request/other/request.json")
+    assert index.head_sha == "head2"
+    project.repository_tree.assert_called_once()
+    project.repository_compare.assert_called_once_with("head1", "head2", straight=True)
+
+
+def test_own_commit_is_recorded_without_api_calls(project):
+    """Test our commits update the index locally when made on the indexed head"""
+    index = RepositoryTreeIndex(project, "main")
+    index.refresh()
+
+    commit = MagicMock(id="head2", parent_ids=["head1"])
+    index.record_commit(commit, [
+        {"action": "create", "file_path": "aft-account-request/new/request.json"},
+        {"action": "delete", "file_path": "aft-account-request/existing/request.json"},
+    ])
+
+    assert index.head_sha == "head2"
+    assert index.exists("aft-account-request/new/request.json")
+    assert not index.exists("aft-account-request/existing/request.json")
@@ -0,0 +1,246 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from handlers import account_handlers, request_handlers
+from models.account import CommitResult
+from tests.fixtures.lambda_context import LambdaContext
+from utils import account_lock
+from utils import gitlab_client as gitlab_client_module
+from utils.account_lock import account_locks
+from utils.gitlab_client import AccountNotFoundError, GitLabConflictError
+from utils.rate_limiter import RateLimitedError
+from utils.request_queue import (
+    SQSRequestQueue,
+    get_request_queue,
+    message_group_id,
+    reset_request_queue,
+)
+
+
+@pytest.fixture(autouse=True)
+def async_mode(monkeypatch):
+    monkeypatch.setattr(account_handlers, "ASYNC_WRITES", True)
+    reset_request_queue()
+    yield
+    reset_request_queue()
+
+
+@pytest.fixture
+def gitlab_client(monkeypatch):
+    client = MagicMock()
+    client.commit_config_files.return_value = CommitResult(commit_sha="abc123")
+    client.delete_account_config.return_value = "def456"
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    # The worker imports the client on first use
+    monkeypatch.setattr(gitlab_client_module, "get_gitlab_client", lambda: client)
+    return client
+
+
+def _sqs_event(receive_count=1):
+    return {"Records": [
+        {
+            "messageId": f"message-{i}",
+            "receiptHandle": f"receipt-{i}",
+            "body": json.dumps(message),
+            "attributes": {
+                "ApproximateReceiveCount": str(receive_count),
+                "MessageGroupId": message_group_id(message),
+            },
+        }
+        for i, message in enumerate(get_request_queue().receive_all())
+    ]}
+
+
+def _status(request_id):
+    response = request_handlers.get_request_status_handler(
+        {"pathParameters": {"requestId": request_id}}, LambdaContext()
+    )
+    return response["statusCode"], json.loads(response["body"])
+
+
+def _create(name):
+    event = {"body": json.dumps({
+        "account_name": name, "email": f"{name}@example.com", "organizational_unit": "Sandbox"
+    })}
+    return json.loads(account_handlers.create_account_handler(event, LambdaContext())["body"])
+
+
+def test_write_is_queued_and_committed_by_worker(gitlab_client):
+    """Test the handler returns before GitLab is called and the worker commits later"""
+    body = _create("testaccount")
+
+    assert body["status"] == "queued"
+    assert "commit_sha" not in body
+    gitlab_client.commit_config_files.assert_not_called()
+    status_code, status = _status(body["request_id"])
+    assert status_code == 200
+    assert status["status"] == "queued"
+    assert status["account_name"] == "testaccount"
+
+    result = request_handlers.request_worker_handler(_sqs_event(), LambdaContext())
+
+    assert result == {"batchItemFailures": []}
+    gitlab_client.commit_config_files.assert_called_once()
+    status_code, status = _status(body["request_id"])
+    assert status["status"] == "committed"
+    assert status["commit_sha"] == "abc123"
+
+
+def test_failed_commit_is_redelivered_then_marked_failed(gitlab_client):
+    """Test transient failures are retried and the last attempt dead-letters the message"""
+    gitlab_client.commit_config_files.side_effect = GitLabConflictError("branch moved")
+    body = _create("testaccount")
+    messages = get_request_queue().receive_all()
+
+    get_request_queue().messages.extend(messages)
+    result = request_handlers.request_worker_handler(_sqs_event(1), LambdaContext())
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "message-0"}]}
+    assert _status(body["request_id"])[1]["status"] == "queued"
+
+    get_request_queue().messages.extend(messages)
+    result = request_handlers.request_worker_handler(_sqs_event(5), LambdaContext())
+
+    assert result == {"batchItemFailures": []}
+    assert _status(body["request_id"])[1]["status"] == "failed"
+    assert [r["messageId"] for r in get_request_queue().dead_letters] == ["message-0"]
+
+
+def test_busy_account_is_deferred_without_spending_attempts(gitlab_client, monkeypatch):
+    """Test a leased account delays the message by the lease's Retry-After instead of failing it"""
+    monkeypatch.setattr(account_lock, "ACCOUNT_LOCK_WAIT", 0)
+    gitlab_client.commit_config_files.side_effect = GitLabConflictError("branch moved")
+    body = _create("testaccount")
+    messages = get_request_queue().receive_all()
+
+    get_request_queue().messages.extend(messages)
+    with account_locks(["testaccount"]):
+        result = request_handlers.request_worker_handler(_sqs_event(1), LambdaContext())
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "message-0"}]}
+    gitlab_client.commit_config_files.assert_not_called()
+    [(record, seconds)] = get_request_queue().deferred
+    assert record["messageId"] == "message-0" and seconds >= 1
+    assert _status(body["request_id"])[1]["deferrals"] == 1
+
+    # The fifth delivery is only the fourth attempt
+    get_request_queue().messages.extend(messages)
+    request_handlers.request_worker_handler(_sqs_event(5), LambdaContext())
+
+    assert _status(body["request_id"])[1]["status"] == "queued"
+    assert get_request_queue().dead_letters == []
+
+
+def test_rate_limited_request_is_deferred_without_spending_attempts(gitlab_client):
+    """Test a request refused a GitLab API token waits for the bucket's Retry-After"""
+    gitlab_client.commit_config_files.side_effect = RateLimitedError(retry_after=3)
+    body = _create("testaccount")
+
+    result = request_handlers.request_worker_handler(_sqs_event(1), LambdaContext())
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "message-0"}]}
+    assert [seconds for _, seconds in get_request_queue().deferred] == [3]
+    status = _status(body["request_id"])[1]
+    assert status["status"] == "queued"
+    assert status["deferrals"] == 1
+
+
+def test_queued_write_does_not_wait_for_a_busy_account(gitlab_client):
+    """Test asynchronous writes are queued while another operation holds the account"""
+    with account_locks(["testaccount"]):
+        body = _create("testaccount")
+
+    assert body["status"] == "queued"
+
+
+def test_delete_of_missing_account_fails_without_retry(gitlab_client):
+    """Test permanent errors are recorded instead of redelivered"""
+    gitlab_client.delete_account_config.side_effect = AccountNotFoundError("Account gone not found")
+    response = account_handlers.delete_account_handler(
+        {"body": json.dumps({"account_name": "gone"})}, LambdaContext()
+    )
+    request_id = json.loads(response["body"])["request_id"]
+
+    result = request_handlers.request_worker_handler(_sqs_event(), LambdaContext())
+
+    assert result == {"batchItemFailures": []}
+    assert _status(request_id)[1]["status"] == "failed"
+
+
+def test_unknown_request_returns_404():
+    """Test the status endpoint for an unknown request ID"""
+    assert _status("missing")[0] == 404
+
+
+def test_later_requests_for_a_failed_account_wait_for_it(gitlab_client):
+    """Test a failed message holds back the later messages of its FIFO group only"""
+    gitlab_client.commit_config_files.side_effect = [
+        GitLabConflictError("branch moved"), CommitResult(commit_sha="abc123")
+    ]
+    first = _create("testaccount")
+    _create("testaccount")
+    other = _create("otheraccount")
+
+    result = request_handlers.request_worker_handler(_sqs_event(), LambdaContext())
+
+    assert result == {"batchItemFailures": [
+        {"itemIdentifier": "message-0"}, {"itemIdentifier": "message-1"}
+    ]}
+    assert gitlab_client.commit_config_files.call_count == 2
+    assert _status(first["request_id"])[1]["status"] == "queued"
+    assert _status(other["request_id"])[1]["status"] == "committed"
+
+
+def test_large_request_is_sent_by_reference():
+    """Test bodies over the SQS limit go through S3 and are grouped and deduplicated"""
+    queue = SQSRequestQueue.__new__(SQSRequestQueue)
+    queue.queue_url, queue.payload_bucket, queue.max_message_bytes = "queue", "bucket", 100
+    queue.sqs, queue._s3 = MagicMock(), MagicMock()
+    message = {
+        "request_id": "r1", "operation": "commit", "account_name": "acct", "files": ["x" * 200]
+    }
+
+    queue.send(message)
+
+    stored = queue._s3.put_object.call_args.kwargs
+    assert stored["Key"] == "requests/r1.json"
+    sent = queue.sqs.send_message.call_args.kwargs
+    assert sent["MessageGroupId"] == "acct"
+    assert sent["MessageDeduplicationId"] == "r1"
+    assert len(sent["MessageBody"]) <= 100
+    queue._s3.get_object.return_value = {"Body": MagicMock(read=lambda: stored["Body"])}
+    assert queue.load(sent["MessageBody"]) == message
+
+
+def test_message_group_id_fits_sqs_limit():
+    """Test batches are grouped by their sorted accounts within SQS's 128 characters"""
+    assert message_group_id({"account_names": ["b", "a"]}) == "a,b"
+    assert len(message_group_id({"account_names": [f"account{i}" for i in range(50)]})) == 64
+
+
+def test_undecodable_message_is_a_failed_attempt(gitlab_client):
+    """Test a message whose body cannot be loaded is retried instead of failing the batch"""
+    event = {"Records": [{
+        "messageId": "message-0",
+        "receiptHandle": "receipt-0",
+        "body": "not json",
+        "attributes": {"ApproximateReceiveCount": "1", "MessageGroupId": "acct"},
+    }]}
+
+    result = request_handlers.request_worker_handler(event, LambdaContext())
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "message-0"}]}
+
+
+def test_requests_are_patched_once(monkeypatch):
+    """Test the worker patches requests for tracing on its first invocation only"""
+    patch = MagicMock()
+    monkeypatch.setattr(request_handlers.tracer, "patch", patch)
+    monkeypatch.setattr(request_handlers, "_requests_patched", False)
+
+    for _ in range(2):
+        request_handlers.request_worker_handler({"Records": []}, LambdaContext())
+
+    patch.assert_called_once_with(["requests"])
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from handlers import router
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def fake_handler(name):
+        def handler(event, context):
+            calls.append((name, event))
+            return {"statusCode": 202, "body": json.dumps({"handler": name})}
+        return handler
+
+    for route_key in list(router.ROUTES):
+        monkeypatch.setitem(router.ROUTES, route_key, fake_handler(route_key))
+    return calls
+
+
+def test_dispatches_on_route_key(calls):
+    """Test events are sent to the handler of their routeKey"""
+    event = {
+        "routeKey": "POST /accounts/{accountName}/upgrade",
+        "pathParameters": {"accountName": "test"},
+        "body": "{}",
+    }
+
+    response = router.router_handler(event, None)
+
+    assert response["statusCode"] == 202
+    assert calls == [("POST /accounts/{accountName}/upgrade", event)]
+
+
+def test_matches_path_behind_default_route(calls):
+    """Test the route and path parameters are derived from the path for $default"""
+    event = {
+        "routeKey": "$default",
+        "rawPath": "/accounts/test/options/backup",
+        "requestContext": {"http": {"method": "DELETE"}},
+    }
+
+    router.router_handler(event, None)
+
+    route_key, dispatched = calls[0]
+    assert route_key == "DELETE /accounts/{accountName}/options/{optionName}"
+    assert dispatched["routeKey"] == route_key
+    assert dispatched["pathParameters"] == {"accountName": "test", "optionName": "backup"}
+
+
+def test_unknown_route_returns_404(calls):
+    """Test requests matching no route are rejected"""
+    event = {
+        "routeKey": "$default",
+        "rawPath": "/accounts/test",
+        "requestContext": {"http": {"method": "PATCH"}},
+    }
+
+    response = router.router_handler(event, None)
+
+    assert response["statusCode"] == 404
+    assert calls == []
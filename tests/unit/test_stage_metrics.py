@@ -0,0 +1,84 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from handlers import account_handlers
+from models.account import CommitResult
+from tests.fixtures.lambda_context import LambdaContext
+from utils import stage_metrics
+from utils.stage_metrics import InMemoryMetricsSink, set_metrics_sink, stage
+
+
+@pytest.fixture
+def sink():
+    sink = InMemoryMetricsSink()
+    set_metrics_sink(sink)
+    yield sink
+    set_metrics_sink(None)
+
+
+@pytest.fixture
+def gitlab_client(monkeypatch):
+    client = MagicMock()
+    client.commit_config_files.return_value = CommitResult(commit_sha="abc123")
+    monkeypatch.setattr(account_handlers, "get_gitlab_client", lambda: client)
+    return client
+
+
+def _create_event(name="metricsaccount"):
+    return {"body": json.dumps({
+        "account_name": name,
+        "email": f"{name}@example.com",
+        "organizational_unit": "Sandbox"
+    })}
+
+
+def test_create_emits_one_record_with_every_stage(sink, gitlab_client, monkeypatch):
+    """Test a create invocation emits the duration of each stage in one EMF record"""
+    monkeypatch.setattr(stage_metrics, "_cold_start", True)
+    
+    response = account_handlers.create_account_handler(_create_event(), LambdaContext())
+    
+    assert response["statusCode"] == 202
+    assert len(sink.records) == 1
+    record = sink.records[0]
+    assert record["handler"] == "create_account_handler"
+    assert record["start"] == "cold"
+    directive = record["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == stage_metrics.STAGE_METRICS_NAMESPACE
+    assert ["handler", "start"] in [sorted(d) for d in directive["Dimensions"]]
+    assert set(sink.durations()[0]) == {"Parse", "Validate", "Render", "GitLabInit", "Commit"}
+    assert all(unit["Unit"] == "Milliseconds" for unit in directive["Metrics"])
+
+
+def test_later_invocations_are_warm(sink, gitlab_client, monkeypatch):
+    """Test only the first invocation in a container is reported as a cold start"""
+    monkeypatch.setattr(stage_metrics, "_cold_start", True)
+    
+    account_handlers.create_account_handler(_create_event("first"), LambdaContext())
+    account_handlers.create_account_handler(_create_event("second"), LambdaContext())
+    
+    assert [record["start"] for record in sink.records] == ["cold", "warm"]
+
+
+def test_failed_invocation_reports_stages_reached(sink, gitlab_client):
+    """Test stages are still emitted when the handler fails part way"""
+    event = _create_event("not-alphanumeric")
+    response = account_handlers.create_account_handler(event, LambdaContext())
+    
+    assert response["statusCode"] == 400
+    assert set(sink.durations()[0]) == {"Parse", "Validate"}
+    gitlab_client.commit_config_files.assert_not_called()
+
+
+def test_disabled_metrics_emit_nothing(gitlab_client, monkeypatch):
+    """Test no timer is created when stage metrics are off"""
+    monkeypatch.setattr(stage_metrics, "STAGE_METRICS", "off")
+    set_metrics_sink(None)
+    
+    response = account_handlers.create_account_handler(_create_event(), LambdaContext())
+    
+    assert response["statusCode"] == 202
+    assert stage_metrics.get_metrics_sink() is None
+    assert stage("Parse") is stage("Commit")
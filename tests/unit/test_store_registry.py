@@ -0,0 +1,32 @@
+from utils.store_registry import StoreRegistry
+
+
+class Store:
+    pass
+
+
+def test_instance_is_built_once_per_container():
+    """Test the configured backend is built on first use and then reused"""
+    registry = StoreRegistry("memory", {"memory": Store})
+
+    store = registry.get()
+
+    assert isinstance(store, Store)
+    assert registry.get() is store
+
+
+def test_unknown_backend_disables_the_feature():
+    """Test "none", or any backend without a factory, gives no instance"""
+    assert StoreRegistry("none", {"memory": Store}).get() is None
+
+
+def test_replaced_instance_is_used_until_reset():
+    """Test set() swaps the instance and None rebuilds it from the backend"""
+    registry = StoreRegistry("memory", {"memory": Store})
+    replacement = Store()
+
+    registry.set(replacement)
+    assert registry.get() is replacement
+
+    registry.set(None)
+    assert registry.get() is not replacement
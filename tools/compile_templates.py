@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Precompile the configuration templates to Python modules for packaging"""
+
+import argparse
+import json
+import logging
+
+from utils.config_generator import COMPILED_TEMPLATES_DIR, compile_templates
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("compile-templates")
+
+
+def main():
+    """Main entry point for the CLI"""
+    parser = argparse.ArgumentParser(description="Precompile Jinja templates")
+    parser.add_argument("--target", default=COMPILED_TEMPLATES_DIR,
+                        help="Directory to write the compiled modules to")
+    parser.add_argument("--terraform", action="store_true",
+                        help="Print the result as JSON for a Terraform external data source")
+    args = parser.parse_args()
+
+    compile_templates(args.target)
+    logger.info(f"Compiled templates to {args.target}")
+    if args.terraform:
+        # Logs go to stderr; Terraform reads one JSON object of strings from stdout
+        print(json.dumps({"target": args.target}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Local GitLab API stand-in for AFT API tests and benchmarks"""
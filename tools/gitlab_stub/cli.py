@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Command Line Interface for the local GitLab stand-in"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from tools.gitlab_stub.server import FaultInjector, GitLabStub
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("gitlab-stub")
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Local GitLab API stand-in")
+    parser.add_argument("--repo", help="Path of the bare repository (default: temporary directory)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with 500")
+    parser.add_argument("--conflict-rate", type=float, default=0.0,
+                        help="Share of commits rejected as branch-moved conflicts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for injected faults")
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+
+    # Serve command
+    serve_parser = subparsers.add_parser("serve", help="Serve the API until interrupted")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8929, help="Port to listen on")
+
+    # Benchmark command
+    bench_parser = subparsers.add_parser("bench", help="Measure GitLabClient commit throughput")
+    bench_parser.add_argument("--operations", type=int, default=100,
+                              help="Number of account commits")
+    bench_parser.add_argument("--concurrency", type=int, default=4, help="Concurrent committers")
+
+    return parser.parse_args()
+
+
+def bench(stub: GitLabStub, operations: int, concurrency: int) -> None:
+    """Commit generated account configs through GitLabClient and report throughput"""
+    os.environ.update({
+        "GITLAB_URL": stub.url,
+        "GITLAB_TOKEN": stub.token or "stub-token",
+        "GITLAB_PROJECT_ID": "aft/account-requests",
+    })
+    # Imported here so that serving does not need the Lambda sources on the path
+    from models.account import AccountRequest
+    from utils.config_generator import ConfigGenerator
+    from utils.gitlab_client import GitLabClient
+
+    clients = [GitLabClient() for _ in range(concurrency)]
+    generator = ConfigGenerator()
+
+    def run(index: int) -> bool:
+        client = clients[index % concurrency]
+        request = AccountRequest(
+            account_name=f"bench{index}",
+            email=f"bench{index}@example.com",
+            organizational_unit="Sandbox",
+        )
+        try:
+            client.commit_config_files(
+                generator.generate_account_config(request), f"Create account: bench{index}"
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Operation {index} failed: {str(e)}")
+            return False
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        succeeded = sum(executor.map(run, range(operations)))
+    elapsed = time.monotonic() - start
+
+    totals = {"attempts": 0, "retries": 0, "conflicts": 0}
+    for client in clients:
+        for key in totals:
+            totals[key] += getattr(client.stats, key)
+    logger.info(
+        f"{succeeded}/{operations} commits in {elapsed:.2f}s "
+        f"({succeeded / elapsed:.1f} commits/s), stats: {totals}, requests: {stub.request_counts}"
+    )
+
+
+def main():
+    """Main entry point for the CLI"""
+    args = parse_args()
+
+    if not args.command:
+        logger.error("No command specified. Use --help for usage information.")
+        sys.exit(1)
+
+    repo_path = args.repo or os.path.join(tempfile.mkdtemp(prefix="gitlab-stub-"), "repo.git")
+    faults = FaultInjector(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        conflict_rate=args.conflict_rate,
+        seed=args.seed,
+    )
+
+    if args.command == "serve":
+        stub = GitLabStub(repo_path, host=args.host, port=args.port, faults=faults)
+        logger.info(f"Serving GitLab stand-in on {stub.url} backed by {repo_path}")
+        try:
+            stub.serve_forever()
+        except KeyboardInterrupt:
+            stub.stop()
+
+    elif args.command == "bench":
+        with GitLabStub(repo_path, faults=faults) as stub:
+            bench(stub, args.operations, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Bare git repository operations backing the GitLab stand-in"""
+import os
+import subprocess
+import tempfile
+from typing import Any, Dict, List, Optional
+
+# Error messages GitLab returns for the same situations
+FILE_EXISTS = "A file with this name already exists"
+FILE_MISSING = "A file with this name doesn't exist"
+FILE_CHANGED = "You are attempting to update a file that has changed since you started editing it."
+REF_MOVED = "Could not update refs/heads/{branch}. Please refresh and try again."
+
+
+class CommitError(Exception):
+    """A commit was rejected, with the HTTP status GitLab would use"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class BareRepository:
+    """
+    Bare git repository driven through git plumbing commands.
+
+    Commits are built in a private index file and published with a
+    compare-and-swap ``update-ref``, so concurrent writers race on the branch
+    head exactly like they do on GitLab.
+    """
+
+    def __init__(self, path: str, branch: str = "main"):
+        self.path = path
+        self.default_branch = branch
+
+        if not os.path.exists(os.path.join(path, "HEAD")):
+            os.makedirs(path, exist_ok=True)
+            self._git("init", "--bare", "--quiet", f"--initial-branch={branch}")
+        if self.head(branch) is None:
+            empty_tree = self._git("mktree", stdin="").strip()
+            initial = self._git("commit-tree", empty_tree, "-m", "Initial commit").strip()
+            self._git("update-ref", f"refs/heads/{branch}", initial)
+
+    def _git(
+        self, *args: str, stdin: Optional[str] = None, env: Optional[Dict[str, str]] = None
+    ) -> str:
+        git_env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "AFT API",
+            "GIT_AUTHOR_EMAIL": "aft-api@example.com",
+            "GIT_COMMITTER_NAME": "AFT API",
+            "GIT_COMMITTER_EMAIL": "aft-api@example.com",
+            **(env or {}),
+        }
+        result = subprocess.run(
+            ["git", f"--git-dir={self.path}", *args],
+            input=stdin.encode("utf-8") if stdin is not None else None,
+            capture_output=True,
+            env=git_env,
+            check=True,
+        )
+        return result.stdout.decode("utf-8")
+
+    def head(self, branch: str) -> Optional[str]:
+        """Get the commit a branch points to, or None if it does not exist"""
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"refs/heads/{branch}").strip()
+        except subprocess.CalledProcessError:
+            return None
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Resolve a branch name or commit SHA to a commit SHA"""
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").strip()
+        except subprocess.CalledProcessError:
+            return None
+
+    def tree(self, ref: str, path: str = "", recursive: bool = False) -> List[Dict[str, Any]]:
+        """
+        List a directory the way the repository tree API does
+
+        Args:
+            ref: Branch or commit
+            path: Directory to list, empty for the root
+            recursive: Include nested entries
+
+        Returns:
+            Tree entries with id, name, type, path and mode
+        """
+        args = ["ls-tree", "--full-tree"]
+        if recursive:
+            args += ["-r", "-t"]
+        args.append(ref)
+        if path:
+            args += ["--", path.rstrip("/") + "/"]
+
+        entries = []
+        for line in self._git(*args).splitlines():
+            meta, entry_path = line.split("\t", 1)
+            mode, entry_type, sha = meta.split()
+            entries.append({
+                "id": sha,
+                "name": entry_path.rsplit("/", 1)[-1],
+                "type": entry_type,
+                "path": entry_path,
+                "mode": mode,
+            })
+        return entries
+
+    def read_file(self, ref: str, path: str) -> Optional[bytes]:
+        """Read a file at a ref, or None if it does not exist"""
+        try:
+            return subprocess.run(
+                ["git", f"--git-dir={self.path}", "cat-file", "blob", f"{ref}:{path}"],
+                capture_output=True,
+                check=True,
+            ).stdout
+        except subprocess.CalledProcessError:
+            return None
+
+    def last_commit(self, ref: str, path: str) -> Optional[str]:
+        """Get the last commit that touched a file at a ref, or None if the file does not exist"""
+        if self.read_file(ref, path) is None:
+            return None
+        return self._git("log", "-1", "--format=%H", ref, "--", path).strip()
+
+    def blob_id(self, ref: str, path: str) -> Optional[str]:
+        """Get the blob ID of a file at a ref, or None if it does not exist"""
+        try:
+            return self._git("rev-parse", "--verify", "--quiet", f"{ref}:{path}").strip()
+        except subprocess.CalledProcessError:
+            return None
+
+    def read_blob(self, sha: str) -> Optional[bytes]:
+        """Read a blob by ID, or None if it does not exist"""
+        try:
+            return subprocess.run(
+                ["git", f"--git-dir={self.path}", "cat-file", "blob", sha],
+                capture_output=True,
+                check=True,
+            ).stdout
+        except subprocess.CalledProcessError:
+            return None
+
+    def commits_between(self, from_ref: str, to_ref: str) -> List[Dict[str, Any]]:
+        """
+        List the commits reachable from to_ref but not from from_ref, oldest first
+
+        Args:
+            from_ref: Base commit
+            to_ref: Target commit
+
+        Returns:
+            Commit attributes as the compare API reports ``commits``
+        """
+        output = self._git(
+            "log", "--reverse", "--format=%H%x00%P%x00%B%x1e", f"{from_ref}..{to_ref}"
+        )
+        return [
+            self._commit_attributes(*record.strip("\n").split("\0"))
+            for record in output.split("\x1e")
+            if record.strip()
+        ]
+
+    def get_commit(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Get the attributes of a commit, or None if it does not exist"""
+        sha = self.resolve(ref)
+        if sha is None:
+            return None
+        parents, message = self._git("log", "-1", "--format=%P%x00%B", sha).split("\0", 1)
+        return self._commit_attributes(sha, parents, message)
+
+    def compare(self, from_ref: str, to_ref: str) -> List[Dict[str, Any]]:
+        """
+        Diff two commits the way the compare API reports ``diffs``
+
+        Args:
+            from_ref: Base commit
+            to_ref: Target commit
+
+        Returns:
+            Diff entries with old_path, new_path and the file status flags
+        """
+        output = self._git("diff-tree", "-r", "-M", "--name-status", from_ref, to_ref)
+        diffs = []
+        for line in output.splitlines():
+            fields = line.split("\t")
+            status = fields[0][0]
+            old_path = fields[1]
+            new_path = fields[2] if status == "R" else fields[1]
+            diffs.append({
+                "old_path": old_path,
+                "new_path": new_path,
+                "new_file": status == "A",
+                "renamed_file": status == "R",
+                "deleted_file": status == "D",
+            })
+        return diffs
+
+    def commit(self, branch: str, message: str, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Apply commit actions on top of a branch
+
+        Args:
+            branch: Branch to commit to
+            message: Commit message
+            actions: create, update, delete or move actions as the commits API takes them
+
+        Returns:
+            Commit attributes as the commits API returns them
+
+        Raises:
+            CommitError: If an action is invalid or the branch moved during the commit
+        """
+        parent = self.head(branch)
+        if parent is None:
+            raise CommitError("You can only create or edit files when you are on a branch")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {"GIT_INDEX_FILE": os.path.join(tmp, "index")}
+            self._git("read-tree", parent, env=env)
+            existing = {
+                entry["path"]
+                for entry in self.tree(parent, recursive=True)
+                if entry["type"] == "blob"
+            }
+
+            for action in actions:
+                self._apply(parent, action, existing, env)
+
+            tree = self._git("write-tree", env=env).strip()
+
+        sha = self._git("commit-tree", tree, "-p", parent, "-m", message).strip()
+        try:
+            # Compare-and-swap: fails if someone else moved the branch meanwhile
+            self._git("update-ref", f"refs/heads/{branch}", sha, parent)
+        except subprocess.CalledProcessError:
+            raise CommitError(REF_MOVED.format(branch=branch))
+
+        return self._commit_attributes(sha, parent, message)
+
+    @staticmethod
+    def _commit_attributes(sha: str, parents: str, message: str) -> Dict[str, Any]:
+        return {
+            "id": sha,
+            "short_id": sha[:8],
+            "title": message.splitlines()[0] if message else "",
+            "message": message,
+            "parent_ids": parents.split(),
+        }
+
+    def _apply(
+        self, parent: str, action: Dict[str, Any], existing: set, env: Dict[str, str]
+    ) -> None:
+        kind = action.get("action")
+        file_path = action.get("file_path", "")
+        if not file_path:
+            raise CommitError("file_path is missing")
+
+        if kind in ("update", "delete", "move") and action.get("last_commit_id"):
+            self._check_unchanged(parent, file_path, action["last_commit_id"])
+
+        if kind == "create":
+            if file_path in existing:
+                raise CommitError(FILE_EXISTS)
+            self._write(file_path, action.get("content", ""), env)
+            existing.add(file_path)
+        elif kind == "update":
+            if file_path not in existing:
+                raise CommitError(FILE_MISSING)
+            self._write(file_path, action.get("content", ""), env)
+        elif kind == "delete":
+            if file_path not in existing:
+                raise CommitError(FILE_MISSING)
+            self._remove(file_path, env)
+            existing.discard(file_path)
+        elif kind == "move":
+            previous_path = action.get("previous_path", "")
+            if previous_path not in existing:
+                raise CommitError(FILE_MISSING)
+            content = action.get("content")
+            if content is None:
+                content = (self.read_file(parent, previous_path) or b"").decode("utf-8")
+            self._remove(previous_path, env)
+            existing.discard(previous_path)
+            self._write(file_path, content, env)
+            existing.add(file_path)
+        else:
+            raise CommitError(f"Unknown action: {kind}")
+
+    def _write(self, file_path: str, content: str, env: Dict[str, str]) -> None:
+        sha = self._git("hash-object", "-w", "--stdin", stdin=content).strip()
+        self._git("update-index", "--add", "--cacheinfo", f"100644,{sha},{file_path}", env=env)
+
+    def _remove(self, file_path: str, env: Dict[str, str]) -> None:
+        # Mode 0 removes the entry; --force-remove would need a work tree
+        self._git("update-index", "--index-info", stdin=f"0 {'0' * 40}\t{file_path}\n", env=env)
+
+    def _check_unchanged(self, parent: str, file_path: str, last_commit_id: str) -> None:
+        """
+        Reject the action unless last_commit_id is the file's last commit
+
+        GitLab compares the two by equality, so pinning to any later commit,
+        such as the branch head, is rejected as well.
+        """
+        file_commit = self._git("log", "-1", "--format=%H", parent, "--", file_path).strip()
+        if file_commit and file_commit != last_commit_id:
+            raise CommitError(FILE_CHANGED)
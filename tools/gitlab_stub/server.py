@@ -0,0 +1,324 @@
+"""HTTP server implementing the GitLab v4 endpoints used by the AFT API"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+
+from tools.gitlab_stub.repository import REF_MOVED, BareRepository, CommitError
+
+PROJECT_PATH = re.compile(r"^/api/v4/projects/(?P<project>[^/]+)(?P<rest>/.*)?$")
+
+
+class FaultInjector:
+    """
+    Latency, errors and branch conflicts injected into stub responses.
+
+    Random faults come from a seeded generator, so a run with the same seed
+    and the same request order sees the same faults. ``fail_next`` queues
+    scripted responses for fully deterministic tests.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        conflict_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.conflict_rate = conflict_rate
+        self._random = random.Random(seed)
+        self._scripted: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def fail_next(self, status_code: int, message: str, count: int = 1) -> None:
+        """Answer the next ``count`` requests with the given error"""
+        with self._lock:
+            self._scripted.extend([(status_code, message)] * count)
+
+    def next_fault(self, is_commit: bool, branch: str) -> Optional[Tuple[int, str]]:
+        """Pick the fault for the next request, if any"""
+        with self._lock:
+            if self._scripted:
+                return self._scripted.pop(0)
+            roll = self._random.random()
+        if roll < self.error_rate:
+            return 500, "500 Internal Server Error"
+        if is_commit and roll < self.error_rate + self.conflict_rate:
+            return 400, REF_MOVED.format(branch=branch)
+        return None
+
+
+class GitLabStub:
+    """
+    Local GitLab API stand-in backed by a bare git repository.
+
+    Supported endpoints: project get, branch get, commits create and get,
+    repository tree, compare, file metadata (HEAD), raw file and raw blob.
+    Start it with ``start()`` or as a context manager and point
+    ``GITLAB_URL`` at ``url``.
+    """
+
+    def __init__(
+        self,
+        repo_path: str,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        branch: str = "main",
+        token: Optional[str] = None,
+        faults: Optional[FaultInjector] = None,
+    ):
+        self.repository = BareRepository(repo_path, branch=branch)
+        self.token = token
+        self.faults = faults or FaultInjector()
+        self.request_counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as GITLAB_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "GitLabStub":
+        """Serve requests on a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted"""
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the port"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "GitLabStub":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def count(self, endpoint: str) -> None:
+        with self._counts_lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+
+
+def _make_handler(stub: GitLabStub) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_HEAD(self) -> None:
+            self._dispatch("HEAD")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str) -> None:
+            parsed = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            body = self._read_body()
+
+            match = PROJECT_PATH.match(parsed.path)
+            if not match:
+                return self._send(404, {"message": "404 Not Found"})
+            project_id = unquote(match.group("project"))
+            rest = match.group("rest") or ""
+            endpoint = _endpoint_name(method, rest)
+            stub.count(endpoint)
+
+            if stub.token and self.headers.get("PRIVATE-TOKEN") != stub.token:
+                return self._send(401, {"message": "401 Unauthorized"})
+
+            if stub.faults.latency:
+                time.sleep(stub.faults.latency)
+            branch = (body or {}).get("branch", stub.repository.default_branch)
+            fault = stub.faults.next_fault(endpoint == "POST commits", branch)
+            if fault:
+                return self._send(fault[0], {"message": fault[1]})
+
+            try:
+                self._route(method, project_id, rest, query, body)
+            except CommitError as e:
+                self._send(e.status_code, {"message": e.message})
+            except Exception as e:
+                self._send(500, {"message": f"500 Internal Server Error: {str(e)}"})
+
+        def _route(
+            self,
+            method: str,
+            project_id: str,
+            rest: str,
+            query: Dict[str, str],
+            body: Optional[Dict[str, Any]],
+        ) -> None:
+            repository = stub.repository
+
+            if method == "GET" and rest == "":
+                return self._send(200, {
+                    "id": project_id,
+                    "path_with_namespace": project_id,
+                    "default_branch": repository.default_branch,
+                })
+
+            if method == "GET" and rest.startswith("/repository/branches/"):
+                branch = unquote(rest[len("/repository/branches/"):])
+                head = repository.head(branch)
+                if head is None:
+                    return self._send(404, {"message": "404 Branch Not Found"})
+                return self._send(200, {"name": branch, "commit": {"id": head}})
+
+            if method == "POST" and rest == "/repository/commits":
+                commit = repository.commit(
+                    body.get("branch", repository.default_branch),
+                    body.get("commit_message", ""),
+                    body.get("actions", []),
+                )
+                return self._send(201, commit)
+
+            if method == "GET" and rest.startswith("/repository/commits/"):
+                commit = repository.get_commit(unquote(rest[len("/repository/commits/"):]))
+                if commit is None:
+                    return self._send(404, {"message": "404 Commit Not Found"})
+                return self._send(200, commit)
+
+            if method == "GET" and rest == "/repository/tree":
+                return self._tree(query)
+
+            if method == "GET" and rest == "/repository/compare":
+                from_sha = repository.resolve(query.get("from", ""))
+                to_sha = repository.resolve(query.get("to", ""))
+                if from_sha is None or to_sha is None:
+                    return self._send(404, {"message": "404 Ref Not Found"})
+                return self._send(200, {
+                    "commit": {"id": to_sha},
+                    "commits": repository.commits_between(from_sha, to_sha),
+                    "diffs": repository.compare(from_sha, to_sha),
+                    "compare_timeout": False,
+                    "compare_same_ref": from_sha == to_sha,
+                })
+
+            file_meta = re.match(r"^/repository/files/(?P<path>.+)$", rest)
+            if method == "HEAD" and file_meta:
+                ref = query.get("ref", repository.default_branch)
+                file_path = unquote(file_meta.group("path"))
+                last_commit = repository.last_commit(ref, file_path)
+                if last_commit is None:
+                    return self._send(404, {"message": "404 File Not Found"})
+                return self._send_raw(b"", headers={
+                    "X-Gitlab-File-Path": file_path,
+                    "X-Gitlab-Ref": ref,
+                    "X-Gitlab-Commit-Id": repository.resolve(ref) or "",
+                    "X-Gitlab-Last-Commit-Id": last_commit,
+                    "X-Gitlab-Blob-Id": repository.blob_id(ref, file_path) or "",
+                })
+
+            raw_file = re.match(r"^/repository/files/(?P<path>.+)/raw$", rest)
+            if method == "GET" and raw_file:
+                ref = query.get("ref", repository.default_branch)
+                content = repository.read_file(ref, unquote(raw_file.group("path")))
+                if content is None:
+                    return self._send(404, {"message": "404 File Not Found"})
+                return self._send_raw(content)
+
+            raw_blob = re.match(r"^/repository/blobs/(?P<sha>[0-9a-f]+)/raw$", rest)
+            if method == "GET" and raw_blob:
+                content = repository.read_blob(raw_blob.group("sha"))
+                if content is None:
+                    return self._send(404, {"message": "404 Blob Not Found"})
+                return self._send_raw(content)
+
+            self._send(404, {"message": "404 Not Found"})
+
+        def _tree(self, query: Dict[str, str]) -> None:
+            ref = stub.repository.resolve(query.get("ref", stub.repository.default_branch))
+            if ref is None:
+                return self._send(404, {"message": "404 Tree Not Found"})
+            # python-gitlab sends booleans as "True"; GitLab parses them case-insensitively
+            entries = stub.repository.tree(
+                ref, query.get("path", ""), query.get("recursive", "false").lower() == "true"
+            )
+            if query.get("path") and not entries:
+                return self._send(404, {"message": "404 Tree Not Found"})
+
+            per_page = min(int(query.get("per_page", "20")), 100)
+            page = int(query.get("page", "1"))
+            total_pages = max(1, -(-len(entries) // per_page))
+            headers = {
+                "X-Page": str(page),
+                "X-Per-Page": str(per_page),
+                "X-Total": str(len(entries)),
+                "X-Total-Pages": str(total_pages),
+            }
+            if page < total_pages:
+                headers["X-Next-Page"] = str(page + 1)
+                next_query = urlencode({**query, "page": page + 1})
+                host = self.headers.get("Host", "")
+                path = urlparse(self.path).path
+                headers["Link"] = f'<http://{host}{path}?{next_query}>; rel="next"'
+            self._send(200, entries[(page - 1) * per_page:page * per_page], headers)
+
+        def _read_body(self) -> Optional[Dict[str, Any]]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return None
+            raw = self.rfile.read(length)
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return {key: values[-1] for key, values in parse_qs(raw.decode()).items()}
+
+        def _send(
+            self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None
+        ) -> None:
+            self._send_raw(json.dumps(payload).encode("utf-8"), status, "application/json", headers)
+
+        def _send_raw(
+            self,
+            content: bytes,
+            status: int = 200,
+            content_type: str = "text/plain",
+            headers: Optional[Dict[str, str]] = None,
+        ) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            # HEAD answers carry the headers only
+            if self.command != "HEAD":
+                self.wfile.write(content)
+
+    return Handler
+
+
+def _endpoint_name(method: str, rest: str) -> str:
+    """Group request paths into endpoint names for the request counters"""
+    if rest == "":
+        return f"{method} project"
+    if rest.startswith("/repository/branches/"):
+        return f"{method} branch"
+    if rest.startswith("/repository/files/"):
+        return f"{method} raw file" if rest.endswith("/raw") else f"{method} file"
+    if rest.startswith("/repository/blobs/"):
+        return f"{method} raw blob"
+    if rest.startswith("/repository/commits/"):
+        return f"{method} commit"
+    return f"{method} {rest.rsplit('/', 1)[-1]}"
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Measure the import cost of each Lambda entry point with ``python -X importtime``"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger("import-budget")
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budgets.json")
+
+# Multiplier applied to every budget, for build machines slower than the reference one
+IMPORT_BUDGET_SCALE = float(os.environ.get("IMPORT_BUDGET_SCALE", "1"))
+
+
+class ImportProfile(NamedTuple):
+    """Import cost of one entry point module"""
+
+    module: str
+    total_ms: float
+    # Cumulative milliseconds per imported module, interpreter startup excluded
+    modules: Dict[str, float]
+
+    def loaded(self, package: str) -> bool:
+        """Check whether a package or one of its submodules was imported"""
+        return any(name == package or name.startswith(f"{package}.") for name in self.modules)
+
+    def slowest(self, count: int = 10) -> List[str]:
+        """Names and cumulative times of the slowest imports, nested ones included"""
+        ranked = sorted(self.modules.items(), key=lambda item: item[1], reverse=True)
+        return [f"{name} {ms:.1f}ms" for name, ms in ranked[:count]]
+
+
+def _importtime(code: str) -> List[tuple]:
+    """Run code in a fresh interpreter and parse its importtime report"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        # One space, then two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(cumulative) / 1000))
+    return entries
+
+
+def measure(module: str) -> ImportProfile:
+    """
+    Measure the import of a module in a fresh interpreter
+
+    Args:
+        module: Module named in the Lambda handler setting, e.g. handlers.router
+
+    Returns:
+        Import profile of the module
+    """
+    startup = {name for name, _, _ in _importtime("pass")}
+    modules = {}
+    total = 0.0
+    for name, depth, cumulative in _importtime(f"import {module}"):
+        if name in startup:
+            continue
+        modules[name] = cumulative
+        if depth == 0:
+            total += cumulative
+    return ImportProfile(module=module, total_ms=total, modules=modules)
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> Dict[str, Dict]:
+    """
+    Load the per-handler import budgets
+
+    Returns:
+        Mapping of handler (``module.function``) to its ``budget_ms`` and the
+        packages it must not import
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def check(handler: str, budget: Dict, profile: Optional[ImportProfile] = None) -> List[str]:
+    """
+    Check one handler against its budget
+
+    Args:
+        handler: Handler setting, ``module.function``
+        budget: Budget entry from the budgets file
+        profile: Profile of the handler module, measured when omitted
+
+    Returns:
+        Violations, empty when the handler is within budget
+    """
+    module = handler.rsplit(".", 1)[0]
+    profile = profile or measure(module)
+    violations = [
+        f"{handler} imports {package}"
+        for package in budget.get("forbidden", []) if profile.loaded(package)
+    ]
+    budget_ms = budget["budget_ms"] * IMPORT_BUDGET_SCALE
+    if profile.total_ms > budget_ms:
+        violations.append(
+            f"{handler} imports in {profile.total_ms:.0f}ms, budget {budget_ms:.0f}ms "
+            f"(slowest: {', '.join(profile.slowest(5))})"
+        )
+    return violations
+
+
+def main():
+    """Main entry point for the CLI"""
+    parser = argparse.ArgumentParser(description="Check Lambda entry points against import budgets")
+    parser.add_argument("--budgets", default=BUDGETS_PATH, help="Budgets file")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to report per module")
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budgets)
+    profiles: Dict[str, ImportProfile] = {}
+    failed = False
+    for handler, budget in budgets.items():
+        module = handler.rsplit(".", 1)[0]
+        if module not in profiles:
+            profiles[module] = measure(module)
+            logger.info(f"{module}: {profiles[module].total_ms:.1f}ms")
+            for entry in profiles[module].slowest(args.top):
+                logger.info(f"    {entry}")
+        for violation in check(handler, budget, profiles[module]):
+            logger.error(violation)
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()